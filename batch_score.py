@@ -0,0 +1,122 @@
+"""Score many system outputs against one gold file from the command line
+
+Runs `scorer.pl all` through the same code as the web application
+(scoring.run_perl_scorer) for every response file, spread over a process pool, and
+writes one table with the scores of all files. Only the scoring module is
+imported, not main.py, so no database, upload directories or web server are
+involved and this suits final rankings and reproducibility checks.
+
+Responses may be files or directories; a directory contributes its *.txt files.
+Files that fail to score are listed with their error and make the run exit with
+status 1.
+
+Run from the repository root (the scorer is looked up in scorer/):
+    python -m batch_score gold.txt submissions/
+    python -m batch_score gold.txt a.txt b.txt --output results.json
+    python -m batch_score gold.txt submissions/ --workers 8 --output results.csv
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from fastapi import HTTPException
+
+import scoring
+from scoring import logger
+
+# Score keys of parse_scorer_output, in leaderboard order
+SCORE_METRICS = ['muc', 'bcub', 'ceafm', 'blanc']
+FIELDS = ['file'] + [f"{metric}_{part}" for metric in SCORE_METRICS for part in ('recall', 'precision', 'f1')] + ['error']
+
+
+def collect_responses(paths: list) -> list:
+    """Expand directories to their *.txt files, keeping the order given"""
+    responses = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            responses.extend(sorted(str(child) for child in path.glob('*.txt') if child.is_file()))
+        else:
+            responses.append(str(path))
+    return responses
+
+
+def score_file(gold_path: str, response_path: str) -> dict:
+    """One output row: the scores of a response, or the reason it could not be scored"""
+    row = {'file': response_path}
+    try:
+        scores = scoring.run_perl_scorer(gold_path, response_path, check_environment=False)
+    except HTTPException as e:
+        row['error'] = str(e.detail)
+        return row
+    except Exception as e:
+        row['error'] = f"Evaluation failed: {e}"
+        return row
+
+    for metric in SCORE_METRICS:
+        for part in ('recall', 'precision', 'f1'):
+            value = scores.get(metric, {}).get(part)
+            # Four decimals, as stored in user_evaluations
+            row[f"{metric}_{part}"] = round(value, 4) if value is not None else None
+    return row
+
+
+def write_table(rows: list, output, output_format: str):
+    if output_format == 'json':
+        json.dump([{field: row.get(field) for field in FIELDS} for row in rows], output, indent=2)
+        output.write('\n')
+    else:
+        writer = csv.DictWriter(output, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main_entry():
+    parser = argparse.ArgumentParser(description="Score many system outputs against one gold file")
+    parser.add_argument('gold', help="gold dataset file")
+    parser.add_argument('responses', nargs='+', help="response files, or directories of *.txt response files")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help="scorer processes run at once")
+    parser.add_argument('--output', help="output file (default standard output)")
+    parser.add_argument('--format', choices=['csv', 'json'], help="output format (default from the output extension, else csv)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    output_format = args.format or ('json' if args.output and args.output.endswith('.json') else 'csv')
+    if not os.path.exists(args.gold):
+        parser.error(f"gold file not found: {args.gold}")
+    responses = collect_responses(args.responses)
+    if not responses:
+        parser.error("no response files found")
+
+    try:
+        scoring.check_scorer_environment()
+    except HTTPException as e:
+        sys.exit(f"Scorer not available: {e.detail}")
+
+    started = time.perf_counter()
+    workers = max(1, min(args.workers, len(responses)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        rows = list(pool.map(score_file, [args.gold] * len(responses), responses))
+    failed = sum(1 for row in rows if row.get('error'))
+    logger.info(f"Scored {len(rows) - failed} of {len(rows)} files with {workers} workers in {time.perf_counter() - started:.1f}s")
+
+    if args.output:
+        with open(args.output, 'w', newline='', encoding='utf-8') as output:
+            write_table(rows, output, output_format)
+    else:
+        write_table(rows, sys.stdout, output_format)
+
+    for row in rows:
+        if row.get('error'):
+            logger.error(f"{row['file']}: {row['error']}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main_entry()
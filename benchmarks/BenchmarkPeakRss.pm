@@ -0,0 +1,21 @@
+package BenchmarkPeakRss;
+
+# Loaded with PERL5OPT=-MBenchmarkPeakRss by scorer_benchmark.py. Writes the
+# process's peak resident set size (VmHWM, in kB) to $PEAK_RSS_FILE on exit.
+
+END {
+	my $file = $ENV{PEAK_RSS_FILE};
+	if ($file && open(my $status, '<', '/proc/self/status')) {
+		while (my $line = <$status>) {
+			if ($line =~ /^VmHWM:\s+(\d+)\s+kB/) {
+				open(my $out, '>', $file) || last;
+				print $out $1;
+				close($out);
+				last;
+			}
+		}
+		close($status);
+	}
+}
+
+1;
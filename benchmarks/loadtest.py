@@ -0,0 +1,349 @@
+"""End-to-end load test of the FastAPI app
+
+Boots main:app under uvicorn against a seeded local database, drives a mix of
+homepage views, logins, dashboard views and /evaluate uploads from concurrent
+clients and reports throughput and p50/p95/p99 latency per route.
+
+By default the database is a throwaway SQLite file (DB_BACKEND=sqlite), so the
+whole run works offline on one machine. Pass --database mysql to seed and use
+the MySQL server configured through the DB_* environment variables instead;
+point it at a scratch database, since seeded rows are not removed.
+
+Usage:
+    python benchmarks/loadtest.py
+    python benchmarks/loadtest.py --languages 10 --users 200 --evaluations 5000 --concurrency 32 --duration 60
+    python benchmarks/loadtest.py --mix home=70,login=10,client=15,evaluate=5 --output loadtest.json
+"""
+
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import secrets
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+REPO_DIR = BENCHMARK_DIR.parent
+
+sys.path.insert(0, str(BENCHMARK_DIR))
+from scorer_benchmark import generate_corpus
+
+LOADTEST_PASSWORD = 'loadtest'
+
+DEFAULT_MIX = 'home=60,login=10,client=25,evaluate=5'
+
+# Small corpora keep /evaluate realistic without letting the scorer dominate every run
+CORPUS_SCENARIO = {'documents': 5, 'mentions': 30, 'chain_distribution': 'geometric', 'mean_chain_length': 3, 'error_rate': 0.15}
+
+
+def prepare_workdir(workdir: Path):
+    """Give the server its own working directory with templates, static files and scorer linked in"""
+    for name in ['templates', 'static', 'scorer']:
+        link = workdir / name
+        if not link.exists():
+            os.symlink(REPO_DIR / name, link, target_is_directory=True)
+
+
+def seed_database(workdir: Path, languages: int, users: int, evaluations: int, seed: int) -> dict:
+    """Create languages with gold data, users and past evaluations through main.get_db_connection"""
+    import bcrypt
+    import main
+
+    rng = random.Random(seed)
+    conn = main.get_db_connection()
+    if not conn:
+        raise RuntimeError("Could not connect to the load test database")
+    cursor = conn.cursor()
+    run_id = secrets.token_hex(3)
+
+    language_ids = []
+    responses = {}
+    for number in range(languages):
+        cursor.execute(
+            "INSERT INTO languages (language_code, language_name) VALUES (%s, %s)",
+            (f"lt{run_id}{number}", f"Load Test {run_id} {number}")
+        )
+        language_id = cursor.lastrowid
+        language_ids.append(language_id)
+
+        corpus_dir = workdir / "gold_datasets" / f"lang_{language_id}"
+        corpus_dir.mkdir(parents=True, exist_ok=True)
+        gold_path, response_path = generate_corpus(corpus_dir, CORPUS_SCENARIO, seed + number)
+        cursor.execute(
+            "INSERT INTO gold_datasets (language_id, filename, file_path, uploaded_by) VALUES (%s, %s, %s, %s)",
+            (language_id, gold_path.name, str(gold_path), 'loadtest')
+        )
+        responses[language_id] = response_path.read_bytes()
+
+    # One hash shared by all users: seeding stays fast, logins still pay the full bcrypt cost
+    password_hash = bcrypt.hashpw(LOADTEST_PASSWORD.encode(), bcrypt.gensalt()).decode()
+    usernames = []
+    user_ids = []
+    for number in range(users):
+        username = f"load{run_id}_{number}"
+        cursor.execute(
+            "INSERT INTO users (username, email, password_hash, is_active) VALUES (%s, %s, %s, 1)",
+            (username, f"{username}@loadtest.local", password_hash)
+        )
+        usernames.append(username)
+        user_ids.append(cursor.lastrowid)
+
+    rows = []
+    for number in range(evaluations):
+        language_id = rng.choice(language_ids)
+        scores = {metric: {'recall': rng.random(), 'precision': rng.random(), 'f1': rng.random()}
+                  for metric in ['muc', 'bcub', 'ceafm', 'blanc']}
+        rows.append(main.evaluation_insert_params(
+            rng.choice(user_ids), language_id, f"seed_{number}.txt",
+            str(workdir / "gold_datasets" / f"lang_{language_id}" / "response.txt"), scores
+        ))
+    cursor.executemany(main.EVALUATION_INSERT_SQL, rows)
+
+    conn.commit()
+    conn.close()
+    return {'language_ids': language_ids, 'usernames': usernames, 'responses': responses}
+
+
+def start_server(workdir: Path, port: int, env: dict) -> subprocess.Popen:
+    log = open(workdir / "server.log", 'wb')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning'],
+        cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited early, see {workdir / 'server.log'}")
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            connection.request('GET', '/login')
+            if connection.getresponse().status == 200:
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("Server did not start within 60 seconds")
+
+
+def multipart_body(fields: dict, file_field: str, filename: str, content: bytes) -> tuple:
+    boundary = secrets.token_hex(16)
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+        f'Content-Type: text/plain\r\n\r\n'.encode() + content + b'\r\n'
+    )
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+class LoadClient:
+    """One simulated participant with its own connection and session cookie"""
+
+    def __init__(self, port: int, username: str, seed_data: dict, rng: random.Random):
+        self.port = port
+        self.username = username
+        self.seed_data = seed_data
+        self.rng = rng
+        self.cookie = None
+        self.connection = None
+
+    def request(self, method: str, path: str, body=None, headers=None):
+        headers = dict(headers or {})
+        if self.cookie:
+            headers['Cookie'] = self.cookie
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=180)
+            try:
+                self.connection.request(method, path, body=body, headers=headers)
+                response = self.connection.getresponse()
+                payload = response.read()
+                return response, payload
+            except (http.client.HTTPException, OSError):
+                # Reconnect once if the server closed a keep-alive connection
+                self.connection.close()
+                self.connection = None
+                if attempt:
+                    raise
+
+    def home(self) -> bool:
+        response, _ = self.request('GET', '/')
+        return response.status == 200
+
+    def login(self) -> bool:
+        body = urllib.parse.urlencode({'username': self.username, 'password': LOADTEST_PASSWORD})
+        response, _ = self.request('POST', '/login', body, {'Content-Type': 'application/x-www-form-urlencoded'})
+        cookie = response.getheader('Set-Cookie')
+        if response.status != 302 or not cookie:
+            return False
+        self.cookie = cookie.split(';', 1)[0]
+        return True
+
+    def client(self) -> bool:
+        if not self.cookie and not self.login():
+            return False
+        response, _ = self.request('GET', '/client')
+        return response.status == 200
+
+    def evaluate(self) -> bool:
+        if not self.cookie and not self.login():
+            return False
+        language_id = self.rng.choice(self.seed_data['language_ids'])
+        body, content_type = multipart_body(
+            {'language_id': language_id}, 'file', 'loadtest_submission.txt', self.seed_data['responses'][language_id]
+        )
+        response, payload = self.request('POST', '/evaluate', body, {'Content-Type': content_type})
+        return response.status == 200 and json.loads(payload).get('success', False)
+
+
+def run_client(client: LoadClient, routes: list, weights: list, deadline: float, results: dict, lock: threading.Lock):
+    while time.time() < deadline:
+        route = client.rng.choices(routes, weights)[0]
+        start = time.perf_counter()
+        try:
+            ok = getattr(client, route)()
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            results[route]['latencies'].append(elapsed)
+            if not ok:
+                results[route]['errors'] += 1
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(results: dict, elapsed: float) -> dict:
+    summary = {}
+    for route, data in sorted(results.items()):
+        latencies = sorted(data['latencies'])
+        summary[route] = {
+            'requests': len(latencies),
+            'errors': data['errors'],
+            'throughput_rps': len(latencies) / elapsed,
+            'p50_ms': percentile(latencies, 0.50) * 1000,
+            'p95_ms': percentile(latencies, 0.95) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'max_ms': (latencies[-1] if latencies else 0) * 1000
+        }
+    return summary
+
+
+def parse_mix(mix: str) -> dict:
+    weights = {}
+    for item in mix.split(','):
+        route, _, weight = item.partition('=')
+        if route not in ('home', 'login', 'client', 'evaluate'):
+            raise ValueError(f"unknown route {route} in --mix")
+        weights[route] = float(weight)
+    return weights
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the leaderboard app against a seeded local database")
+    parser.add_argument('--database', choices=['sqlite', 'mysql'], default='sqlite')
+    parser.add_argument('--languages', type=int, default=5)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--evaluations', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=30, help="seconds of traffic")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="route weights, e.g. home=60,login=10,client=25,evaluate=5")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--workdir', help="server working directory (default: a temporary directory)")
+    parser.add_argument('--output', help="write the summary as JSON to this path")
+    options = parser.parse_args()
+
+    weights = parse_mix(options.mix)
+    output = Path(options.output).resolve() if options.output else None
+    workdir = Path(options.workdir or tempfile.mkdtemp(prefix="coref_loadtest_")).resolve()
+    workdir.mkdir(parents=True, exist_ok=True)
+    prepare_workdir(workdir)
+
+    env = os.environ.copy()
+    env['DB_BACKEND'] = options.database
+    env['SQLITE_PATH'] = str(workdir / "loadtest.sqlite3")
+    env['PYTHONPATH'] = os.pathsep.join([str(REPO_DIR), env.get('PYTHONPATH', '')])
+    os.environ.update({key: env[key] for key in ['DB_BACKEND', 'SQLITE_PATH']})
+
+    # main.py creates its directories relative to the working directory
+    os.chdir(workdir)
+    sys.path.insert(0, str(REPO_DIR))
+    print(f"Seeding {options.languages} languages, {options.users} users and {options.evaluations} evaluations in {workdir}")
+    seed_data = seed_database(workdir, options.languages, options.users, options.evaluations, options.seed)
+
+    server = start_server(workdir, options.port, env)
+    try:
+        rng = random.Random(options.seed)
+        clients = [
+            LoadClient(options.port, seed_data['usernames'][number % len(seed_data['usernames'])], seed_data, random.Random(rng.random()))
+            for number in range(options.concurrency)
+        ]
+        results = defaultdict(lambda: {'latencies': [], 'errors': 0})
+        lock = threading.Lock()
+        routes = list(weights)
+
+        print(f"Running {options.concurrency} clients for {options.duration}s with mix {options.mix}")
+        start = time.perf_counter()
+        deadline = time.time() + options.duration
+        threads = [
+            threading.Thread(target=run_client, args=(client, routes, [weights[route] for route in routes], deadline, results, lock))
+            for client in clients
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    summary = summarize(results, elapsed)
+    total = sum(route['requests'] for route in summary.values())
+    print(f"\n{'route':<10}{'requests':>10}{'errors':>8}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for route, data in summary.items():
+        print(f"{route:<10}{data['requests']:>10}{data['errors']:>8}{data['throughput_rps']:>9.1f}"
+              f"{data['p50_ms']:>10.1f}{data['p95_ms']:>10.1f}{data['p99_ms']:>10.1f}")
+    print(f"{'total':<10}{total:>10}{'':>8}{total / elapsed:>9.1f}")
+
+    if output:
+        with open(output, 'w') as f:
+            json.dump({
+                'database': options.database,
+                'languages': options.languages,
+                'users': options.users,
+                'evaluations': options.evaluations,
+                'concurrency': options.concurrency,
+                'duration': elapsed,
+                'mix': weights,
+                'routes': summary
+            }, f, indent=2)
+        print(f"Summary written to {output}")
+
+    if not options.workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,315 @@
+"""Benchmark the coreference scorers on synthetic SemEval/CoNLL corpora
+
+Generates gold and response files in the column layout of
+gold_datasets/lang_1/*_hi_gold_data.txt, runs every scoring engine on them and
+records wall time, peak RSS and per-metric time. Results are written as JSON and
+checked against benchmarks/thresholds.json; any exceeded threshold makes the run
+exit with status 1. A measurement only counts as exceeding its threshold when it is
+over by more than a minimum margin, so the millisecond timings of small corpora do
+not fail on scheduler noise.
+
+The committed thresholds were measured on one machine. Regenerate them with
+--update-thresholds on the machine (or CI runner class) that runs the checks.
+
+Usage:
+    python benchmarks/scorer_benchmark.py
+    python benchmarks/scorer_benchmark.py --scenarios small,medium --repeat 5
+    python benchmarks/scorer_benchmark.py --update-thresholds
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+SCORER_DIR = BENCHMARK_DIR.parent / "scorer"
+THRESHOLDS_FILE = BENCHMARK_DIR / "thresholds.json"
+RESULTS_DIR = BENCHMARK_DIR / "results"
+
+METRICS = ['muc', 'bcub', 'ceafm', 'ceafe', 'blanc']
+
+# Absolute slack on top of every threshold: process start-up and interpreter
+# memory vary by tens of milliseconds and megabytes between runs on one machine
+MIN_MARGIN_SECONDS = 0.25
+MIN_MARGIN_MB = 16.0
+
+# Scoring engines: script in scorer/ and how it is called for a metric ("all" or one metric)
+ENGINES = {
+    'scorer': lambda metric, gold, response: ['scorer.pl', metric, gold, response, 'none'],
+    'doc_scorer': lambda metric, gold, response: ['doc_scorer.pl', metric, gold, response]
+}
+
+# documents, mentions per document, chain length distribution and its mean, response error rate
+SCENARIOS = {
+    'small': {'documents': 10, 'mentions': 30, 'chain_distribution': 'geometric', 'mean_chain_length': 3, 'error_rate': 0.15},
+    'medium': {'documents': 100, 'mentions': 60, 'chain_distribution': 'geometric', 'mean_chain_length': 3, 'error_rate': 0.15},
+    'long_chains': {'documents': 50, 'mentions': 120, 'chain_distribution': 'zipf', 'mean_chain_length': 8, 'error_rate': 0.15},
+    'large': {'documents': 500, 'mentions': 60, 'chain_distribution': 'geometric', 'mean_chain_length': 3, 'error_rate': 0.15}
+}
+
+WORDS = ['मंत्री', 'सरकार', 'देश', 'लोग', 'शहर', 'उन्होंने', 'यह', 'वह', 'कहा', 'है', 'के', 'में', 'और', 'को', 'ने']
+TAGS = ['NN', 'NNP', 'PRP', 'VM', 'PSP', 'JJ', 'CC', 'VAUX']
+
+
+def chain_lengths(rng: random.Random, mentions: int, distribution: str, mean_length: float) -> list:
+    """Split a number of mentions into chains drawn from the given length distribution"""
+    lengths = []
+    remaining = mentions
+    while remaining > 0:
+        if distribution == 'zipf':
+            # Heavy tailed: a few long chains and many short ones
+            length = min(int(rng.paretovariate(1 + 1 / max(mean_length - 1, 0.1))), mentions)
+        else:
+            length = 1
+            while rng.random() > 1 / mean_length:
+                length += 1
+        length = max(1, min(length, remaining))
+        lengths.append(length)
+        remaining -= length
+    return lengths
+
+
+def generate_document(rng: random.Random, mentions: int, distribution: str, mean_length: float) -> tuple:
+    """Build one document, returning its (start token, end token, chain id) mentions and token count"""
+    chains = chain_lengths(rng, mentions, distribution, mean_length)
+    chain_ids = [chain for chain, length in enumerate(chains, 1) for _ in range(length)]
+    rng.shuffle(chain_ids)
+
+    spans = []
+    position = 0
+    for chain in chain_ids:
+        position += rng.randint(1, 6)
+        length = rng.choice([1, 1, 1, 2, 3])
+        spans.append((position, position + length - 1, chain))
+        position += length
+    return spans, position + rng.randint(1, 6)
+
+
+def corrupt_mentions(rng: random.Random, spans: list, error_rate: float) -> list:
+    """Response mentions: drop some, move some to other chains and split some into new chains"""
+    next_chain = max((chain for _, _, chain in spans), default=0) + 1
+    corrupted = []
+    for start, end, chain in spans:
+        roll = rng.random()
+        if roll < error_rate / 3:
+            continue
+        elif roll < 2 * error_rate / 3:
+            chain = rng.choice(spans)[2]
+        elif roll < error_rate:
+            chain = next_chain
+            next_chain += 1
+        corrupted.append((start, end, chain))
+    return corrupted
+
+
+def coreference_column(tokens: int, spans: list) -> list:
+    """Coreference labels per token in the gold data style: "(1", "1", "1)" or "(1)", else "-" """
+    labels = ['-'] * tokens
+    for start, end, chain in spans:
+        if start == end:
+            labels[start] = f"({chain})"
+        else:
+            labels[start] = f"({chain}"
+            for token in range(start + 1, end):
+                labels[token] = str(chain)
+            labels[end] = f"{chain})"
+    return labels
+
+
+def write_corpus(path: Path, documents: list):
+    """Write (name, token count, mentions, words) documents in the 9 column layout of the gold data"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for name, tokens, spans, words in documents:
+            f.write(f"#begin document ({name}); part 000\n")
+            f.write(f"{name}\ttok_No\tToken\t\t\tPOS\t\t\tCoreference\n")
+            labels = coreference_column(tokens, spans)
+            for token in range(tokens):
+                word, tag = words[token]
+                f.write(f"{name}\t{str(token).ljust(5)}\t{word.ljust(35)}\t{tag.ljust(15)}\t{'B-NP'.ljust(8)}\t\t\t{(word + ',n').ljust(30)}\t{labels[token]}\n")
+                if token % 20 == 19:
+                    f.write("\n")
+            f.write("\n#end document\n\n")
+
+
+def generate_corpus(directory: Path, scenario: dict, seed: int) -> tuple:
+    """Write gold.txt and response.txt for a scenario and return their paths"""
+    rng = random.Random(seed)
+    gold = []
+    response = []
+    for number in range(scenario['documents']):
+        spans, tokens = generate_document(rng, scenario['mentions'], scenario['chain_distribution'], scenario['mean_chain_length'])
+        words = [(rng.choice(WORDS), rng.choice(TAGS)) for _ in range(tokens)]
+        name = f"synthetic{number}.txt"
+        gold.append((name, tokens, spans, words))
+        response.append((name, tokens, corrupt_mentions(rng, spans, scenario['error_rate']), words))
+
+    gold_path = directory / "gold.txt"
+    response_path = directory / "response.txt"
+    write_corpus(gold_path, gold)
+    write_corpus(response_path, response)
+    return gold_path, response_path
+
+
+def run_engine(args: list) -> dict:
+    """Run a scorer script once and return its wall time and peak RSS
+
+    Peak RSS is read from /proc by BenchmarkPeakRss.pm inside the Perl process.
+    The rusage of a forked child would also count the Python parent's pages from
+    before exec, so it is not used. Other platforms report no RSS.
+    """
+    env = os.environ.copy()
+    env['PERL5LIB'] = os.pathsep.join([str(SCORER_DIR), str(BENCHMARK_DIR), env.get('PERL5LIB', '')])
+    command = ['perl', '-I', str(SCORER_DIR), str(SCORER_DIR / args[0])] + [str(arg) for arg in args[1:]]
+
+    rss_file = None
+    if Path('/proc/self/status').exists():
+        with tempfile.NamedTemporaryFile(suffix='.rss', delete=False) as f:
+            rss_file = f.name
+        env['PERL5OPT'] = (env.get('PERL5OPT', '') + ' -MBenchmarkPeakRss').strip()
+        env['PEAK_RSS_FILE'] = rss_file
+
+    try:
+        start = time.perf_counter()
+        result = subprocess.run(command, cwd=SCORER_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        wall = time.perf_counter() - start
+
+        if result.returncode != 0:
+            raise RuntimeError(f"{' '.join(command)} failed with exit code {result.returncode}: {result.stderr.decode(errors='replace')[-500:]}")
+
+        peak_rss_mb = None
+        if rss_file:
+            content = Path(rss_file).read_text().strip()
+            peak_rss_mb = int(content) / 1024 if content else None
+    finally:
+        if rss_file:
+            os.unlink(rss_file)
+
+    return {'wall_seconds': wall, 'peak_rss_mb': peak_rss_mb}
+
+
+def measure(args: list, repeat: int) -> dict:
+    """Median wall time and maximum peak RSS over several runs"""
+    runs = [run_engine(args) for _ in range(repeat)]
+    rss = [run['peak_rss_mb'] for run in runs if run['peak_rss_mb'] is not None]
+    return {
+        'wall_seconds': statistics.median(run['wall_seconds'] for run in runs),
+        'peak_rss_mb': max(rss) if rss else None
+    }
+
+
+def benchmark_scenario(name: str, scenario: dict, engines: list, repeat: int, seed: int) -> dict:
+    print(f"SCENARIO {name}: {scenario}")
+    results = {}
+    with tempfile.TemporaryDirectory(prefix=f"coref_bench_{name}_") as tmp:
+        gold, response = generate_corpus(Path(tmp), scenario, seed)
+
+        for engine in engines:
+            build = ENGINES[engine]
+            result = measure(build('all', gold, response), repeat)
+            result['metric_seconds'] = {
+                metric: measure(build(metric, gold, response), repeat)['wall_seconds']
+                for metric in METRICS
+            }
+            results[engine] = result
+            print(f"  {engine}: {result['wall_seconds']:.3f}s, peak RSS {result['peak_rss_mb']} MB, per metric "
+                  + ", ".join(f"{metric} {seconds:.3f}s" for metric, seconds in result['metric_seconds'].items()))
+    return results
+
+
+def check_thresholds(results: dict, thresholds: dict, margin_seconds: float = MIN_MARGIN_SECONDS,
+                     margin_mb: float = MIN_MARGIN_MB) -> list:
+    """List every measurement above its threshold by more than the minimum margin"""
+    failures = []
+    for scenario, engines in results.items():
+        for engine, result in engines.items():
+            limits = thresholds.get(scenario, {}).get(engine)
+            if not limits:
+                continue
+            if result['wall_seconds'] > limits['wall_seconds'] + margin_seconds:
+                failures.append(f"{scenario}/{engine}: wall time {result['wall_seconds']:.3f}s > {limits['wall_seconds']}s + {margin_seconds}s")
+            if result['peak_rss_mb'] is not None and result['peak_rss_mb'] > limits['peak_rss_mb'] + margin_mb:
+                failures.append(f"{scenario}/{engine}: peak RSS {result['peak_rss_mb']:.1f} MB > {limits['peak_rss_mb']} MB + {margin_mb} MB")
+            for metric, seconds in result['metric_seconds'].items():
+                limit = limits.get('metric_seconds', {}).get(metric)
+                if limit is not None and seconds > limit + margin_seconds:
+                    failures.append(f"{scenario}/{engine}: {metric} {seconds:.3f}s > {limit}s + {margin_seconds}s")
+    return failures
+
+
+def updated_thresholds(results: dict, thresholds: dict, headroom: float) -> dict:
+    """Thresholds set to the measured values times a headroom factor"""
+    for scenario, engines in results.items():
+        for engine, result in engines.items():
+            thresholds.setdefault(scenario, {})[engine] = {
+                'wall_seconds': round(result['wall_seconds'] * headroom, 2),
+                'peak_rss_mb': round((result['peak_rss_mb'] or 0) * headroom, 1),
+                'metric_seconds': {metric: round(seconds * headroom, 2) for metric, seconds in result['metric_seconds'].items()}
+            }
+    return thresholds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the coreference scorers on synthetic corpora")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help="comma separated scenario names")
+    parser.add_argument('--engines', default=','.join(ENGINES), help="comma separated engine names")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per measurement (median wall time)")
+    parser.add_argument('--seed', type=int, default=13)
+    parser.add_argument('--output', help="results JSON path (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument('--update-thresholds', action='store_true', help="rewrite thresholds.json from this run")
+    parser.add_argument('--headroom', type=float, default=2.0, help="threshold factor used with --update-thresholds")
+    parser.add_argument('--margin-seconds', type=float, default=MIN_MARGIN_SECONDS, help="time a measurement may exceed its threshold by")
+    parser.add_argument('--margin-mb', type=float, default=MIN_MARGIN_MB, help="peak RSS a measurement may exceed its threshold by")
+    options = parser.parse_args()
+
+    scenarios = options.scenarios.split(',')
+    engines = options.engines.split(',')
+    for name in scenarios:
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario {name}")
+    for name in engines:
+        if name not in ENGINES:
+            parser.error(f"unknown engine {name}")
+
+    results = {name: benchmark_scenario(name, SCENARIOS[name], engines, options.repeat, options.seed) for name in scenarios}
+
+    output = Path(options.output) if options.output else RESULTS_DIR / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'repeat': options.repeat,
+            'seed': options.seed,
+            'scenarios': {name: SCENARIOS[name] for name in scenarios},
+            'results': results
+        }, f, indent=2)
+    print(f"Results written to {output}")
+
+    thresholds = json.loads(THRESHOLDS_FILE.read_text()) if THRESHOLDS_FILE.exists() else {}
+    if options.update_thresholds:
+        THRESHOLDS_FILE.write_text(json.dumps(updated_thresholds(results, thresholds, options.headroom), indent=2) + "\n")
+        print(f"Thresholds updated in {THRESHOLDS_FILE}")
+        return 0
+
+    failures = check_thresholds(results, thresholds, options.margin_seconds, options.margin_mb)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        print(f"{len(failures)} benchmark threshold(s) exceeded")
+        return 1
+    print("All benchmarks within thresholds")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,233 @@
-from fastapi import FastAPI, Request, Depends, HTTPException, status, Form, File, UploadFile, Cookie
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import FastAPI, Request, Depends, HTTPException, status, Form, File, UploadFile, Cookie, Query
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse, Response, FileResponse
 from fastapi.templating import Jinja2Templates
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers, MutableHeaders
+from fastapi.concurrency import run_in_threadpool
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from typing import List, NamedTuple, Optional
 import mysql.connector
+import sqlite3
+import numpy as np
 import bcrypt
 import os
 import secrets
-import subprocess
 import tempfile
 import shutil
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
 import re
-import platform
+import asyncio
+import io
+import zipfile
+import threading
+import hashlib
+import json
+import zlib
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+import logging
+import sys
+import random
+import gzip
+import base64
+import csv
+import multiprocessing
+import jinja2
+from metrics import Counter, Histogram, GaugeCallback, render_metrics, stage_duration, current_profile
+from scoring import check_perl_availability, check_scorer_environment, run_scorer_script, run_perl_scorer
+
+# Optional: brotli is offered to clients that accept it when the package is installed, else gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Optional: fcntl locks the evaluation spill file between worker processes (not available on Windows)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+# Logging: LOG_LEVEL picks the level, LOG_FORMAT=json writes one JSON object per line
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+
+request_id_var = ContextVar('request_id', default='-')
+
+# Attributes every LogRecord has; anything else was passed with extra= and is logged as a field
+STANDARD_LOG_RECORD_FIELDS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+
+class RequestIdFilter(logging.Filter):
+    """Tag every record with the id of the request being handled"""
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+class JsonLogFormatter(logging.Formatter):
+    """One JSON object per record, including fields passed with extra="""
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'request_id': getattr(record, 'request_id', '-'),
+            'message': record.getMessage()
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in STANDARD_LOG_RECORD_FIELDS})
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+logger = logging.getLogger("coref_eval")
+if not logger.handlers:
+    log_handler = logging.StreamHandler()
+    log_handler.addFilter(RequestIdFilter())
+    if LOG_FORMAT == 'json':
+        log_handler.setFormatter(JsonLogFormatter())
+    else:
+        log_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(request_id)s] %(message)s"))
+    logger.addHandler(log_handler)
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
+
+# Prometheus metrics, rendered in the text exposition format by GET /metrics
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+http_request_duration = Histogram(
+    "coref_http_request_duration_seconds", "Time to produce a response, by route",
+    ("method", "route", "status")
+)
+document_cache_hits = Counter("coref_document_cache_hits_total", "Per-document scores served from the cache, by tier", ("tier",))
+document_cache_misses = Counter("coref_document_cache_misses_total", "Documents that had to be scored")
+maintenance_runs = Counter("coref_maintenance_runs_total", "Background maintenance runs, by task and outcome (ok, skipped or error)", ("task", "outcome"))
+maintenance_reclaimed = Counter("coref_maintenance_reclaimed_total", "Sessions, jobs, files and rows removed by background maintenance, by task", ("task",))
+maintenance_reclaimed_bytes = Counter("coref_maintenance_reclaimed_bytes_total", "Disk space freed by background maintenance, by task", ("task",))
+error_analyses = Counter("coref_error_analyses_total", "Error analyses served, by source (memory, database or computed)", ("source",))
+evaluation_writes = Counter("coref_evaluation_writes_total", "Evaluations saved, by target (database, spill or demo)", ("target",))
+evaluation_commits = Counter("coref_evaluation_commits_total", "Transactions that saved evaluations, including spill replays")
+database_reads = Counter("coref_database_reads_total", "Connections opened for read-only queries, by target (replica or primary)", ("target",))
+
+# On-demand request profiling: admins send X-Profile: 1 (or set the profile_requests
+# cookie), and PROFILE_SAMPLE_RATE profiles that fraction of all requests
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_INTERVAL = float(os.getenv('PROFILE_INTERVAL', '0.005'))
+PROFILE_RETENTION = int(os.getenv('PROFILE_RETENTION', '50'))
+request_profiles = OrderedDict()
+request_profiles_lock = threading.Lock()
+
+class RequestProfiler:
+    """Sampling profiler for the threads working on one request
+
+    Every interval the Python stacks of the attached threads are recorded. While a
+    thread waits on a scorer child process, the child is added as a leaf frame, so
+    flame graphs show Perl time next to the Python frames that started it. Stacks
+    are exported in the collapsed format read by flamegraph.pl, speedscope and inferno.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples = 0
+        self._stacks = {}
+        self._threads = {}  # thread id -> attach count
+        self._children = {}  # thread id -> label of the child process it waits on
+        self.child_processes = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._threads[threading.get_ident()] = 1
+        self._sampler.start()
+
+    def stop(self):
+        self._stop.set()
+        self._sampler.join()
+
+    @contextmanager
+    def attach(self):
+        """Sample the calling thread, and make this the current profile in it, for the block"""
+        thread_id = threading.get_ident()
+        token = current_profile.set(self)
+        with self._lock:
+            self._threads[thread_id] = self._threads.get(thread_id, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._threads[thread_id] -= 1
+                if not self._threads[thread_id]:
+                    del self._threads[thread_id]
+            current_profile.reset(token)
+
+    @contextmanager
+    def child_process(self, label: str):
+        """Attribute the calling thread's time to a child process and record its wall time"""
+        thread_id = threading.get_ident()
+        entry = {'label': label, 'seconds': None}
+        with self._lock:
+            self._children[thread_id] = label
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry['seconds'] = round(time.perf_counter() - start, 4)
+            with self._lock:
+                self._children.pop(thread_id, None)
+                self.child_processes.append(entry)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self):
+        frames = sys._current_frames()
+        with self._lock:
+            for thread_id in self._threads:
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.reverse()
+                if thread_id in self._children:
+                    stack.append(f"[{self._children[thread_id]}]")
+                key = ";".join(name.replace(';', ':') for name in stack)
+                self._stacks[key] = self._stacks.get(key, 0) + 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        with self._lock:
+            return "".join(f"{stack} {count}\n" for stack, count in sorted(self._stacks.items()))
+
+def call_with_profile(profiler, func, *args, **kwargs):
+    """Run func in a worker thread, sampled by profiler when the request is being profiled"""
+    if profiler is None:
+        return func(*args, **kwargs)
+    with profiler.attach():
+        return func(*args, **kwargs)
+
+def should_profile_request(request) -> bool:
+    if request.url.path.endswith(('/metrics', '/admin/profiles')) or '/admin/profiles/' in request.url.path:
+        return False
+    user = active_sessions.get(request.cookies.get('session_token'))
+    if user and user['username'] == 'admin':
+        if request.headers.get('X-Profile') == '1' or request.cookies.get('profile_requests') == '1':
+            return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+def store_request_profile(profile: dict):
+    with request_profiles_lock:
+        request_profiles[profile['id']] = profile
+        while len(request_profiles) > PROFILE_RETENTION:
+            request_profiles.popitem(last=False)
 
 
 app = FastAPI(root_path="/discours-leaderboard")
@@ -24,8 +240,272 @@ Path("scorer").mkdir(exist_ok=True)
 
 templates = Jinja2Templates(directory="templates")
 
-# Session storage (in production, use Redis or database)
+# Compiled templates are kept on disk, so restarted and newly forked workers skip compiling them.
+# Cached bytecode is executed, so the directory must be private: unset uses Jinja's per-user
+# directory (created 0700 and ownership-checked), empty disables the cache
+TEMPLATE_CACHE_DIR = os.getenv('TEMPLATE_CACHE_DIR')
+
+def private_cache_directory(path: str) -> bool:
+    """Create path as a 0700 directory, and check that only this user can write to it"""
+    Path(path).mkdir(mode=0o700, parents=True, exist_ok=True)
+    info = os.lstat(path)
+    if not hasattr(os, 'getuid'):
+        return True
+    return info.st_uid == os.getuid() and not info.st_mode & 0o022 and not os.path.islink(path)
+
+if TEMPLATE_CACHE_DIR is None:
+    templates.env.bytecode_cache = jinja2.FileSystemBytecodeCache()
+elif TEMPLATE_CACHE_DIR:
+    if private_cache_directory(TEMPLATE_CACHE_DIR):
+        templates.env.bytecode_cache = jinja2.FileSystemBytecodeCache(TEMPLATE_CACHE_DIR)
+    else:
+        logger.warning(f"Template cache disabled: {TEMPLATE_CACHE_DIR} is not a directory writable only by this user")
+
+# Page CSS and JavaScript are served from static/ under names carrying a hash of their
+# content, so browsers can cache them for good and still see every change. Both
+# directories are found next to main.py, whatever the working directory is
+APP_DIR = Path(__file__).resolve().parent
+STATIC_DIR = APP_DIR / "static"
+STATIC_FINGERPRINT_RE = re.compile(r'^(?P<stem>.+)\.(?P<digest>[0-9a-f]{12})(?P<suffix>\.[A-Za-z0-9]+)$')
+
+def compute_static_fingerprints() -> dict:
+    """{path relative to static/: first 12 hex digits of its SHA-256}"""
+    fingerprints = {}
+    for path in sorted(STATIC_DIR.rglob('*')):
+        if path.is_file():
+            fingerprints[path.relative_to(STATIC_DIR).as_posix()] = hashlib.sha256(path.read_bytes()).hexdigest()[:12]
+    return fingerprints
+
+static_fingerprints = compute_static_fingerprints()
+
+@jinja2.pass_context
+def static_url(context, path: str) -> str:
+    """URL of a static file with its fingerprint, e.g. css/homepage.css -> css/homepage.3f2a9c0d1b7e.css"""
+    digest = static_fingerprints.get(path)
+    if digest:
+        stem, suffix = os.path.splitext(path)
+        path = f"{stem}.{digest}{suffix}"
+    return str(context['request'].url_for('static', path=path))
+
+templates.env.globals['static_url'] = static_url
+
+@app.on_event("startup")
+def compile_templates():
+    """Compile every page template before the first request, from the bytecode cache when it is warm"""
+    for name in templates.env.list_templates(extensions=['html']):
+        templates.get_template(name)
+
+class FingerprintedStaticFiles(StaticFiles):
+    """Static files requested by fingerprinted name, cached by browsers for a year
+
+    A fingerprint that no longer matches (a page rendered before a deploy) still gets
+    the current file, but without the long cache lifetime.
+    """
+    async def get_response(self, path: str, scope):
+        match = STATIC_FINGERPRINT_RE.match(path.replace(os.sep, '/'))
+        name = f"{match['stem']}{match['suffix']}" if match else None
+        if not match or name not in static_fingerprints:
+            response = await super().get_response(path, scope)
+            response.headers.setdefault('Cache-Control', 'no-cache')
+            return response
+        
+        response = await super().get_response(name, scope)
+        if response.status_code == 200:
+            current = static_fingerprints[name] == match['digest']
+            response.headers['Cache-Control'] = 'public, max-age=31536000, immutable' if current else 'no-cache'
+        return response
+
+app.mount("/static", FingerprintedStaticFiles(directory=STATIC_DIR), name="static")
+
+# Frozen campaigns: the public leaderboards can be frozen into static files under
+# SNAPSHOT_DIR/<campaign>/, which are served without touching the database
+SNAPSHOT_DIR = APP_DIR / os.getenv('SNAPSHOT_DIR', 'snapshots')
+SNAPSHOT_MAX_AGE = int(os.getenv('SNAPSHOT_MAX_AGE', '300'))
+CAMPAIGN_NAME_RE = re.compile(r'^[a-z0-9][a-z0-9._-]{0,63}$')
+SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+
+class SnapshotFiles(StaticFiles):
+    """Campaign snapshots, cached by browsers and proxies for SNAPSHOT_MAX_AGE seconds"""
+    async def get_response(self, path: str, scope):
+        response = await super().get_response(path, scope)
+        if response.status_code in (200, 304):
+            response.headers['Cache-Control'] = f'public, max-age={SNAPSHOT_MAX_AGE}'
+        return response
+
+app.mount("/campaigns", SnapshotFiles(directory=SNAPSHOT_DIR, html=True), name="campaigns")
+
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    """Run selected requests under the sampling profiler and keep the result for /admin"""
+    if not should_profile_request(request):
+        return await call_next(request)
+    
+    profiler = RequestProfiler(PROFILE_INTERVAL)
+    token = current_profile.set(profiler)
+    started = datetime.now()
+    start = time.perf_counter()
+    status_code = 500
+    profiler.start()
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        profiler.stop()
+        current_profile.reset(token)
+        user = active_sessions.get(request.cookies.get('session_token'))
+        profile_id = secrets.token_hex(8)
+        store_request_profile({
+            'id': profile_id,
+            'request_id': request_id_var.get(),
+            'started': started.strftime('%Y-%m-%d %H:%M:%S'),
+            'method': request.method,
+            'path': request.url.path,
+            'status': status_code,
+            'user': user['username'] if user else None,
+            'duration': round(time.perf_counter() - start, 4),
+            'samples': profiler.samples,
+            'interval': profiler.interval,
+            'child_processes': profiler.child_processes,
+            'collapsed': profiler.collapsed()
+        })
+        logger.info(f"Profiled {request.method} {request.url.path} as {profile_id} ({profiler.samples} samples)")
+
+@app.middleware("http")
+async def observe_requests(request: Request, call_next):
+    """Tag log records with a request id and time every response by route"""
+    request_id = request.headers.get('X-Request-ID') or secrets.token_hex(8)
+    request_id_var.set(request_id)
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        response.headers['X-Request-ID'] = request_id
+        return response
+    finally:
+        # Label by route template rather than raw path to keep the series count bounded
+        route = request.scope.get('route')
+        http_request_duration.observe(
+            time.perf_counter() - start,
+            method=request.method, route=route.path if route else 'unmatched', status=status_code
+        )
+
+# Response compression
+COMPRESSION_MIN_BYTES = int(os.getenv('COMPRESSION_MIN_BYTES', '1024'))
+COMPRESSIBLE_CONTENT_TYPES = ('text/', 'application/json', 'application/javascript', 'application/x-ndjson', 'image/svg+xml')
+
+def negotiate_content_encoding(accept_encoding: str):
+    """'br' or 'gzip' from an Accept-Encoding header, preferring brotli when it is available"""
+    accepted = {}
+    for item in accept_encoding.split(','):
+        coding, _, parameters = item.partition(';')
+        quality = 1.0
+        if parameters.strip().startswith('q='):
+            try:
+                quality = float(parameters.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    if brotli and accepted.get('br', 0) > 0:
+        return 'br'
+    if accepted.get('gzip', 0) > 0:
+        return 'gzip'
+    return None
+
+class StreamCompressor:
+    """Incremental brotli or gzip encoder; every chunk is flushed so streamed data arrives as it is produced"""
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._compressor = brotli.Compressor(quality=5)
+        else:
+            self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self.encoding == 'br':
+            output = self._compressor.process(data)
+            return output + (self._compressor.finish() if final else self._compressor.flush())
+        output = self._compressor.compress(data)
+        return output + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+class CompressionMiddleware:
+    """Compress text responses with brotli or gzip
+
+    Small, already encoded and non-text responses pass through unchanged, and so do
+    server-sent event streams: proxies and browsers handle those best uncompressed.
+    """
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        encoding = None
+        if scope['type'] == 'http' and scope['method'] != 'HEAD':
+            encoding = negotiate_content_encoding(Headers(scope=scope).get('accept-encoding', ''))
+        if not encoding:
+            await self.app(scope, receive, send)
+            return
+        
+        start = None
+        compressor = None
+        
+        async def send_compressed(message):
+            nonlocal start, compressor
+            if message['type'] == 'http.response.start':
+                headers = Headers(raw=message['headers'])
+                content_type = headers.get('content-type', '')
+                if (
+                    'content-encoding' in headers
+                    or not content_type.startswith(COMPRESSIBLE_CONTENT_TYPES)
+                    or content_type.startswith('text/event-stream')
+                ):
+                    await send(message)
+                else:
+                    # Held back until the first body chunk shows whether it is worth compressing
+                    start = message
+                return
+            if message['type'] != 'http.response.body':
+                await send(message)
+                return
+            
+            body = message.get('body', b'')
+            more_body = message.get('more_body', False)
+            if start is not None:
+                if not more_body and len(body) < COMPRESSION_MIN_BYTES:
+                    await send(start)
+                    start = None
+                    await send(message)
+                    return
+                
+                headers = MutableHeaders(raw=start['headers'])
+                compressor = StreamCompressor(encoding)
+                body = compressor.compress(body, final=not more_body)
+                headers['Content-Encoding'] = encoding
+                headers.add_vary_header('Accept-Encoding')
+                if more_body:
+                    del headers['Content-Length']
+                else:
+                    headers['Content-Length'] = str(len(body))
+                await send(start)
+                start = None
+                await send({'type': 'http.response.body', 'body': body, 'more_body': more_body})
+                return
+            
+            if compressor is None:
+                await send(message)
+                return
+            await send({'type': 'http.response.body', 'body': compressor.compress(body, final=not more_body), 'more_body': more_body})
+        
+        await self.app(scope, receive, send_compressed)
+
+# Added last, so it wraps the other middleware and compresses their final output
+app.add_middleware(CompressionMiddleware)
+
+# Session storage (in production, use Redis or database); sessions end after
+# SESSION_MAX_AGE seconds, like their cookie
+SESSION_MAX_AGE = int(os.getenv('SESSION_MAX_AGE', '3600'))
 active_sessions = {}
+session_expiry = {}
 SECRET_KEY = secrets.token_urlsafe(32)
 
 # Database config - Use environment variables for Docker
@@ -36,6 +516,138 @@ DB_CONFIG = {
     'password': os.getenv('DB_PASSWORD', 'harsh')
 } 
 
+# DB_BACKEND=sqlite runs against a local SQLite file instead of MySQL (development and load tests)
+DB_BACKEND = os.getenv('DB_BACKEND', 'mysql')
+SQLITE_PATH = os.getenv('SQLITE_PATH', 'coref_eval_system.sqlite3')
+
+# Optional read replica for the leaderboard, statistics and history queries. A replica
+# that cannot be reached is skipped for DB_REPLICA_RETRY_SECONDS, and users who saved an
+# evaluation in the last READ_YOUR_WRITES_SECONDS read from the primary
+DB_REPLICA_HOST = os.getenv('DB_REPLICA_HOST')
+DB_REPLICA_CONFIG = {
+    'host': DB_REPLICA_HOST,
+    'database': os.getenv('DB_REPLICA_NAME', DB_CONFIG['database']),
+    'user': os.getenv('DB_REPLICA_USER', DB_CONFIG['user']),
+    'password': os.getenv('DB_REPLICA_PASSWORD', DB_CONFIG['password']),
+    'connection_timeout': int(os.getenv('DB_REPLICA_CONNECT_TIMEOUT', '2'))
+}
+SQLITE_REPLICA_PATH = os.getenv('SQLITE_REPLICA_PATH')
+DB_REPLICA_RETRY_SECONDS = float(os.getenv('DB_REPLICA_RETRY_SECONDS', '30'))
+READ_YOUR_WRITES_SECONDS = float(os.getenv('READ_YOUR_WRITES_SECONDS', '10'))
+replica_down_until = 0.0
+recent_writers = {}
+recent_writers_lock = threading.Lock()
+
+# Evaluation writes: saves arriving within EVALUATION_FLUSH_SECONDS of each other are
+# committed in one transaction (at most EVALUATION_FLUSH_MAX_ROWS rows). Saves the
+# database rejects or cannot take are appended to EVALUATION_SPILL_PATH and replayed
+# every EVALUATION_SPILL_RETRY_SECONDS; an empty path keeps the demo storage fallback only.
+# A save not done within EVALUATION_SAVE_TIMEOUT seconds is spilled by the request itself
+EVALUATION_FLUSH_SECONDS = float(os.getenv('EVALUATION_FLUSH_SECONDS', '0.005'))
+EVALUATION_FLUSH_MAX_ROWS = int(os.getenv('EVALUATION_FLUSH_MAX_ROWS', '200'))
+EVALUATION_SPILL_PATH = os.getenv('EVALUATION_SPILL_PATH', 'evaluation_spill.jsonl')
+EVALUATION_SPILL_RETRY_SECONDS = float(os.getenv('EVALUATION_SPILL_RETRY_SECONDS', '30'))
+EVALUATION_SAVE_TIMEOUT = float(os.getenv('EVALUATION_SAVE_TIMEOUT', '30'))
+
+# Batch evaluation limits
+BATCH_MAX_FILES = int(os.getenv('BATCH_MAX_FILES', '50'))
+BATCH_MAX_MEMBER_BYTES = int(os.getenv('BATCH_MAX_MEMBER_BYTES', str(50 * 1024 * 1024)))
+BATCH_MAX_TOTAL_BYTES = int(os.getenv('BATCH_MAX_TOTAL_BYTES', str(200 * 1024 * 1024)))
+BATCH_SCORING_WORKERS = int(os.getenv('BATCH_SCORING_WORKERS', '4'))
+
+# Shared pool so concurrent batch requests cannot spawn unbounded scorer processes
+batch_scoring_pool = ThreadPoolExecutor(max_workers=BATCH_SCORING_WORKERS, thread_name_prefix="batch-scorer")
+
+# Scoring governor: concurrent scorer processes and queued requests (per-process
+# limits are SCORER_CPU_LIMIT and SCORER_MEMORY_LIMIT_MB in scoring.py)
+SCORING_MAX_CONCURRENT = int(os.getenv('SCORING_MAX_CONCURRENT', str(os.cpu_count() or 2)))
+SCORING_MAX_QUEUE = int(os.getenv('SCORING_MAX_QUEUE', '20'))
+SCORING_QUEUE_TIMEOUT = float(os.getenv('SCORING_QUEUE_TIMEOUT', '60'))
+
+# Bulk user import; bcrypt.hashpw is pickled by reference, so the spawned hashing
+# workers only need to import bcrypt
+USER_IMPORT_MAX_ROWS = int(os.getenv('USER_IMPORT_MAX_ROWS', '5000'))
+USER_IMPORT_WORKERS = int(os.getenv('USER_IMPORT_WORKERS', str(os.cpu_count() or 2)))
+password_hashing_pool = ProcessPoolExecutor(max_workers=USER_IMPORT_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+
+# Rescoring jobs run after a gold dataset is replaced
+RESCORE_WORKERS = int(os.getenv('RESCORE_WORKERS', '4'))
+RESCORE_MAX_JOBS = int(os.getenv('RESCORE_MAX_JOBS', '2'))
+RESCORE_JOB_RETENTION = int(os.getenv('RESCORE_JOB_RETENTION', '86400'))
+rescore_jobs = {}
+rescore_jobs_lock = threading.Lock()
+
+# Preview evaluations score a deterministic sample of documents and are never saved
+PREVIEW_SAMPLE_DOCUMENTS = int(os.getenv('PREVIEW_SAMPLE_DOCUMENTS', '10'))
+
+# Background evaluations whose progress is streamed to the client dashboard; at most
+# EVALUATION_JOB_WORKERS run in the web process and EVALUATION_JOB_QUEUE wait for them
+EVALUATION_JOB_RETENTION = int(os.getenv('EVALUATION_JOB_RETENTION', '3600'))
+EVALUATION_JOB_WORKERS = int(os.getenv('EVALUATION_JOB_WORKERS', str(SCORING_MAX_CONCURRENT)))
+EVALUATION_JOB_QUEUE = int(os.getenv('EVALUATION_JOB_QUEUE', str(SCORING_MAX_QUEUE)))
+evaluation_jobs = {}
+evaluation_jobs_lock = threading.Lock()
+
+# Durable scoring queue: with SCORING_QUEUE=database, /evaluate_async stores jobs in
+# scoring_jobs and `python -m worker` processes claim them under renewable leases
+SCORING_QUEUE = os.getenv('SCORING_QUEUE', 'inline')
+SCORING_JOB_LEASE_SECONDS = int(os.getenv('SCORING_JOB_LEASE_SECONDS', '120'))
+SCORING_JOB_MAX_ATTEMPTS = int(os.getenv('SCORING_JOB_MAX_ATTEMPTS', '3'))
+SCORING_JOB_RETRY_SECONDS = int(os.getenv('SCORING_JOB_RETRY_SECONDS', '30'))
+SCORING_JOB_PROGRESS_SECONDS = 1.0
+
+# Live leaderboard: while homepages are listening, each process polls for new evaluations
+# every LEADERBOARD_POLL_SECONDS (at once after a save in this process) and streams them
+LEADERBOARD_POLL_SECONDS = float(os.getenv('LEADERBOARD_POLL_SECONDS', '2'))
+LEADERBOARD_MAX_SUBSCRIBERS = int(os.getenv('LEADERBOARD_MAX_SUBSCRIBERS', '1000'))
+LEADERBOARD_CATCHUP_ROWS = 500
+LEADERBOARD_LOOKBACK_IDS = 100
+
+# Submission store: uploads are kept once per content hash, gzip-compressed, under
+# uploads/objects/<2 hex>/<sha256>.gz; old objects can be moved into per-prefix zip archives
+SUBMISSION_STORE_DIR = Path(os.getenv('SUBMISSION_STORE_DIR', 'uploads/objects'))
+SUBMISSION_ARCHIVE_DIR = Path(os.getenv('SUBMISSION_ARCHIVE_DIR', 'uploads/archive'))
+SUBMISSION_ARCHIVE_AFTER_DAYS = int(os.getenv('SUBMISSION_ARCHIVE_AFTER_DAYS', '0'))
+SUBMISSION_GC_GRACE_SECONDS = int(os.getenv('SUBMISSION_GC_GRACE_SECONDS', '86400'))
+submission_store_lock = threading.Lock()
+
+# Background maintenance: every task runs each <interval> seconds in a thread of each web
+# process (0 disables it). Tasks on shared storage hold MAINTENANCE_LOCK_PATH, so one
+# process at a time runs them
+MAINTENANCE_SESSIONS_SECONDS = float(os.getenv('MAINTENANCE_SESSIONS_SECONDS', '300'))
+MAINTENANCE_TEMP_FILES_SECONDS = float(os.getenv('MAINTENANCE_TEMP_FILES_SECONDS', '3600'))
+MAINTENANCE_STORAGE_SECONDS = float(os.getenv('MAINTENANCE_STORAGE_SECONDS', '86400'))
+MAINTENANCE_CACHES_SECONDS = float(os.getenv('MAINTENANCE_CACHES_SECONDS', '600'))
+MAINTENANCE_LOCK_PATH = Path(os.getenv('MAINTENANCE_LOCK_PATH', str(SUBMISSION_STORE_DIR / '.maintenance.lock')))
+TEMP_FILE_MAX_AGE_SECONDS = int(os.getenv('TEMP_FILE_MAX_AGE_SECONDS', '21600'))
+TEMP_FILE_PREFIXES = ('coref_submission_', 'coref_preview_', 'coref_docs_', 'coref_documents_')
+GOLD_PRUNE_AFTER_DAYS = int(os.getenv('GOLD_PRUNE_AFTER_DAYS', '30'))
+SCORING_JOB_RETENTION_DAYS = int(os.getenv('SCORING_JOB_RETENTION_DAYS', '7'))
+ERROR_ANALYSIS_CACHE_DAYS = int(os.getenv('ERROR_ANALYSIS_CACHE_DAYS', '30'))
+maintenance_fallback_lock = threading.Lock()
+
+# Languages and gold datasets change only through the admin endpoints, so they are
+# cached in-process; other processes notice a change through reference_data_version
+REFERENCE_DATA_CHECK_SECONDS = float(os.getenv('REFERENCE_DATA_CHECK_SECONDS', '5'))
+reference_data_cache = None
+reference_data_generation = 0
+reference_data_lock = threading.Lock()
+
+# Per-document score cache, keyed by (gold document hash, response document hash)
+DOCUMENT_CACHE_SIZE = int(os.getenv('DOCUMENT_CACHE_SIZE', '50000'))
+document_score_memo = OrderedDict()
+document_score_memo_lock = threading.Lock()
+
+# Bootstrap resampling over documents
+BOOTSTRAP_REPLICATES = int(os.getenv('BOOTSTRAP_REPLICATES', '2000'))
+BOOTSTRAP_MAX_REPLICATES = int(os.getenv('BOOTSTRAP_MAX_REPLICATES', '20000'))
+BOOTSTRAP_BLOCK_CELLS = 4_000_000
+
+# Error analyses of evaluations, computed on request and cached by (gold file hash, submission hash)
+ERROR_ANALYSIS_MEMO_SIZE = int(os.getenv('ERROR_ANALYSIS_MEMO_SIZE', '32'))
+error_analysis_memo = OrderedDict()
+error_analysis_memo_lock = threading.Lock()
+
 # Demo data - expanded to include evaluation history
 DEMO_USERS = {
     'admin': {'id': 1, 'username': 'admin', 'password_hash': bcrypt.hashpw('admin123'.encode(), bcrypt.gensalt()).decode(), 'email': 'admin@test.com', 'is_active': True},
@@ -51,20 +663,242 @@ DEMO_LANGUAGES = [
 DEMO_GOLD_DATASETS = []
 DEMO_EVALUATIONS = []
 
+# SQLite version of the schema in README.md, created on first connection
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username VARCHAR(100) UNIQUE NOT NULL,
+    email VARCHAR(255) UNIQUE NOT NULL,
+    password_hash VARCHAR(255) NOT NULL,
+    is_active BOOLEAN DEFAULT 1,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS languages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    language_code VARCHAR(10) UNIQUE NOT NULL,
+    language_name VARCHAR(100) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS gold_datasets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    language_id INT NOT NULL REFERENCES languages(id) ON DELETE CASCADE,
+    filename VARCHAR(255) NOT NULL,
+    file_path VARCHAR(500) NOT NULL,
+    uploaded_by VARCHAR(100),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS user_evaluations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INT NOT NULL REFERENCES users(id),
+    language_id INT NOT NULL REFERENCES languages(id),
+    uploaded_filename VARCHAR(255) NOT NULL,
+    file_path VARCHAR(500) NOT NULL,
+    gold_dataset_id INT NULL REFERENCES gold_datasets(id) ON DELETE SET NULL,
+    muc_recall DECIMAL(10,4), muc_precision DECIMAL(10,4), muc_f1 DECIMAL(10,4),
+    bcub_recall DECIMAL(10,4), bcub_precision DECIMAL(10,4), bcub_f1 DECIMAL(10,4),
+    ceafm_recall DECIMAL(10,4), ceafm_precision DECIMAL(10,4), ceafm_f1 DECIMAL(10,4),
+    ceafe_recall DECIMAL(10,4), ceafe_precision DECIMAL(10,4), ceafe_f1 DECIMAL(10,4),
+    blanc_recall DECIMAL(10,4), blanc_precision DECIMAL(10,4), blanc_f1 DECIMAL(10,4),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS reference_data_version (
+    id INT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO reference_data_version (id, version) VALUES (1, 0);
+CREATE TABLE IF NOT EXISTS scoring_jobs (
+    id VARCHAR(32) PRIMARY KEY,
+    user_id INT NOT NULL REFERENCES users(id),
+    language_id INT NOT NULL REFERENCES languages(id),
+    gold_dataset_id INT NULL REFERENCES gold_datasets(id) ON DELETE SET NULL,
+    gold_file_path VARCHAR(500) NOT NULL,
+    filename VARCHAR(255) NOT NULL,
+    file_path VARCHAR(500) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    attempts INT NOT NULL DEFAULT 0,
+    available_at TIMESTAMP NOT NULL,
+    lease_owner VARCHAR(100) NULL,
+    lease_expires_at TIMESTAMP NULL,
+    documents_done INT NOT NULL DEFAULT 0,
+    documents_total INT NULL,
+    document VARCHAR(255) NULL,
+    metric VARCHAR(20) NULL,
+    scores TEXT NULL,
+    error TEXT NULL,
+    version INT NOT NULL DEFAULT 0,
+    created_at TIMESTAMP NOT NULL,
+    finished_at TIMESTAMP NULL
+);
+CREATE INDEX IF NOT EXISTS idx_scoring_jobs_claim ON scoring_jobs (status, available_at);
+CREATE TABLE IF NOT EXISTS document_score_cache (
+    gold_hash CHAR(64) NOT NULL,
+    response_hash CHAR(64) NOT NULL,
+    counts TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (gold_hash, response_hash)
+);
+CREATE TABLE IF NOT EXISTS evaluation_document_scores (
+    evaluation_id INT PRIMARY KEY REFERENCES user_evaluations(id) ON DELETE CASCADE,
+    counts BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS error_analysis_cache (
+    gold_hash CHAR(64) NOT NULL,
+    response_hash CHAR(64) NOT NULL,
+    analysis BLOB NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (gold_hash, response_hash)
+);
+CREATE INDEX IF NOT EXISTS idx_user_evaluations_file_path ON user_evaluations (file_path);
+CREATE INDEX IF NOT EXISTS idx_user_evaluations_user_created ON user_evaluations (user_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_user_evaluations_language_created ON user_evaluations (language_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_user_evaluations_created ON user_evaluations (created_at, id);
+"""
+
+sqlite_schema_lock = threading.Lock()
+sqlite_schema_ready = False
+
+sqlite3.register_adapter(datetime, lambda value: value.strftime('%Y-%m-%d %H:%M:%S'))
+sqlite3.register_converter("TIMESTAMP", lambda value: datetime.fromisoformat(value.decode()))
+
+class SQLiteCursor:
+    """Cursor accepting the MySQL-style %s placeholders and dictionary rows used throughout this file"""
+    
+    def __init__(self, cursor, dictionary: bool = False):
+        self._cursor = cursor
+        self._dictionary = dictionary
+    
+    def execute(self, sql: str, params=()):
+        self._cursor.execute(sql.replace('%s', '?'), tuple(params))
+    
+    def executemany(self, sql: str, rows):
+        self._cursor.executemany(sql.replace('%s', '?'), [tuple(row) for row in rows])
+    
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return dict(zip([column[0] for column in self._cursor.description], row))
+    
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+    
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+    
+    def fetchmany(self, size: int = 1):
+        return [self._row(row) for row in self._cursor.fetchmany(size)]
+    
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+    
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+    
+    def close(self):
+        self._cursor.close()
+
+class SQLiteConnection:
+    """Minimal mysql.connector-compatible wrapper around a sqlite3 connection"""
+    
+    def __init__(self, path: str, read_only: bool = False):
+        if read_only:
+            # mode=ro fails instead of creating an empty database when the file is missing
+            path = f"{Path(path).resolve().as_uri()}?mode=ro"
+        self._conn = sqlite3.connect(path, timeout=30, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False, uri=read_only)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+    
+    def cursor(self, dictionary: bool = False):
+        return SQLiteCursor(self._conn.cursor(), dictionary)
+    
+    def commit(self):
+        self._conn.commit()
+    
+    def rollback(self):
+        self._conn.rollback()
+    
+    def close(self):
+        self._conn.close()
+
+def get_sqlite_connection():
+    global sqlite_schema_ready
+    conn = SQLiteConnection(SQLITE_PATH)
+    if not sqlite_schema_ready:
+        with sqlite_schema_lock:
+            if not sqlite_schema_ready:
+                # WAL lets readers proceed while a submission is being written
+                conn._conn.execute("PRAGMA journal_mode = WAL")
+                conn._conn.executescript(SQLITE_SCHEMA)
+                sqlite_schema_ready = True
+    return conn
+
 def get_db_connection():
+    if DB_BACKEND == 'sqlite':
+        try:
+            return get_sqlite_connection()
+        except Exception as e:
+            logger.warning(f"Database connection failed: {e}")
+            return None
+    
     try:
         return mysql.connector.connect(**DB_CONFIG)
     except Exception as e:
-        print(f"Database connection failed: {e}")
+        logger.warning(f"Database connection failed: {e}")
         return None
 
+def note_user_write(user_id: int):
+    """Route the user's reads to the primary until the replica has caught up with this write"""
+    now = time.monotonic()
+    with recent_writers_lock:
+        recent_writers[user_id] = now
+        if len(recent_writers) > 1000:
+            for writer, wrote_at in list(recent_writers.items()):
+                if now - wrote_at >= READ_YOUR_WRITES_SECONDS:
+                    del recent_writers[writer]
+
+def get_read_connection(user_id: int = None):
+    """Connection for read-only queries: the read replica when configured and reachable, else the primary
+
+    Pass the id of the user the data is shown to, so their own recent writes are visible.
+    """
+    global replica_down_until
+    if user_id is not None:
+        with recent_writers_lock:
+            wrote_at = recent_writers.get(user_id)
+        if wrote_at is not None and time.monotonic() - wrote_at < READ_YOUR_WRITES_SECONDS:
+            database_reads.inc(target='primary')
+            return get_db_connection()
+    
+    replica_configured = SQLITE_REPLICA_PATH if DB_BACKEND == 'sqlite' else DB_REPLICA_HOST
+    if replica_configured and time.monotonic() >= replica_down_until:
+        try:
+            if DB_BACKEND == 'sqlite':
+                conn = SQLiteConnection(SQLITE_REPLICA_PATH, read_only=True)
+            else:
+                conn = mysql.connector.connect(**DB_REPLICA_CONFIG)
+            database_reads.inc(target='replica')
+            return conn
+        except Exception as e:
+            replica_down_until = time.monotonic() + DB_REPLICA_RETRY_SECONDS
+            logger.warning(f"Read replica unavailable, reading from the primary for {DB_REPLICA_RETRY_SECONDS:.0f}s: {e}")
+    
+    database_reads.inc(target='primary')
+    return get_db_connection()
+
 def get_current_user(session_token: str = Cookie(None)):
     if not session_token or session_token not in active_sessions:
         raise HTTPException(status_code=401, detail="Not authenticated")
+    if session_expiry.get(session_token, 0) <= time.time():
+        end_session(session_token)
+        raise HTTPException(status_code=401, detail="Session expired")
     
     user_info = active_sessions[session_token]
     return user_info
 
+def end_session(session_token: str):
+    active_sessions.pop(session_token, None)
+    session_expiry.pop(session_token, None)
+
 def authenticate_user(username: str, password: str):
     conn = get_db_connection()
     
@@ -75,7 +909,7 @@ def authenticate_user(username: str, password: str):
             user = cursor.fetchone()
             conn.close()
         except Exception as e:
-            print(f"Database authentication error: {e}")
+            logger.error(f"Database authentication error: {e}")
             user = None
             if conn:
                 conn.close()
@@ -90,400 +924,1290 @@ def authenticate_user(username: str, password: str):
     
     return user
 
-def find_gold_dataset(language_id: int):
-    """Find the gold dataset for a given language"""
+def read_reference_data_version(cursor):
+    """Shared reference data version, or None on databases created before the counter existed"""
+    try:
+        cursor.execute("SELECT version FROM reference_data_version WHERE id = 1")
+        row = cursor.fetchone()
+    except Exception as e:
+        logger.debug(f"Reference data version unavailable: {e}")
+        return None
+    if row is None:
+        return None
+    return row['version'] if isinstance(row, dict) else row[0]
+
+def get_reference_data() -> dict:
+    """Languages (by name) and gold datasets (newest first), served from the in-process cache
+
+    The cache is revalidated against the shared version counter at most every
+    REFERENCE_DATA_CHECK_SECONDS; without a database the demo lists are returned as they are.
+    """
+    global reference_data_cache
+    with reference_data_lock:
+        cached = reference_data_cache
+        generation = reference_data_generation
+    
+    now = time.monotonic()
+    if cached and now - cached['checked_at'] < REFERENCE_DATA_CHECK_SECONDS:
+        return cached
+    
     conn = get_db_connection()
+    if not conn:
+        return {'languages': DEMO_LANGUAGES, 'gold_datasets': list(reversed(DEMO_GOLD_DATASETS))}
+    
+    try:
+        with stage_duration.time(stage='db_read'):
+            cursor = conn.cursor(dictionary=True)
+            version = read_reference_data_version(cursor)
+            if cached and version is not None and version == cached['version']:
+                data = dict(cached, checked_at=now)
+            else:
+                cursor.execute("SELECT * FROM languages ORDER BY language_name")
+                languages = cursor.fetchall()
+                cursor.execute("""
+                    SELECT gd.*, l.language_name
+                    FROM gold_datasets gd
+                    JOIN languages l ON gd.language_id = l.id
+                    ORDER BY gd.created_at DESC, gd.id DESC
+                """)
+                gold_datasets = cursor.fetchall()
+                data = {'languages': languages, 'gold_datasets': gold_datasets, 'version': version, 'checked_at': now}
+                logger.debug(f"Loaded reference data version {version}: {len(languages)} languages, {len(gold_datasets)} gold datasets")
+        conn.close()
+    except Exception as e:
+        logger.error(f"Database error loading reference data: {e}")
+        conn.close()
+        return {'languages': DEMO_LANGUAGES, 'gold_datasets': list(reversed(DEMO_GOLD_DATASETS))}
+    
+    with reference_data_lock:
+        # An admin write during the load may have made it stale already
+        if generation == reference_data_generation:
+            reference_data_cache = data
+    return data
+
+def invalidate_reference_data():
+    """Drop the cached reference data here and bump the shared version for other processes"""
+    global reference_data_cache, reference_data_generation
+    with reference_data_lock:
+        reference_data_cache = None
+        reference_data_generation += 1
     
+    conn = get_db_connection()
     if conn:
         try:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("SELECT * FROM gold_datasets WHERE language_id = %s ORDER BY created_at DESC LIMIT 1", (language_id,))
-            dataset = cursor.fetchone()
-            conn.close()
-            if dataset:
-                return dataset
+            cursor = conn.cursor()
+            cursor.execute("UPDATE reference_data_version SET version = version + 1 WHERE id = 1")
+            conn.commit()
         except Exception as e:
-            print(f"Database error finding gold dataset: {e}")
-            if conn:
-                conn.close()
-    
-    # Fallback to demo data
-    for dataset in DEMO_GOLD_DATASETS:
+            logger.warning(f"Could not bump reference data version: {e}")
+        conn.close()
+
+@app.on_event("startup")
+def warm_reference_data():
+    """Load the reference data before the first request needs it"""
+    get_reference_data()
+
+def get_languages() -> list:
+    """All languages, ordered by name"""
+    return get_reference_data()['languages']
+
+def find_gold_dataset(language_id: int):
+    """Find the newest gold dataset for a given language"""
+    for dataset in get_reference_data()['gold_datasets']:
         if dataset['language_id'] == language_id:
             return dataset
     
     return None
 
-def check_perl_availability():
-    """Check if Perl is available on the system"""
-    try:
-        result = subprocess.run(['perl', '-v'], capture_output=True, text=True, timeout=5)
-        return result.returncode == 0
-    except (subprocess.SubprocessError, FileNotFoundError):
-        return False
+# Count groups reported per document by scorer/doc_scorer.pl, each stored as
+# (recall_num, recall_den, precision_num, precision_den)
+DOCUMENT_SCORE_COMPONENTS = ['mentions', 'muc', 'bcub', 'ceafm', 'ceafe', 'blanc_coref', 'blanc_noncoref']
+DOCUMENT_BEGIN_RE = re.compile(rb'^#\s*begin document (.*?)$')
+DOCUMENT_END_RE = re.compile(rb'#\s*end document')
 
-def check_perl_dependencies():
-    """Check if required Perl modules are available"""
-    required_modules = [
-        'Math::Combinatorics',
-        'Algorithm::Munkres'
-    ]
+def split_documents(file_path: str) -> dict:
+    """Split a SemEval/CoNLL file into {document name: raw bytes} the way CorScorer reads it"""
+    documents = {}
+    name = None
+    block = []
     
-    missing_modules = []
-    
-    for module in required_modules:
-        try:
-            result = subprocess.run([
-                'perl', '-e', f'use {module}; print "OK";'
-            ], capture_output=True, text=True, timeout=10)
+    with open(file_path, 'rb') as f:
+        for line in f:
+            if name is None:
+                match = DOCUMENT_BEGIN_RE.match(line.rstrip(b'\n').rstrip(b'\r'))
+                if match:
+                    name = match.group(1).decode('utf-8', errors='surrogateescape')
+                    block = [line]
+                continue
             
-            if result.returncode != 0:
-                missing_modules.append(module)
-        except:
-            missing_modules.append(module)
+            block.append(line)
+            if DOCUMENT_END_RE.search(line):
+                # CorScorer keeps the last document with a given name
+                documents[name] = b''.join(block)
+                name = None
     
-    return missing_modules
+    if name is not None:
+        documents[name] = b''.join(block)
+    
+    return documents
+
+def document_hash(block: bytes) -> str:
+    return hashlib.sha256(block).hexdigest()
 
-def run_perl_scorer(gold_file_path: str, system_file_path: str) -> dict:
-    """Execute the Perl scorer script and parse results - NO DEMO FALLBACK"""
-    scorer_script = Path("scorer") / "scorer.pl"
+def encode_document_counts(counts: dict) -> str:
+    """Flatten one document's counts into a compact JSON list"""
+    return json.dumps([value for component in DOCUMENT_SCORE_COMPONENTS for value in counts[component]], separators=(',', ':'))
+
+def decode_document_counts(encoded) -> dict:
+    values = json.loads(encoded)
+    return {component: values[i * 4:i * 4 + 4] for i, component in enumerate(DOCUMENT_SCORE_COMPONENTS)}
+
+def encode_document_scores(document_counts: dict) -> bytes:
+    """Compress all per-document counts of an evaluation for storage"""
+    payload = {
+        'components': DOCUMENT_SCORE_COMPONENTS,
+        'documents': {name: json.loads(encode_document_counts(counts)) for name, counts in document_counts.items()}
+    }
+    return zlib.compress(json.dumps(payload, separators=(',', ':')).encode())
+
+def decode_document_scores(blob: bytes) -> dict:
+    payload = json.loads(zlib.decompress(blob))
+    components = payload['components']
+    return {
+        name: {component: values[i * 4:i * 4 + 4] for i, component in enumerate(components)}
+        for name, values in payload['documents'].items()
+    }
+
+def remember_document_scores(entries: dict):
+    """Add entries to the in-process document score cache, evicting the oldest"""
+    with document_score_memo_lock:
+        for key, counts in entries.items():
+            document_score_memo[key] = counts
+            document_score_memo.move_to_end(key)
+        while len(document_score_memo) > DOCUMENT_CACHE_SIZE:
+            document_score_memo.popitem(last=False)
+
+def load_cached_document_scores(keys: set) -> dict:
+    """Look up cached per-document counts, in memory first and then in the database"""
+    found = {}
+    with document_score_memo_lock:
+        for key in keys:
+            if key in document_score_memo:
+                found[key] = document_score_memo[key]
+                document_score_memo.move_to_end(key)
+    document_cache_hits.inc(len(found), tier='memory')
     
-    if not scorer_script.exists():
-        raise HTTPException(status_code=400, detail="Scorer script not found. Please upload scorer.pl through admin panel.")
+    remaining = [key for key in keys if key not in found]
+    if not remaining:
+        return found
     
-    # Check if Perl is available - FAIL if not found
-    if not check_perl_availability():
-        raise HTTPException(status_code=400, detail="Perl not installed. Please install Perl from https://strawberryperl.com/ and restart the server.")
-    
-    # Check for required Perl modules
-    corscore_pm = Path("scorer") / "CorScorer.pm"
-    if not corscore_pm.exists():
-        raise HTTPException(status_code=400, detail="CorScorer.pm module not found in scorer directory. Please upload the complete CorScorer package.")
-    
-    # Check Perl dependencies
-    missing_modules = check_perl_dependencies()
-    if missing_modules:
-        module_list = ", ".join(missing_modules)
-        install_commands = "\n".join([f"cpan install {module}" for module in missing_modules])
-        raise HTTPException(
-            status_code=400, 
-            detail=f"Missing required Perl modules: {module_list}. Install them using:\n{install_commands}"
-        )
+    conn = get_db_connection()
+    if conn:
+        try:
+            cursor = conn.cursor()
+            loaded = {}
+            for i in range(0, len(remaining), 400):
+                chunk = remaining[i:i + 400]
+                # OR-ed key pairs rather than a row-value IN list, which SQLite does not accept
+                conditions = " OR ".join(["(gold_hash = %s AND response_hash = %s)"] * len(chunk))
+                cursor.execute(
+                    f"SELECT gold_hash, response_hash, counts FROM document_score_cache WHERE {conditions}",
+                    [value for key in chunk for value in key]
+                )
+                for gold_hash, response_hash, counts in cursor.fetchall():
+                    loaded[(gold_hash, response_hash)] = decode_document_counts(counts)
+            conn.close()
+            remember_document_scores(loaded)
+            found.update(loaded)
+            document_cache_hits.inc(len(loaded), tier='database')
+        except Exception as e:
+            logger.error(f"Error loading document score cache: {e}")
+            if conn:
+                conn.close()
     
-    try:
-        # Convert paths to absolute paths to avoid issues
-        gold_path = os.path.abspath(gold_file_path)
-        system_path = os.path.abspath(system_file_path)
-        scorer_path = os.path.abspath(scorer_script)
-        scorer_dir = os.path.dirname(scorer_path)
-        
-        # Verify files exist
-        if not os.path.exists(gold_path):
-            raise HTTPException(status_code=400, detail=f"Gold dataset file not found: {gold_path}")
-        if not os.path.exists(system_path):
-            raise HTTPException(status_code=400, detail=f"System file not found: {system_path}")
-        
-        print(f"EXECUTING: perl \"{scorer_path}\" all \"{gold_path}\" \"{system_path}\"")
-        print(f"Working directory: {scorer_dir}")
-        
-        # Run the perl script with proper library path
-        env = os.environ.copy()
-        # Add scorer directory to Perl's library path
-        if 'PERL5LIB' in env:
-            env['PERL5LIB'] = f"{scorer_dir}{os.pathsep}{env['PERL5LIB']}"
-        else:
-            env['PERL5LIB'] = scorer_dir
-            
-        result = subprocess.run([
-            'perl', '-I', scorer_dir, scorer_path, 'all', gold_path, system_path
-        ], capture_output=True, text=True, timeout=120, cwd=scorer_dir, env=env)
-        
-        print(f"PERL SCRIPT STDOUT:\n{result.stdout}")
-        if result.stderr:
-            print(f"PERL SCRIPT STDERR:\n{result.stderr}")
-        print(f"PERL SCRIPT RETURN CODE: {result.returncode}")
-        
-        if result.returncode != 0:
-            error_msg = f"Perl script failed with exit code {result.returncode}."
-            
-            if "Can't locate Math/Combinatorics.pm" in result.stderr:
-                error_msg = "Missing Math::Combinatorics module. Install with: cpan install Math::Combinatorics"
-            elif "Can't locate Algorithm/Munkres.pm" in result.stderr:
-                error_msg = "Missing Algorithm::Munkres module. Install with: cpan install Algorithm::Munkres"
-            elif "Can't locate" in result.stderr:
-                error_msg += " Missing Perl modules. Please install required dependencies."
-            elif result.stderr:
-                error_msg += f" Error: {result.stderr}"
-                
-            raise HTTPException(status_code=400, detail=error_msg)
-        
-        # Parse the output to extract scores
-        scores = parse_scorer_output(result.stdout)
-        
-        if not scores:
-            raise HTTPException(status_code=400, detail=f"Could not parse scorer output. Raw output: {result.stdout}")
-        
-        print(f"PARSED SCORES: {scores}")
-        return scores
+    return found
+
+def store_cached_document_scores(entries: dict):
+    """Persist freshly computed per-document counts to the cache"""
+    if not entries:
+        return
+    remember_document_scores(entries)
     
-    except subprocess.TimeoutExpired:
-        raise HTTPException(status_code=400, detail="Perl script execution timeout (>120 seconds)")
-    except subprocess.CalledProcessError as e:
-        raise HTTPException(status_code=400, detail=f"Perl script execution failed: {e}")
-    except FileNotFoundError:
-        raise HTTPException(status_code=400, detail="Perl command not found. Please install Perl and restart the server.")
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Unexpected error running scorer: {str(e)}")
+    conn = get_db_connection()
+    if conn:
+        try:
+            with stage_duration.time(stage='db_write'):
+                cursor = conn.cursor()
+                cursor.executemany(
+                    "INSERT INTO document_score_cache (gold_hash, response_hash, counts) VALUES (%s, %s, %s)",
+                    [(gold_hash, response_hash, encode_document_counts(counts)) for (gold_hash, response_hash), counts in entries.items()]
+                )
+                conn.commit()
+            conn.close()
+        except Exception as e:
+            # A concurrent submission may have cached the same document first
+            logger.error(f"Error storing document score cache: {e}")
+            if conn:
+                conn.close()
 
-def parse_scorer_output(output: str) -> dict:
-    """Parse the Perl scorer output to extract metrics"""
-    scores = {}
+def run_document_scorer(gold_path: str, system_path: str, metrics: str = 'all', documents: list = None, on_line=None) -> dict:
+    """Run scorer/doc_scorer.pl and return {document: {component: [nr, dr, np, dp]}}"""
+    args = [metrics, gold_path, system_path]
+    documents_file = None
     
-    if not output or output.strip() == "":
-        return {}
+    if documents is not None:
+        with tempfile.NamedTemporaryFile('w', suffix='.lst', prefix='coref_documents_', delete=False, encoding='utf-8', errors='surrogateescape') as f:
+            f.write("\n".join(documents) + "\n")
+            documents_file = f.name
+        args.append(documents_file)
     
     try:
-        # Print raw output for debugging
-        print(f"RAW SCORER OUTPUT:\n{repr(output)}")
-        
-        # Parse the specific format from your scorer
-        lines = output.split('\n')
-        
-        for line in lines:
-            line = line.strip()
-            
-            # Parse Identification of Mentions (this is like MUC)
-            if "Identification of Mentions:" in line:
-                # Format: "Identification of Mentions: Recall: (291 / 291) 100%      Precision: (291 / 291) 100%     F1: 100%"
-                recall_match = re.search(r'Recall:\s*\([^)]+\)\s*([\d.]+)%', line)
-                precision_match = re.search(r'Precision:\s*\([^)]+\)\s*([\d.]+)%', line)
-                f1_match = re.search(r'F1:\s*([\d.]+)%', line)
-                
-                if recall_match and precision_match and f1_match:
-                    scores['muc'] = {
-                        'recall': float(recall_match.group(1)) / 100,
-                        'precision': float(precision_match.group(1)) / 100,
-                        'f1': float(f1_match.group(1)) / 100
-                    }
-                    print(f"PARSED MUC (Identification): R={scores['muc']['recall']}, P={scores['muc']['precision']}, F1={scores['muc']['f1']}")
-            
-            # Parse Coreference links (this is like B-CUBED)
-            elif "Coreference links:" in line:
-                # Format: "Coreference links: Recall: (602 / 602) 100%       Precision: (602 / 602) 100%     F1: 100%"
-                recall_match = re.search(r'Recall:\s*\([^)]+\)\s*([\d.]+)%', line)
-                precision_match = re.search(r'Precision:\s*\([^)]+\)\s*([\d.]+)%', line)
-                f1_match = re.search(r'F1:\s*([\d.]+)%', line)
-                
-                if recall_match and precision_match and f1_match:
-                    scores['bcub'] = {
-                        'recall': float(recall_match.group(1)) / 100,
-                        'precision': float(precision_match.group(1)) / 100,
-                        'f1': float(f1_match.group(1)) / 100
-                    }
-                    print(f"PARSED B-CUBED (Coreference): R={scores['bcub']['recall']}, P={scores['bcub']['precision']}, F1={scores['bcub']['f1']}")
-            
-            # Parse Non-coreference links (additional metric)
-            elif "Non-coreference links:" in line:
-                # Format: "Non-coreference links: Recall: (3200 / 3200) 100% Precision: (3200 / 3200) 100%   F1: 100%"
-                recall_match = re.search(r'Recall:\s*\([^)]+\)\s*([\d.]+)%', line)
-                precision_match = re.search(r'Precision:\s*\([^)]+\)\s*([\d.]+)%', line)
-                f1_match = re.search(r'F1:\s*([\d.]+)%', line)
-                
-                if recall_match and precision_match and f1_match:
-                    scores['ceafm'] = {
-                        'recall': float(recall_match.group(1)) / 100,
-                        'precision': float(precision_match.group(1)) / 100,
-                        'f1': float(f1_match.group(1)) / 100
-                    }
-                    print(f"PARSED CEAF-M (Non-coreference): R={scores['ceafm']['recall']}, P={scores['ceafm']['precision']}, F1={scores['ceafm']['f1']}")
-            
-            # Parse BLANC
-            elif "BLANC:" in line:
-                # Format: "BLANC: Recall: (1 / 1) 100%       Precision: (1 / 1) 100% F1: 100%"
-                recall_match = re.search(r'Recall:\s*\([^)]+\)\s*([\d.]+)%', line)
-                precision_match = re.search(r'Precision:\s*\([^)]+\)\s*([\d.]+)%', line)
-                f1_match = re.search(r'F1:\s*([\d.]+)%', line)
-                
-                if recall_match and precision_match and f1_match:
-                    scores['blanc'] = {
-                        'recall': float(recall_match.group(1)) / 100,
-                        'precision': float(precision_match.group(1)) / 100,
-                        'f1': float(f1_match.group(1)) / 100
-                    }
-                    print(f"PARSED BLANC: R={scores['blanc']['recall']}, P={scores['blanc']['precision']}, F1={scores['blanc']['f1']}")
-            
-            # Also try to parse any standard CoNLL format that might be in the output
-            elif re.search(r'MUC.*?Recall:.*?Precision:.*?F1:', line, re.IGNORECASE):
-                recall_match = re.search(r'Recall:\s*([\d.]+)', line)
-                precision_match = re.search(r'Precision:\s*([\d.]+)', line)
-                f1_match = re.search(r'F1:\s*([\d.]+)', line)
-                
-                if recall_match and precision_match and f1_match:
-                    if 'muc' not in scores:  # Don't overwrite if already parsed
-                        scores['muc'] = {
-                            'recall': float(recall_match.group(1)),
-                            'precision': float(precision_match.group(1)),
-                            'f1': float(f1_match.group(1))
-                        }
-                        print(f"PARSED MUC (standard): R={scores['muc']['recall']}, P={scores['muc']['precision']}, F1={scores['muc']['f1']}")
-        
-        # If we didn't find any metrics, try alternative parsing
-        if not scores:
-            print("No standard metrics found, trying alternative patterns...")
-            
-            # Look for percentage patterns
-            percentage_lines = [line for line in lines if '%' in line and ('Recall' in line or 'Precision' in line)]
-            for line in percentage_lines:
-                print(f"PERCENTAGE LINE: {line}")
-                
-                # Try to extract any three consecutive percentages
-                percentages = re.findall(r'([\d.]+)%', line)
-                if len(percentages) >= 3:
-                    try:
-                        recall = float(percentages[0]) / 100
-                        precision = float(percentages[1]) / 100
-                        f1 = float(percentages[2]) / 100
-                        
-                        # Assign to a generic metric if we don't have any
-                        if not scores:
-                            scores['overall'] = {
-                                'recall': recall,
-                                'precision': precision,
-                                'f1': f1
-                            }
-                            print(f"PARSED OVERALL: R={recall}, P={precision}, F1={f1}")
-                            break
-                    except ValueError:
-                        continue
-        
-        return scores
+        result = run_scorer_script("doc_scorer.pl", args, on_line)
+    finally:
+        if documents_file:
+            os.unlink(documents_file)
     
-    except Exception as e:
-        print(f"ERROR parsing scorer output: {e}")
-        return {}
+    document_counts = {}
+    with stage_duration.time(stage='parse'):
+        for line in result.stdout.splitlines():
+            fields = line.split('\t')
+            if len(fields) != 7 or fields[0] != 'DOC':
+                continue
+            document_counts.setdefault(fields[1], {})[fields[2]] = [float(value) for value in fields[3:]]
+    
+    return document_counts
 
-def generate_demo_scores() -> dict:
-    """Generate realistic demo scores"""
-    import random
+def score_documents(gold_path: str, system_path: str, progress=None) -> dict:
+    """Per-document counts for a submission, running the scorer only on documents not seen before
+
+    progress, if given, is called as progress(documents_done, documents_total, document, metric)
+    while documents are scored; cached documents count as done straight away.
+    """
+    gold_documents = split_documents(gold_path)
+    system_documents = split_documents(system_path)
     
-    print("GENERATING DEMO SCORES (Perl script not executed)")
+    keys = {
+        name: (document_hash(block), document_hash(system_documents.get(name, b'')))
+        for name, block in gold_documents.items()
+    }
+    with stage_duration.time(stage='cache_lookup'):
+        counts_by_key = load_cached_document_scores(set(keys.values()))
+    missing = [name for name, key in keys.items() if key not in counts_by_key]
+    document_cache_misses.inc(len(missing))
+    logger.info(f"DOCUMENT CACHE: {len(keys) - len(missing)} of {len(keys)} documents cached")
     
-    scores = {}
-    metrics = ['muc', 'bcub', 'ceafm', 'ceafe', 'blanc']
+    documents_done = [len(keys) - len(missing)]
+    if progress:
+        progress(documents_done[0], len(keys), None, None)
     
-    for metric in metrics:
-        # Generate realistic scores between 0.7-0.9
-        recall = round(random.uniform(0.70, 0.90), 4)
-        precision = round(random.uniform(0.70, 0.90), 4)
-        f1 = round(2 * recall * precision / (recall + precision), 4)
+    def report_line(line):
+        fields = line.rstrip('\n').split('\t')
+        if len(fields) != 7 or fields[0] != 'DOC':
+            return
+        if fields[2] == DOCUMENT_SCORE_COMPONENTS[-1]:
+            documents_done[0] += 1
+        progress(documents_done[0], len(keys), fields[1], fields[2])
+    
+    on_line = report_line if progress else None
+    
+    if missing:
+        if len(missing) == len(keys):
+            fresh = run_document_scorer(gold_path, system_path, on_line=on_line)
+        else:
+            # Score only the changed documents from trimmed copies of both files
+            with tempfile.TemporaryDirectory(prefix="coref_docs_") as tmp:
+                gold_subset = Path(tmp) / "gold.txt"
+                system_subset = Path(tmp) / "system.txt"
+                gold_subset.write_bytes(b''.join(gold_documents[name] for name in missing))
+                system_subset.write_bytes(b''.join(system_documents[name] for name in missing if name in system_documents))
+                fresh = run_document_scorer(str(gold_subset), str(system_subset), on_line=on_line)
         
-        scores[metric] = {
-            'recall': recall,
-            'precision': precision,
-            'f1': f1
-        }
+        new_entries = {}
+        for name in missing:
+            if name not in fresh:
+                raise HTTPException(status_code=400, detail=f"Scorer returned no counts for document {name}")
+            new_entries[keys[name]] = fresh[name]
+        store_cached_document_scores(new_entries)
+        counts_by_key.update(new_entries)
     
-    return scores
+    return {name: counts_by_key[key] for name, key in keys.items()}
 
-def save_evaluation_results(user_id: int, language_id: int, filename: str, file_path: str, scores: dict):
-    """Save evaluation results to database or demo storage"""
-    conn = get_db_connection()
+def sum_document_counts(document_counts: dict) -> dict:
+    """Add up per-document counts the way CorScorer::Score accumulates them"""
+    totals = {}
+    for counts in document_counts.values():
+        for component, values in counts.items():
+            accumulated = totals.setdefault(component, [0, 0, 0, 0])
+            for i in range(4):
+                accumulated[i] += values[i]
+    return totals
+
+def truncated_score(value: float) -> float:
+    """ShowRPF prints int(value * 10000) / 100 percent, which parse_scorer_output reads back with percent_fraction
+
+    Rounding to 4 decimals drops float artifacts (0.7648999999999999), so both scoring
+    paths store identical values.
+    """
+    return round(int(value * 10000) / 100 / 100, 4)
+
+def rpf_from_counts(recall_num: float, recall_den: float, precision_num: float, precision_den: float) -> dict:
+    """Recall, precision and F1 as CorScorer::ShowRPF reports them"""
+    recall = recall_num / recall_den if recall_den else 0
+    precision = precision_num / precision_den if precision_den else 0
+    f1 = 2 * precision * recall / (precision + recall) if recall + precision else 0
+    return {'recall': truncated_score(recall), 'precision': truncated_score(precision), 'f1': truncated_score(f1)}
+
+def blanc_from_counts(coref: list, noncoref: list) -> dict:
+    """BLANC mean of the coreference and non-coreference link scores, as in CorScorer::ScoreBLANC"""
+    nr_a, dr_a, np_a, dp_a = coref
+    nr_r, dr_r, np_r, dp_r = noncoref
     
-    if conn:
+    recall_a = nr_a / dr_a if dr_a else -1
+    recall_r = nr_r / dr_r if dr_r else -1
+    precision_a = np_a / dp_a if dp_a else 0
+    precision_r = np_r / dp_r if dp_r else 0
+    f1_a = 2 * precision_a * recall_a / (precision_a + recall_a) if precision_a + recall_a else 0
+    f1_r = 2 * precision_r * recall_r / (precision_r + recall_r) if precision_r + recall_r else 0
+    
+    if recall_a == -1 and recall_r == -1:
+        recall, precision, f1 = 0, 0, 0
+    elif recall_a == -1:
+        recall, precision, f1 = recall_r, precision_r, f1_r
+    elif recall_r == -1:
+        recall, precision, f1 = recall_a, precision_a, f1_a
+    else:
+        recall = (recall_a + recall_r) / 2
+        precision = (precision_a + precision_r) / 2
+        f1 = (f1_a + f1_r) / 2
+    
+    return {'recall': truncated_score(recall), 'precision': truncated_score(precision), 'f1': truncated_score(f1)}
+
+def scores_from_document_counts(document_counts: dict) -> dict:
+    """Aggregate per-document counts into the scores parse_scorer_output reads from `scorer.pl all`
+
+    parse_scorer_output stores mention identification as 'muc', BLANC coreference and
+    non-coreference links as 'bcub' and 'ceafm' and the BLANC mean as 'blanc'. The same
+    mapping is used here so scores stay comparable with existing leaderboard entries.
+    """
+    totals = sum_document_counts(document_counts)
+    scores = {}
+    
+    if 'mentions' in totals:
+        scores['muc'] = rpf_from_counts(*totals['mentions'])
+    if 'blanc_coref' in totals and 'blanc_noncoref' in totals:
+        scores['bcub'] = rpf_from_counts(*totals['blanc_coref'])
+        scores['ceafm'] = rpf_from_counts(*totals['blanc_noncoref'])
+        scores['blanc'] = blanc_from_counts(totals['blanc_coref'], totals['blanc_noncoref'])
+    
+    return scores
+
+# Leaderboard score keys and the doc_scorer.pl pass each one needs. 'muc' is read from
+# mention identification (see parse_scorer_output), which every pass reports, so the
+# cheap muc pass is enough; bcub, ceafm and blanc all come from the BLANC pass.
+PREVIEW_METRIC_PASSES = {'muc': 'muc', 'bcub': 'blanc', 'ceafm': 'blanc', 'blanc': 'blanc'}
+
+def parse_preview_metrics(metrics: str) -> list:
+    """Validate a comma separated metric subset, defaulting to every leaderboard metric"""
+    if not metrics:
+        return list(PREVIEW_METRIC_PASSES)
+    selected = [metric.strip().lower() for metric in metrics.split(',') if metric.strip()]
+    unknown = [metric for metric in selected if metric not in PREVIEW_METRIC_PASSES]
+    if unknown or not selected:
+        raise HTTPException(status_code=400, detail=f"Unknown metrics {', '.join(unknown)}. Choose from: {', '.join(PREVIEW_METRIC_PASSES)}")
+    return list(dict.fromkeys(selected))
+
+def sample_document_names(names: list, sample_size: int) -> list:
+    """Deterministic document sample: the names with the smallest SHA-256 hashes
+
+    The same gold data always yields the same sample, so repeated previews are comparable.
+    """
+    if not sample_size or sample_size >= len(names):
+        return list(names)
+    ranked = sorted(names, key=lambda name: hashlib.sha256(name.encode('utf-8', errors='surrogateescape')).hexdigest())
+    return ranked[:sample_size]
+
+def preview_submission(gold_file_path: str, system_file_path: str, metrics: list, sample_size: int) -> dict:
+    """Estimate scores from a document sample and metric subset without touching stored results
+
+    Cached per-document counts are reused; other sampled documents are scored with
+    only the passes the requested metrics need and are not added to the cache.
+    """
+    check_scorer_environment()
+    if not (Path("scorer") / "doc_scorer.pl").exists():
+        raise HTTPException(status_code=400, detail="Preview needs scorer/doc_scorer.pl")
+    
+    gold_documents = split_documents(gold_file_path)
+    system_documents = split_documents(system_file_path)
+    sampled = sample_document_names(list(gold_documents), sample_size)
+    if not sampled:
+        raise HTTPException(status_code=400, detail="Gold dataset contains no documents to score")
+    
+    keys = {
+        name: (document_hash(gold_documents[name]), document_hash(system_documents.get(name, b'')))
+        for name in sampled
+    }
+    with stage_duration.time(stage='cache_lookup'):
+        cached = load_cached_document_scores(set(keys.values()))
+    document_counts = {name: cached[key] for name, key in keys.items() if key in cached}
+    missing = [name for name in sampled if name not in document_counts]
+    document_cache_misses.inc(len(missing))
+    
+    if missing:
+        passes = sorted({PREVIEW_METRIC_PASSES[metric] for metric in metrics})
+        with tempfile.TemporaryDirectory(prefix="coref_preview_") as tmp:
+            gold_subset = Path(tmp) / "gold.txt"
+            system_subset = Path(tmp) / "system.txt"
+            gold_subset.write_bytes(b''.join(gold_documents[name] for name in missing))
+            system_subset.write_bytes(b''.join(system_documents[name] for name in missing if name in system_documents))
+            fresh = run_document_scorer(str(gold_subset), str(system_subset), metrics=','.join(passes))
+        
+        for name in missing:
+            if name not in fresh:
+                raise HTTPException(status_code=400, detail=f"Scorer returned no counts for document {name}")
+            document_counts[name] = fresh[name]
+    
+    scores = scores_from_document_counts(document_counts)
+    logger.info(f"PREVIEW: {len(sampled)} of {len(gold_documents)} documents ({len(sampled) - len(missing)} cached), metrics {metrics}")
+    
+    return {
+        'scores': {metric: scores[metric] for metric in metrics if metric in scores},
+        'metrics': metrics,
+        'documents_scored': len(sampled),
+        'documents_total': len(gold_documents)
+    }
+
+def score_submission(gold_file_path: str, system_file_path: str, check_environment: bool = True, progress=None):
+    """Score a submission and return (scores, per-document counts)
+
+    Uses the per-document scorer and cache when scorer/doc_scorer.pl is installed, so a
+    resubmission only re-scores the documents that changed. Without it, falls back to a
+    single `scorer.pl all` run and returns no per-document counts. Compressed
+    submissions from the store are decompressed to a temporary file for the scorer.
+    """
+    if check_environment:
+        check_scorer_environment()
+    
+    try:
+        with materialized_submission(system_file_path) as system_path:
+            return score_plain_submission(gold_file_path, system_path, progress)
+    except FileNotFoundError:
+        raise HTTPException(status_code=400, detail=f"System file not found: {system_file_path}")
+
+def score_plain_submission(gold_file_path: str, system_file_path: str, progress=None):
+    """score_submission for an uncompressed system file, once the environment is checked"""
+    if not (Path("scorer") / "doc_scorer.pl").exists():
+        return run_perl_scorer(gold_file_path, system_file_path, check_environment=False), None
+    
+    gold_path = os.path.abspath(gold_file_path)
+    system_path = os.path.abspath(system_file_path)
+    if not os.path.exists(gold_path):
+        raise HTTPException(status_code=400, detail=f"Gold dataset file not found: {gold_path}")
+    if not os.path.exists(system_path):
+        raise HTTPException(status_code=400, detail=f"System file not found: {system_path}")
+    
+    try:
+        document_counts = score_documents(gold_path, system_path, progress)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error running scorer: {str(e)}")
+    
+    with stage_duration.time(stage='parse'):
+        scores = scores_from_document_counts(document_counts)
+    if not scores:
+        raise HTTPException(status_code=400, detail="Gold dataset contains no documents to score")
+    
+    logger.debug(f"PARSED SCORES: {scores}")
+    return scores, document_counts
+
+class ScoringGovernor:
+    """Admission control for scorer processes
+
+    At most max_concurrent scorings run at once. Further requests wait in a queue
+    that is served round-robin across owners (users), so one participant's burst
+    cannot starve everyone else. Interactive requests are rejected with 429 and a
+    Retry-After estimate when the queue is full or their wait exceeds
+    queue_timeout; background work (batch members, rescoring) always waits.
+    """
+    
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._condition = threading.Condition()
+        self._active = 0
+        self._queued = 0
+        self._waiting = OrderedDict()  # owner -> deque of tickets, in round-robin order
+        self._granted = set()
+        self._average_seconds = 10.0
+    
+    def _retry_after(self) -> int:
+        backlog = self._active + self._queued
+        return max(1, math.ceil(self._average_seconds * backlog / self.max_concurrent))
+    
+    def _rejection(self, reason: str) -> HTTPException:
+        retry_after = self._retry_after()
+        return HTTPException(
+            status_code=429,
+            detail=f"{reason}. Please retry in {retry_after} seconds.",
+            headers={"Retry-After": str(retry_after)}
+        )
+    
+    def _grant_next(self):
+        while self._active < self.max_concurrent and self._waiting:
+            owner, tickets = next(iter(self._waiting.items()))
+            ticket = tickets.popleft()
+            # Move the owner to the back of the rotation
+            del self._waiting[owner]
+            if tickets:
+                self._waiting[owner] = tickets
+            self._queued -= 1
+            self._active += 1
+            self._granted.add(ticket)
+        self._condition.notify_all()
+    
+    def _withdraw(self, owner, ticket):
+        tickets = self._waiting.get(owner)
+        if tickets and ticket in tickets:
+            tickets.remove(ticket)
+            if not tickets:
+                del self._waiting[owner]
+            self._queued -= 1
+    
+    def check_admission(self):
+        """Raise 429 straight away if new interactive work would be rejected"""
+        with self._condition:
+            has_free_slot = self._active < self.max_concurrent and not self._waiting
+            if not has_free_slot and self._queued >= self.max_queue:
+                raise self._rejection("Scoring queue is full")
+    
+    def status(self) -> dict:
+        with self._condition:
+            return {
+                'active': self._active,
+                'queued': self._queued,
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'average_seconds': round(self._average_seconds, 2)
+            }
+    
+    @contextmanager
+    def slot(self, owner, interactive: bool = True):
+        """Hold one scoring slot for the duration of the block"""
+        ticket = object()
+        with self._condition:
+            if self._active < self.max_concurrent and not self._waiting:
+                self._active += 1
+            else:
+                if interactive and self._queued >= self.max_queue:
+                    raise self._rejection("Scoring queue is full")
+                self._waiting.setdefault(owner, deque()).append(ticket)
+                self._queued += 1
+                deadline = time.monotonic() + self.queue_timeout if interactive else None
+                
+                while ticket not in self._granted:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self._withdraw(owner, ticket)
+                        raise self._rejection("Timed out waiting for a scoring slot")
+                    self._condition.wait(remaining)
+                self._granted.discard(ticket)
+        
+        start = time.monotonic()
         try:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO user_evaluations (
-                    user_id, language_id, uploaded_filename, file_path,
-                    muc_recall, muc_precision, muc_f1,
-                    bcub_recall, bcub_precision, bcub_f1,
-                    ceafm_recall, ceafm_precision, ceafm_f1,
-                    ceafe_recall, ceafe_precision, ceafe_f1,
-                    blanc_recall, blanc_precision, blanc_f1
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                user_id, language_id, filename, file_path,
-                scores.get('muc', {}).get('recall'), scores.get('muc', {}).get('precision'), scores.get('muc', {}).get('f1'),
-                scores.get('bcub', {}).get('recall'), scores.get('bcub', {}).get('precision'), scores.get('bcub', {}).get('f1'),
-                scores.get('ceafm', {}).get('recall'), scores.get('ceafm', {}).get('precision'), scores.get('ceafm', {}).get('f1'),
-                scores.get('ceafe', {}).get('recall'), scores.get('ceafe', {}).get('precision'), scores.get('ceafe', {}).get('f1'),
-                scores.get('blanc', {}).get('recall'), scores.get('blanc', {}).get('precision'), scores.get('blanc', {}).get('f1')
-            ))
+            yield
+        finally:
+            with self._condition:
+                self._active -= 1
+                self._average_seconds = 0.8 * self._average_seconds + 0.2 * (time.monotonic() - start)
+                self._grant_next()
+
+scoring_governor = ScoringGovernor(SCORING_MAX_CONCURRENT, SCORING_MAX_QUEUE, SCORING_QUEUE_TIMEOUT)
+
+GaugeCallback("coref_scoring_active", "Scorer slots in use", lambda: scoring_governor.status()['active'])
+GaugeCallback("coref_scoring_queued", "Scoring requests waiting for a slot", lambda: scoring_governor.status()['queued'])
+
+class BackgroundJobPool:
+    """Thread pool for background jobs that refuses work beyond max_workers running and max_queue waiting"""
+    
+    def __init__(self, max_workers: int, max_queue: int, name: str):
+        self.capacity = max(1, max_workers) + max(0, max_queue)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(self.capacity)
+    
+    def submit(self, func, *args) -> bool:
+        """Start func(*args) when a worker is free; False if the pool is saturated"""
+        if not self._slots.acquire(blocking=False):
+            return False
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return True
+
+evaluation_job_pool = BackgroundJobPool(EVALUATION_JOB_WORKERS, EVALUATION_JOB_QUEUE, "evaluation-job")
+rescore_job_pool = BackgroundJobPool(RESCORE_MAX_JOBS, 0, "rescore-job")
+
+def governed_score_submission(owner, gold_file_path: str, system_file_path: str, check_environment: bool = True, interactive: bool = True):
+    """score_submission inside a governor slot owned by a user (or a background job)"""
+    with scoring_governor.slot(owner, interactive=interactive):
+        return score_submission(gold_file_path, system_file_path, check_environment)
+
+def governed_preview_submission(owner, gold_file_path: str, system_file_path: str, metrics: list, sample_size: int):
+    """preview_submission inside an interactive governor slot"""
+    with scoring_governor.slot(owner):
+        return preview_submission(gold_file_path, system_file_path, metrics, sample_size)
+
+def generate_demo_scores() -> dict:
+    """Generate realistic demo scores"""
+    import random
+    
+    logger.warning("GENERATING DEMO SCORES (Perl script not executed)")
+    
+    scores = {}
+    metrics = ['muc', 'bcub', 'ceafm', 'ceafe', 'blanc']
+    
+    for metric in metrics:
+        # Generate realistic scores between 0.7-0.9
+        recall = round(random.uniform(0.70, 0.90), 4)
+        precision = round(random.uniform(0.70, 0.90), 4)
+        f1 = round(2 * recall * precision / (recall + precision), 4)
+        
+        scores[metric] = {
+            'recall': recall,
+            'precision': precision,
+            'f1': f1
+        }
+    
+    return scores
+
+EVALUATION_INSERT_SQL = """
+    INSERT INTO user_evaluations (
+        user_id, language_id, uploaded_filename, file_path, gold_dataset_id,
+        muc_recall, muc_precision, muc_f1,
+        bcub_recall, bcub_precision, bcub_f1,
+        ceafm_recall, ceafm_precision, ceafm_f1,
+        ceafe_recall, ceafe_precision, ceafe_f1,
+        blanc_recall, blanc_precision, blanc_f1
+    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+def evaluation_insert_params(user_id: int, language_id: int, filename: str, file_path: str, scores: dict, gold_dataset_id: int = None) -> tuple:
+    """Build the parameter tuple for EVALUATION_INSERT_SQL"""
+    return (user_id, language_id, filename, file_path, gold_dataset_id) + evaluation_score_params(scores)
+
+def evaluation_score_params(scores: dict) -> tuple:
+    """Recall, precision and F1 of every metric in user_evaluations column order"""
+    return (
+        scores.get('muc', {}).get('recall'), scores.get('muc', {}).get('precision'), scores.get('muc', {}).get('f1'),
+        scores.get('bcub', {}).get('recall'), scores.get('bcub', {}).get('precision'), scores.get('bcub', {}).get('f1'),
+        scores.get('ceafm', {}).get('recall'), scores.get('ceafm', {}).get('precision'), scores.get('ceafm', {}).get('f1'),
+        scores.get('ceafe', {}).get('recall'), scores.get('ceafe', {}).get('precision'), scores.get('ceafe', {}).get('f1'),
+        scores.get('blanc', {}).get('recall'), scores.get('blanc', {}).get('precision'), scores.get('blanc', {}).get('f1')
+    )
+
+DOCUMENT_SCORES_UPSERT_SQL = "REPLACE INTO evaluation_document_scores (evaluation_id, counts) VALUES (%s, %s)"
+
+def save_evaluation_results(user_id: int, language_id: int, filename: str, file_path: str, scores: dict, gold_dataset_id: int = None, document_counts: dict = None):
+    """Save evaluation results to database or demo storage"""
+    save_evaluation_results_batch(user_id, language_id, [(filename, file_path, scores, document_counts)], gold_dataset_id)
+
+def save_evaluation_results_batch(user_id: int, language_id: int, results: list, gold_dataset_id: int = None):
+    """Save (filename, file_path, scores, document_counts) results in a single transaction, or to the spill file"""
+    if not results:
+        return
+    evaluation_writer.save(user_id, language_id, results, gold_dataset_id)
+
+def is_rejected_write(error: Exception) -> bool:
+    """Whether the database refused the data itself, so writing it again cannot succeed"""
+    return isinstance(error, (mysql.connector.IntegrityError, mysql.connector.DataError, sqlite3.IntegrityError, sqlite3.DataError))
+
+class EvaluationWriter:
+    """Group commit for evaluation saves
+
+    Saves are queued for one background thread, which gathers what arrives within
+    flush_seconds (up to max_rows rows) and writes it over a single connection in a
+    single transaction, so a burst of submissions costs one commit instead of one
+    connection and one commit per evaluation. A save returns once its rows are
+    committed or, when that fails, written to the spill file.
+
+    The rows of one save always share a transaction. When a batch fails, its saves
+    are retried one by one so a bad row cannot take the others down. Saves the
+    database still does not take are appended to the spill file (and shown from
+    demo storage meanwhile), and replayed every retry_seconds until the database
+    accepts them; replayed saves it rejects as invalid move to <spill>.rejected.
+    Their demo storage copies are dropped once the replay has settled them.
+
+    A save the writer has not finished within save_timeout is spilled by the
+    waiting request, so a dead writer thread or a hung database cannot block
+    requests. A crash between a replay commit and rewriting the spill file, or a
+    timed-out save the writer commits after all, stores that save twice: delivery
+    is at least once.
+    """
+    
+    def __init__(self, flush_seconds: float, max_rows: int, spill_path: str, retry_seconds: float, save_timeout: float):
+        self.flush_seconds = flush_seconds
+        self.max_rows = max(1, max_rows)
+        self.spill_path = Path(spill_path) if spill_path else None
+        self.retry_seconds = retry_seconds
+        self.save_timeout = save_timeout
+        self._condition = threading.Condition()
+        self._pending = []  # (record, done event) in arrival order
+        self._abandoned = set()  # done events of saves being written that timed out and were spilled
+        self._pending_rows = 0
+        self._thread = None
+        self._conn = None
+        self._next_replay = 0.0
+    
+    def start(self):
+        with self._condition:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="evaluation-writer", daemon=True)
+                self._thread.start()
+    
+    def save(self, user_id: int, language_id: int, results: list, gold_dataset_id: int = None):
+        """Queue one save and wait until it is committed or spilled"""
+        record = {
+            'user_id': user_id,
+            'language_id': language_id,
+            'gold_dataset_id': gold_dataset_id,
+            'results': [tuple(result) for result in results]
+        }
+        done = threading.Event()
+        self.start()
+        entry = (record, done)
+        with self._condition:
+            self._pending.append(entry)
+            self._pending_rows += len(results)
+            self._condition.notify_all()
+        if done.wait(self.save_timeout):
+            return
+        
+        with self._condition:
+            if done.is_set():
+                return
+            if entry in self._pending:
+                self._pending.remove(entry)
+                self._pending_rows -= len(results)
+            else:
+                self._abandoned.add(done)
+        logger.error(f"Evaluation save of user {user_id} not done after {self.save_timeout}s, spilling it")
+        self._fall_back([record])
+    
+    def _take_batch(self) -> list:
+        batch, rows = [], 0
+        while self._pending and (not batch or rows + len(self._pending[0][0]['results']) <= self.max_rows):
+            entry = self._pending.pop(0)
+            batch.append(entry)
+            rows += len(entry[0]['results'])
+        self._pending_rows -= rows
+        return batch
+    
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._pending:
+                    self._condition.wait(timeout=self.retry_seconds)
+                # Linger briefly so saves arriving together share one commit
+                deadline = time.monotonic() + self.flush_seconds
+                while self._pending and self._pending_rows < self.max_rows:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch = self._take_batch()
+            try:
+                if batch:
+                    self._write(batch)
+                if self.spill_path and time.monotonic() >= self._next_replay:
+                    self._next_replay = time.monotonic() + self.retry_seconds
+                    self.replay_spill()
+            except Exception as e:
+                logger.exception(f"Evaluation writer error: {e}")
+    
+    def _connection(self):
+        if self._conn is None:
+            self._conn = get_db_connection()
+        return self._conn
+    
+    def _drop_connection(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+    
+    def _insert(self, conn, records: list):
+        """Insert the records in one transaction"""
+        cursor = conn.cursor()
+        try:
+            for record in records:
+                for filename, file_path, scores, document_counts in record['results']:
+                    cursor.execute(EVALUATION_INSERT_SQL, evaluation_insert_params(
+                        record['user_id'], record['language_id'], filename, file_path, scores, record['gold_dataset_id']
+                    ))
+                    if document_counts:
+                        cursor.execute(DOCUMENT_SCORES_UPSERT_SQL, (cursor.lastrowid, encode_document_scores(document_counts)))
             conn.commit()
-            conn.close()
-            print("SUCCESS: Evaluation results saved to database")
-        except Exception as e:
-            print(f"ERROR saving to database: {e}")
-            if conn:
-                conn.close()
-            # Fallback to demo storage
-            save_to_demo_evaluations(user_id, language_id, filename, file_path, scores)
-    else:
-        # Save to demo storage
-        save_to_demo_evaluations(user_id, language_id, filename, file_path, scores)
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            raise
+        evaluation_commits.inc()
+    
+    def _write(self, batch: list):
+        records = [record for record, _ in batch]
+        saved, failed = [], []
+        try:
+            with stage_duration.time(stage='db_write'):
+                conn = self._connection()
+                if conn is None:
+                    failed = records
+                else:
+                    try:
+                        self._insert(conn, records)
+                        saved = records
+                    except Exception as e:
+                        self._drop_connection()
+                        logger.warning(f"Saving {len(records)} evaluation save(s) together failed, retrying one by one: {e}")
+                        for index, record in enumerate(records):
+                            conn = self._connection()
+                            if conn is None:
+                                failed.extend(records[index:])
+                                break
+                            try:
+                                self._insert(conn, [record])
+                                saved.append(record)
+                            except Exception as e:
+                                self._drop_connection()
+                                logger.error(f"Error saving evaluation of user {record['user_id']} to database: {e}")
+                                failed.append(record)
+            with self._condition:
+                abandoned = {id(record) for record, done in batch if done in self._abandoned}
+            stored_twice = [record for record in saved if id(record) in abandoned]
+            if stored_twice:
+                logger.warning(f"{len(stored_twice)} timed-out evaluation save(s) were also spilled and will be stored twice")
+            if saved:
+                self._saved(saved)
+                logger.info(f"{sum(len(record['results']) for record in saved)} evaluation result(s) saved to database")
+            failed = [record for record in failed if id(record) not in abandoned]
+            if failed:
+                self._fall_back(failed)
+        finally:
+            with self._condition:
+                for _, done in batch:
+                    self._abandoned.discard(done)
+                    done.set()
+    
+    def _saved(self, records: list):
+        evaluation_writes.inc(sum(len(record['results']) for record in records), target='database')
+        for user_id in {record['user_id'] for record in records}:
+            note_user_write(user_id)
+        leaderboard_feed.notify()
+    
+    def _fall_back(self, records: list):
+        """Keep saves the database did not take in the spill file, and show them from demo storage until replayed"""
+        target = 'demo'
+        if self.spill_path:
+            spilled = [{**record, 'spill_id': secrets.token_hex(8)} for record in records]
+            try:
+                self._append(self.spill_path, [self._encode(record) for record in spilled])
+                target = 'spill'
+                records = spilled
+                logger.warning(f"{len(records)} evaluation save(s) written to {self.spill_path} for replay")
+            except Exception as e:
+                logger.exception(f"Could not write evaluation spill file {self.spill_path}: {e}")
+        for record in records:
+            for filename, file_path, scores, document_counts in record['results']:
+                evaluation = save_to_demo_evaluations(record['user_id'], record['language_id'], filename, file_path, scores, record['gold_dataset_id'], document_counts)
+                evaluation['spill_id'] = record.get('spill_id')
+        evaluation_writes.inc(sum(len(record['results']) for record in records), target=target)
+        leaderboard_feed.notify()
+    
+    @staticmethod
+    def _encode(record: dict) -> str:
+        results = [
+            [filename, file_path, scores, base64.b64encode(encode_document_scores(document_counts)).decode() if document_counts else None]
+            for filename, file_path, scores, document_counts in record['results']
+        ]
+        return json.dumps({**record, 'results': results}, separators=(',', ':'))
+    
+    @staticmethod
+    def _decode(line: str) -> dict:
+        record = json.loads(line)
+        record['results'] = [
+            (filename, file_path, scores, decode_document_scores(base64.b64decode(counts)) if counts else None)
+            for filename, file_path, scores, counts in record['results']
+        ]
+        return record
+    
+    @staticmethod
+    def _append(path: Path, lines: list):
+        """Append lines durably; the lock keeps other worker processes from interleaving"""
+        with open(path, 'a', encoding='utf-8') as spill:
+            if fcntl:
+                fcntl.flock(spill, fcntl.LOCK_EX)
+            spill.writelines(line + '\n' for line in lines)
+            spill.flush()
+            os.fsync(spill.fileno())
+    
+    def spilled_count(self) -> int:
+        """Saves waiting in the spill file"""
+        if not self.spill_path:
+            return 0
+        try:
+            with open(self.spill_path, encoding='utf-8') as spill:
+                return sum(1 for line in spill if line.strip())
+        except OSError:
+            return 0
+    
+    @staticmethod
+    def _drop_demo_copies(records: list):
+        """Remove the demo storage copies of spilled saves the replay has settled"""
+        spill_ids = {record['spill_id'] for record in records if record.get('spill_id')}
+        if not spill_ids:
+            return
+        # Delete by index from the end, so rows appended meanwhile are not touched
+        for index in reversed(range(len(DEMO_EVALUATIONS))):
+            if DEMO_EVALUATIONS[index].get('spill_id') in spill_ids:
+                del DEMO_EVALUATIONS[index]
+    
+    def spilled_file_paths(self) -> set:
+        """Submission paths of the saves waiting in the spill file or set aside as rejected"""
+        paths = set()
+        if not self.spill_path:
+            return paths
+        for path in (self.spill_path, self.spill_path.with_name(self.spill_path.name + '.rejected')):
+            try:
+                with open(path, encoding='utf-8') as spill:
+                    for line in spill:
+                        try:
+                            paths.update(result[1] for result in json.loads(line)['results'])
+                        except (ValueError, KeyError, TypeError, IndexError):
+                            continue
+            except FileNotFoundError:
+                continue
+        return paths
+    
+    def replay_spill(self):
+        """Write spilled saves to the database, oldest first, stopping at the first that fails for a reason other than its data
+
+        The spill file is locked only while it is read and rewritten, not during the
+        inserts, so a hanging database cannot block requests spilling their saves.
+        A separate <spill>.replay lock keeps two processes from replaying at once.
+        """
+        try:
+            if self.spill_path.stat().st_size == 0:
+                return
+        except OSError:
+            return
+        
+        with open(self.spill_path.with_name(self.spill_path.name + '.replay'), 'a') as replay_lock:
+            if fcntl:
+                try:
+                    fcntl.flock(replay_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return
+            
+            with open(self.spill_path, encoding='utf-8') as spill:
+                if fcntl:
+                    fcntl.flock(spill, fcntl.LOCK_EX)
+                lines = [line for line in spill.read().splitlines() if line.strip()]
+            
+            saved, rejected, rejected_records, remaining = [], [], [], []
+            for index, line in enumerate(lines):
+                try:
+                    record = self._decode(line)
+                except (ValueError, KeyError, TypeError, zlib.error) as e:
+                    logger.error(f"Unreadable line in evaluation spill file: {e}")
+                    rejected.append(line)
+                    continue
+                conn = self._connection()
+                if conn is None:
+                    remaining = lines[index:]
+                    break
+                try:
+                    self._insert(conn, [record])
+                    saved.append(record)
+                except Exception as e:
+                    self._drop_connection()
+                    if not is_rejected_write(e):
+                        logger.warning(f"Evaluation spill replay stopped: {e}")
+                        remaining = lines[index:]
+                        break
+                    logger.error(f"Database rejected spilled evaluation of user {record['user_id']}: {e}")
+                    rejected.append(line)
+                    rejected_records.append(record)
+            
+            if rejected:
+                self._append(self.spill_path.with_name(self.spill_path.name + '.rejected'), rejected)
+            self._drop_demo_copies(saved + rejected_records)
+            if saved or rejected:
+                with open(self.spill_path, 'r+', encoding='utf-8') as spill:
+                    if fcntl:
+                        fcntl.flock(spill, fcntl.LOCK_EX)
+                    # Keep the saves appended while the replay ran
+                    appended = [line for line in spill.read().splitlines() if line.strip()][len(lines):]
+                    spill.seek(0)
+                    spill.truncate()
+                    spill.writelines(line + '\n' for line in remaining + appended)
+                    spill.flush()
+                    os.fsync(spill.fileno())
+        
+        if saved:
+            self._saved(saved)
+            logger.info(f"Replayed {len(saved)} spilled evaluation save(s), {self.spilled_count()} still waiting")
 
-def save_to_demo_evaluations(user_id: int, language_id: int, filename: str, file_path: str, scores: dict):
+evaluation_writer = EvaluationWriter(
+    EVALUATION_FLUSH_SECONDS, EVALUATION_FLUSH_MAX_ROWS, EVALUATION_SPILL_PATH, EVALUATION_SPILL_RETRY_SECONDS, EVALUATION_SAVE_TIMEOUT
+)
+GaugeCallback("coref_evaluation_spilled", "Evaluation saves waiting in the spill file", evaluation_writer.spilled_count)
+
+@app.on_event("startup")
+def start_evaluation_writer():
+    """Start the writer so saves spilled before a restart are replayed without waiting for a new save"""
+    evaluation_writer.start()
+
+def save_to_demo_evaluations(user_id: int, language_id: int, filename: str, file_path: str, scores: dict, gold_dataset_id: int = None, document_counts: dict = None):
     """Save evaluation to demo storage"""
     language_name = next((lang['language_name'] for lang in DEMO_LANGUAGES if lang['id'] == language_id), 'Unknown')
     
     evaluation = {
-        'id': len(DEMO_EVALUATIONS) + 1,
+        'id': max((evaluation['id'] for evaluation in DEMO_EVALUATIONS), default=0) + 1,
         'user_id': user_id,
         'language_id': language_id,
         'language_name': language_name,
         'uploaded_filename': filename,
         'file_path': file_path,
+        'gold_dataset_id': gold_dataset_id,
         'formatted_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
         'muc_f1': scores.get('muc', {}).get('f1'),
         'bcub_f1': scores.get('bcub', {}).get('f1'),
         'ceafm_f1': scores.get('ceafm', {}).get('f1'),
         'ceafe_f1': scores.get('ceafe', {}).get('f1'),
         'blanc_f1': scores.get('blanc', {}).get('f1'),
+        'document_scores': document_counts,
         'created_at': datetime.now()
     }
     
     DEMO_EVALUATIONS.append(evaluation)
-    print(f"SUCCESS: Evaluation results saved to demo storage (ID: {evaluation['id']})")
+    logger.info(f"Evaluation results saved to demo storage (ID: {evaluation['id']})")
+    return evaluation
 
-def get_user_evaluation_history(user_id: int):
-    """Get evaluation history for a user"""
-    conn = get_db_connection()
+# Columns of evaluation history pages and exports, by output name
+EVALUATION_COLUMNS = {
+    'id': 'ue.id',
+    'created_at': 'ue.created_at',
+    'user_id': 'ue.user_id',
+    'username': 'u.username',
+    'language_id': 'ue.language_id',
+    'language_code': 'l.language_code',
+    'language_name': 'l.language_name',
+    'uploaded_filename': 'ue.uploaded_filename',
+    'gold_dataset_id': 'ue.gold_dataset_id',
+    **{
+        f"{metric}_{measure}": f"ue.{metric}_{measure}"
+        for metric in ['muc', 'bcub', 'ceafm', 'ceafe', 'blanc']
+        for measure in ['recall', 'precision', 'f1']
+    }
+}
+HISTORY_DEFAULT_FIELDS = ['id', 'created_at', 'uploaded_filename', 'language_id', 'language_name', 'muc_f1', 'bcub_f1', 'ceafm_f1', 'blanc_f1']
+HISTORY_PAGE_SIZE = 20
+HISTORY_MAX_PAGE_SIZE = 200
+EXPORT_FETCH_ROWS = 1000
+
+def parse_evaluation_fields(fields: str, default: list) -> list:
+    """Validate a comma separated column projection"""
+    if not fields:
+        return list(default)
+    selected = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in selected if field not in EVALUATION_COLUMNS]
+    if unknown or not selected:
+        raise HTTPException(status_code=400, detail=f"Unknown fields {', '.join(unknown)}. Choose from: {', '.join(EVALUATION_COLUMNS)}")
+    return list(dict.fromkeys(selected))
+
+def encode_history_cursor(created_at, evaluation_id: int) -> str:
+    value = created_at.isoformat(sep=' ') if isinstance(created_at, datetime) else str(created_at)
+    return base64.urlsafe_b64encode(json.dumps([value, evaluation_id]).encode()).decode().rstrip('=')
+
+def decode_history_cursor(cursor: str) -> tuple:
+    try:
+        created_at, evaluation_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return datetime.fromisoformat(created_at), int(evaluation_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def to_float(value):
+    return None if value is None else float(value)
+
+def to_timestamp(value):
+    return value.strftime('%Y-%m-%d %H:%M:%S') if isinstance(value, datetime) else value
+
+def evaluation_converter(column: str):
+    """Converter from the database value of an evaluation column to its JSON/CSV form, None if it needs none"""
+    if column.endswith(('_recall', '_precision', '_f1')):
+        return to_float
+    if column == 'created_at':
+        return to_timestamp
+    return None
+
+def convert_columns(rows: list, converters: list) -> list:
+    """Convert tuple rows a column at a time, with one converter (or None to keep the values) per column
+
+    Scores come back from MySQL as Decimal and timestamps as datetime; converting whole
+    columns with map() avoids building and rewriting a dict per row.
+    """
+    if not rows:
+        return []
+    columns = zip(*rows)
+    return list(zip(*[
+        list(map(convert, column)) if convert else column
+        for convert, column in zip(converters, columns)
+    ]))
+
+def evaluation_query(columns: list, user_id: int = None, language_id: int = None, before: tuple = None, ascending: bool = False, limit: int = None):
+    """SQL and parameters selecting the given columns of evaluations in (created_at, id) order, optionally after a keyset cursor"""
+    select = ", ".join(f"{EVALUATION_COLUMNS[column]} AS {column}" for column in columns)
+    joins = "JOIN languages l ON ue.language_id = l.id"
+    if 'username' in columns:
+        joins += " JOIN users u ON ue.user_id = u.id"
+    
+    conditions = []
+    params = []
+    if user_id is not None:
+        conditions.append("ue.user_id = %s")
+        params.append(user_id)
+    if language_id is not None:
+        conditions.append("ue.language_id = %s")
+        params.append(language_id)
+    if before is not None:
+        # Row-value comparison written out, so both MySQL and SQLite use the (created_at, id) index
+        conditions.append("(ue.created_at < %s OR (ue.created_at = %s AND ue.id < %s))")
+        params.extend([before[0], before[0], before[1]])
+    
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    order = "ASC" if ascending else "DESC"
+    sql = f"SELECT {select} FROM user_evaluations ue {joins} {where} ORDER BY ue.created_at {order}, ue.id {order}"
+    if limit is not None:
+        sql += " LIMIT %s"
+        params.append(limit)
+    return sql, params
+
+def demo_evaluation_rows(user_id: int = None, language_id: int = None) -> list:
+    """Demo evaluations with every EVALUATION_COLUMNS key, newest first"""
+    usernames = {user['id']: user['username'] for user in DEMO_USERS.values()}
+    language_codes = {lang['id']: lang['language_code'] for lang in DEMO_LANGUAGES}
+    rows = []
+    for evaluation in DEMO_EVALUATIONS:
+        if user_id is not None and evaluation['user_id'] != user_id:
+            continue
+        if language_id is not None and evaluation['language_id'] != language_id:
+            continue
+        row = {column: evaluation.get(column) for column in EVALUATION_COLUMNS}
+        row['username'] = usernames.get(evaluation['user_id'])
+        row['language_code'] = language_codes.get(evaluation['language_id'])
+        rows.append(row)
+    rows.sort(key=lambda row: (row['created_at'], row['id']), reverse=True)
+    return rows
+
+def get_evaluation_history_page(user_id: int = None, language_id: int = None, cursor: str = None, limit: int = HISTORY_PAGE_SIZE, fields: list = None):
+    """One page of evaluations, newest first, and the cursor of the next page (None on the last page)"""
+    fields = fields or HISTORY_DEFAULT_FIELDS
+    # The requested fields come first, followed by the cursor columns if they were not requested
+    columns = list(dict.fromkeys(fields + ['created_at', 'id']))
+    before = decode_history_cursor(cursor) if cursor else None
+    rows = None
     
+    conn = get_read_connection(user_id)
     if conn:
         try:
-            cursor = conn.cursor(dictionary=True)
-            # Fixed SQL query - removed DATE_FORMAT which might cause parameter issues
-            cursor.execute("""
-                SELECT ue.*, l.language_name, ue.created_at as formatted_date
-                FROM user_evaluations ue
-                JOIN languages l ON ue.language_id = l.id
-                WHERE ue.user_id = %s
-                ORDER BY ue.created_at DESC
-                LIMIT 20
-            """, (user_id,))
-            history = cursor.fetchall()
-            
-            # Format dates in Python instead of SQL
-            for record in history:
-                if record['formatted_date']:
-                    record['formatted_date'] = record['formatted_date'].strftime('%Y-%m-%d %H:%M:%S')
-            
+            db_cursor = conn.cursor()
+            sql, params = evaluation_query(columns, user_id, language_id, before, limit=limit + 1)
+            db_cursor.execute(sql, params)
+            rows = db_cursor.fetchall()
             conn.close()
-            print(f"SUCCESS: Retrieved {len(history)} evaluation records from database")
-            return history
+            logger.debug(f"Retrieved {len(rows)} evaluation records from database")
         except Exception as e:
-            print(f"ERROR retrieving history from database: {e}")
+            logger.error(f"Error retrieving history from database: {e}")
             if conn:
                 conn.close()
     
-    # Fallback to demo data
-    history = [eval for eval in DEMO_EVALUATIONS if eval['user_id'] == user_id]
-    history.sort(key=lambda x: x['created_at'], reverse=True)
-    print(f"SUCCESS: Retrieved {len(history)} evaluation records from demo storage")
-    return history[:20]
-def get_homepage_statistics():
+    if rows is None:
+        # Fallback to demo data
+        demo_rows = demo_evaluation_rows(user_id, language_id)
+        if before:
+            demo_rows = [row for row in demo_rows if (row['created_at'], row['id']) < before]
+        rows = [tuple(row[column] for column in columns) for row in demo_rows[:limit + 1]]
+    
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_history_cursor(last[columns.index('created_at')], last[columns.index('id')])
+    converted = convert_columns(rows[:limit], [evaluation_converter(field) for field in fields])
+    page = [dict(zip(fields, row)) for row in converted]
+    return page, next_cursor
+
+def open_evaluation_export(fields: list, user_id: int = None, language_id: int = None):
+    """Start an export query, returning an iterator over batches of its field tuples in (created_at, id) order
+
+    Rows are pulled from an unbuffered cursor EXPORT_FETCH_ROWS at a time, so the
+    whole table never sits in memory. The query runs before anything is streamed,
+    so database errors can still be reported with a proper status.
+    """
+    conn = get_read_connection(user_id)
+    if not conn:
+        demo_rows = reversed(demo_evaluation_rows(user_id, language_id))
+        return iter([[tuple(row[field] for field in fields) for row in demo_rows]])
+    
+    try:
+        cursor = conn.cursor()
+        sql, params = evaluation_query(fields, user_id, language_id, ascending=True)
+        cursor.execute(sql, params)
+    except Exception as e:
+        logger.error(f"Error starting evaluation export: {e}")
+        conn.close()
+        raise HTTPException(status_code=500, detail="Could not read evaluations from the database")
+    
+    def rows():
+        try:
+            while True:
+                batch = cursor.fetchmany(EXPORT_FETCH_ROWS)
+                if not batch:
+                    break
+                yield batch
+        finally:
+            conn.close()
+    
+    return rows()
+
+def format_evaluation_export(batches, fields: list, export_format: str):
+    """Encode batches of export rows as CSV (with a header line) or JSON lines, a chunk per batch"""
+    converters = [evaluation_converter(field) for field in fields]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if export_format == 'csv' else None
+    if writer:
+        writer.writerow(fields)
+    
+    for batch in batches:
+        rows = convert_columns(batch, converters)
+        if writer:
+            writer.writerows(rows)
+        else:
+            buffer.writelines(json.dumps(dict(zip(fields, row))) + "\n" for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    
+    if buffer.tell():
+        # Header of an empty export
+        yield buffer.getvalue()
+
+def get_homepage_statistics(viewer_id: int = None):
     """Get statistics for the homepage hero section"""
     stats = {
         'total_languages': 0,
@@ -491,15 +2215,12 @@ def get_homepage_statistics():
         'total_evaluations': 0
     }
     
-    conn = get_db_connection()
+    conn = get_read_connection(viewer_id)
     if conn:
         try:
             cursor = conn.cursor(dictionary=True)
             
-            # Get total languages
-            cursor.execute("SELECT COUNT(*) as count FROM languages")
-            result = cursor.fetchone()
-            stats['total_languages'] = result['count'] if result else 0
+            stats['total_languages'] = len(get_languages())
             
             # Get total unique participants (users who have made evaluations)
             cursor.execute("SELECT COUNT(DISTINCT user_id) as count FROM user_evaluations")
@@ -512,9 +2233,9 @@ def get_homepage_statistics():
             stats['total_evaluations'] = result['count'] if result else 0
             
             conn.close()
-            print(f"SUCCESS: Retrieved homepage statistics - Languages: {stats['total_languages']}, Participants: {stats['total_participants']}, Evaluations: {stats['total_evaluations']}")
+            logger.debug(f"Retrieved homepage statistics - Languages: {stats['total_languages']}, Participants: {stats['total_participants']}, Evaluations: {stats['total_evaluations']}")
         except Exception as e:
-            print(f"ERROR retrieving homepage statistics from database: {e}")
+            logger.error(f"Error retrieving homepage statistics from database: {e}")
             if conn:
                 conn.close()
             # Fallback to demo data
@@ -532,77 +2253,65 @@ def get_demo_statistics():
         'total_participants': len([user for user in DEMO_USERS.values() if user['username'] != 'admin']),
         'total_evaluations': len(DEMO_EVALUATIONS)
     }
-    print(f"SUCCESS: Using demo statistics - Languages: {stats['total_languages']}, Participants: {stats['total_participants']}, Evaluations: {stats['total_evaluations']}")
+    logger.debug(f"Using demo statistics - Languages: {stats['total_languages']}, Participants: {stats['total_participants']}, Evaluations: {stats['total_evaluations']}")
     return stats
 
-def get_language_leaderboards():
-    """Get top 3 scores for each language"""
+class LeaderboardRow(NamedTuple):
+    """One evaluation on a language leaderboard, sent to the homepage as a JSON array"""
+    id: int
+    language_id: int
+    username: str
+    muc_f1: Optional[float]
+    bcub_f1: Optional[float]
+    ceafm_f1: Optional[float]
+    blanc_f1: Optional[float]
+    created_at: str
+    avg_f1: float
+
+LEADERBOARD_SELECT = """
+    SELECT ue.id, ue.language_id, u.username, ue.muc_f1, ue.bcub_f1, ue.ceafm_f1, ue.blanc_f1, ue.created_at,
+           (COALESCE(ue.muc_f1, 0) + COALESCE(ue.bcub_f1, 0) +
+            COALESCE(ue.ceafm_f1, 0) + COALESCE(ue.blanc_f1, 0)) / 4 AS avg_f1
+    FROM user_evaluations ue
+    JOIN users u ON ue.user_id = u.id
+    WHERE u.is_active = 1
+"""
+
+def leaderboard_rows(rows: list) -> list:
+    """LeaderboardRows from LEADERBOARD_SELECT result tuples"""
+    converters = [to_float if field.endswith('_f1') else to_timestamp if field == 'created_at' else None for field in LeaderboardRow._fields]
+    return list(map(LeaderboardRow._make, convert_columns(rows, converters)))
+
+def get_language_leaderboards(viewer_id: int = None):
+    """Get every score of each language, best average F1 first"""
     leaderboards = []
     
-    conn = get_db_connection()
+    conn = get_read_connection(viewer_id)
     if conn:
         try:
-            cursor = conn.cursor(dictionary=True)
+            cursor = conn.cursor()
+            
+            # One query for all languages, grouped here
+            cursor.execute(LEADERBOARD_SELECT + " ORDER BY ue.language_id, avg_f1 DESC")
+            rows = leaderboard_rows(cursor.fetchall())
+            conn.close()
             
-            # Get all languages
-            cursor.execute("SELECT * FROM languages ORDER BY language_name")
-            languages = cursor.fetchall()
+            scores_by_language = {}
+            for row in rows:
+                scores_by_language.setdefault(row.language_id, []).append(row)
             
-            for language in languages:
-                language_data = {
+            for language in get_languages():
+                leaderboards.append({
                     'language_id': language['id'],
                     'language_name': language['language_name'],
                     'language_code': language['language_code'],
-                    'top_scores': []
-                }
-                
-                # Get ALL scores for this language (not just top 3)
-                cursor.execute("""
-                    SELECT ue.*, u.username,
-                           ((COALESCE(ue.muc_f1, 0) + COALESCE(ue.bcub_f1, 0) + 
-                             COALESCE(ue.ceafm_f1, 0) + COALESCE(ue.blanc_f1, 0)) / 4) as avg_f1
-                    FROM user_evaluations ue
-                    JOIN users u ON ue.user_id = u.id
-                    WHERE ue.language_id = %s
-                    AND u.is_active = 1
-                    ORDER BY avg_f1 DESC
-                """, (language['id'],))
-                
-                top_scores = cursor.fetchall()
-                
-                # Convert Decimal and datetime to JSON-serializable types
-                for score in top_scores:
-                    # Convert Decimal to float
-                    score['muc_f1'] = float(score['muc_f1']) if score['muc_f1'] is not None else None
-                    score['bcub_f1'] = float(score['bcub_f1']) if score['bcub_f1'] is not None else None
-                    score['ceafm_f1'] = float(score['ceafm_f1']) if score['ceafm_f1'] is not None else None
-                    score['ceafe_f1'] = float(score['ceafe_f1']) if score['ceafe_f1'] is not None else None
-                    score['blanc_f1'] = float(score['blanc_f1']) if score['blanc_f1'] is not None else None
-                    score['avg_f1'] = float(score['avg_f1']) if score['avg_f1'] is not None else None
-                    
-                    # Convert other Decimal fields if they exist
-                    for key in ['muc_recall', 'muc_precision', 'bcub_recall', 'bcub_precision',
-                               'ceafm_recall', 'ceafm_precision', 'ceafe_recall', 'ceafe_precision',
-                               'blanc_recall', 'blanc_precision']:
-                        if key in score and score[key] is not None:
-                            score[key] = float(score[key])
-                    
-                    # Convert datetime to string
-                    if 'created_at' in score and score['created_at'] is not None:
-                        score['created_at'] = score['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-                    if 'updated_at' in score and score['updated_at'] is not None:
-                        score['updated_at'] = score['updated_at'].strftime('%Y-%m-%d %H:%M:%S')
-                
-                language_data['top_scores'] = top_scores
-                leaderboards.append(language_data)
+                    'top_scores': scores_by_language.get(language['id'], [])
+                })
             
-            conn.close()
-            print(f"SUCCESS: Retrieved leaderboards for {len(languages)} languages from database")
+            logger.debug(f"Retrieved leaderboards for {len(leaderboards)} languages ({len(rows)} scores) from database")
             
         except Exception as e:
-            print(f"ERROR retrieving leaderboards from database: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception(f"Error retrieving leaderboards from database: {e}")
             if conn:
                 conn.close()
             # Fallback to demo data
@@ -613,56 +2322,144 @@ def get_language_leaderboards():
     
     return leaderboards
 
+def demo_leaderboard_rows(after_id: int = 0) -> list:
+    """LeaderboardRows of the demo evaluations, averaging only the metrics that were scored"""
+    usernames = {user['id']: user['username'] for user in DEMO_USERS.values()}
+    rows = []
+    for evaluation in DEMO_EVALUATIONS:
+        if evaluation['id'] <= after_id:
+            continue
+        f1_scores = [evaluation.get(f'{metric}_f1') for metric in ('muc', 'bcub', 'ceafm', 'blanc')]
+        present = [float(score) for score in f1_scores if score]
+        rows.append((evaluation['id'], evaluation['language_id'], usernames.get(evaluation['user_id']),
+                     *f1_scores, evaluation.get('created_at'), sum(present) / len(present) if present else 0))
+    return leaderboard_rows(rows)
+
 def get_demo_leaderboards():
     """Get leaderboards from demo data"""
-    leaderboards = []
+    scores_by_language = {}
+    for row in sorted(demo_leaderboard_rows(), key=lambda row: row.avg_f1, reverse=True):
+        scores_by_language.setdefault(row.language_id, []).append(row)
     
-    for language in DEMO_LANGUAGES:
-        language_data = {
+    leaderboards = [
+        {
             'language_id': language['id'],
             'language_name': language['language_name'],
             'language_code': language['language_code'],
-            'top_scores': []
+            'top_scores': scores_by_language.get(language['id'], [])
         }
-        
-        # Get evaluations for this language from demo data
-        language_evaluations = []
-        for eval in DEMO_EVALUATIONS:
-            if eval['language_id'] == language['id']:
-                # Create a copy and convert datetime
-                eval_copy = eval.copy()
-                if 'created_at' in eval_copy and eval_copy['created_at'] is not None:
-                    if hasattr(eval_copy['created_at'], 'strftime'):
-                        eval_copy['created_at'] = eval_copy['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-                language_evaluations.append(eval_copy)
-        
-        # Sort by average F1 score (calculate from available metrics)
-        for eval in language_evaluations:
-            scores = []
-            if eval.get('muc_f1'): scores.append(float(eval['muc_f1']))
-            if eval.get('bcub_f1'): scores.append(float(eval['bcub_f1']))
-            if eval.get('ceafm_f1'): scores.append(float(eval['ceafm_f1']))
-            if eval.get('blanc_f1'): scores.append(float(eval['blanc_f1']))
-            
-            eval['avg_f1'] = sum(scores) / len(scores) if scores else 0
-            
-            # Ensure all values are float, not Decimal
-            for key in eval:
-                if key != 'created_at' and isinstance(eval[key], (int, float)):
-                    eval[key] = float(eval[key])
-        
-        # Sort by average F1 and get ALL scores
-        language_evaluations.sort(key=lambda x: x.get('avg_f1', 0), reverse=True)
-        language_data['top_scores'] = language_evaluations
-        
-        leaderboards.append(language_data)
+        for language in DEMO_LANGUAGES
+    ]
     
-    print(f"SUCCESS: Retrieved demo leaderboards for {len(DEMO_LANGUAGES)} languages")
+    logger.debug(f"Retrieved demo leaderboards for {len(DEMO_LANGUAGES)} languages")
     return leaderboards
 
-def get_best_user_score_per_language():
+def get_leaderboard_entries_since(after_id: int) -> list:
+    """LeaderboardRows of evaluations with an id above after_id, oldest first"""
+    conn = get_read_connection()
+    if conn:
+        try:
+            cursor = conn.cursor()
+            cursor.execute(LEADERBOARD_SELECT + " AND ue.id > %s ORDER BY ue.id LIMIT %s", (after_id, LEADERBOARD_CATCHUP_ROWS))
+            rows = leaderboard_rows(cursor.fetchall())
+            conn.close()
+            return rows
+        except Exception as e:
+            logger.error(f"Error reading new leaderboard entries: {e}")
+            conn.close()
+            return []
+    
+    return demo_leaderboard_rows(after_id)[:LEADERBOARD_CATCHUP_ROWS]
+
+def latest_evaluation_id() -> int:
+    """Highest evaluation id, 0 when there are none"""
+    conn = get_read_connection()
+    if conn:
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT MAX(id) FROM user_evaluations")
+            row = cursor.fetchone()
+            conn.close()
+            return row[0] or 0
+        except Exception as e:
+            logger.error(f"Error reading latest evaluation id: {e}")
+            conn.close()
+            return 0
+    
+    return max((evaluation['id'] for evaluation in DEMO_EVALUATIONS), default=0)
+
+class LeaderboardFeed:
+    """Fans newly saved evaluations out to the live leaderboard streams of this process
+
+    Polling the database (rather than only hooking the save path) also picks up
+    evaluations saved by other processes. Ids can commit out of order, so every
+    poll looks back LEADERBOARD_LOOKBACK_IDS ids and skips those already sent.
+    """
+    
+    def __init__(self):
+        self.subscribers = set()
+        self.wakeup = threading.Event()
+        self.loop = None
+        self.task = None
+        self.floor_id = 0
+        self.last_id = 0
+        self.sent_ids = OrderedDict()
+    
+    def notify(self):
+        """Poll at once; safe to call from any thread"""
+        self.wakeup.set()
+    
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=100)
+        self.subscribers.add(queue)
+        self.loop = asyncio.get_running_loop()
+        if self.task is None or self.task.done():
+            self.task = self.loop.create_task(self.run())
+        return queue
+    
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+    
+    def broadcast(self, event: str, payload: dict):
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait((event, payload))
+            except asyncio.QueueFull:
+                # The stream is closed; its client reconnects and catches up from the last id it saw
+                self.subscribers.discard(queue)
+                queue.get_nowait()
+                queue.put_nowait((None, None))
+    
+    def reset_language(self, language_id: int):
+        """Tell listening homepages to reload a leaderboard whose scores changed in place"""
+        if self.loop and self.subscribers:
+            self.loop.call_soon_threadsafe(self.broadcast, 'reset', {'language_id': language_id})
+    
+    async def run(self):
+        # Anything older than the start is in the page or in the subscriber's catch-up
+        self.floor_id = self.last_id = await run_in_threadpool(latest_evaluation_id)
+        last_poll = time.monotonic()
+        while self.subscribers:
+            if self.wakeup.is_set() or time.monotonic() - last_poll >= LEADERBOARD_POLL_SECONDS:
+                self.wakeup.clear()
+                last_poll = time.monotonic()
+                entries = await run_in_threadpool(get_leaderboard_entries_since, max(self.last_id - LEADERBOARD_LOOKBACK_IDS, self.floor_id))
+                fresh = [entry for entry in entries if entry.id not in self.sent_ids]
+                for entry in fresh:
+                    self.sent_ids[entry.id] = True
+                while len(self.sent_ids) > LEADERBOARD_LOOKBACK_IDS * 10:
+                    self.sent_ids.popitem(last=False)
+                if entries:
+                    self.last_id = max(self.last_id, entries[-1].id)
+                if fresh:
+                    self.broadcast('scores', {'columns': LeaderboardRow._fields, 'entries': fresh})
+            await asyncio.sleep(0.25)
+
+leaderboard_feed = LeaderboardFeed()
+
+def get_best_user_score_per_language(viewer_id: int = None):
     """Get each user's best score per language for leaderboard ranking"""
-    conn = get_db_connection()
+    conn = get_read_connection(viewer_id)
     if conn:
         try:
             cursor = conn.cursor(dictionary=True)
@@ -696,7 +2493,7 @@ def get_best_user_score_per_language():
             return results
             
         except Exception as e:
-            print(f"ERROR retrieving best scores from database: {e}")
+            logger.error(f"Error retrieving best scores from database: {e}")
             if conn:
                 conn.close()
             return []
@@ -704,22 +2501,40 @@ def get_best_user_score_per_language():
         return []
 @app.get("/", response_class=HTMLResponse)
 async def homepage(request: Request):
-    """Homepage with dynamic leaderboards and statistics"""
+    """Homepage with dynamic leaderboards and statistics, or the snapshot of the frozen campaign"""
+    campaign = frozen_campaign()
+    if campaign:
+        snapshot = SNAPSHOT_DIR / campaign / 'index.html'
+        if snapshot.is_file():
+            return FileResponse(snapshot, media_type="text/html", headers={"Cache-Control": f"public, max-age={SNAPSHOT_MAX_AGE}"})
+        logger.warning(f"Snapshot of frozen campaign {campaign} is missing, serving the live homepage")
+    
+    # A signed-in participant should find their newest evaluation on the leaderboard
+    viewer = active_sessions.get(request.cookies.get('session_token'))
+    viewer_id = viewer['id'] if viewer else None
+    
     try:
-        # Get homepage statistics
-        stats = get_homepage_statistics()
+        with stage_duration.time(stage='db_read'):
+            # Get homepage statistics
+            stats = get_homepage_statistics(viewer_id)
+            
+            # Get language leaderboards
+            leaderboards = get_language_leaderboards(viewer_id)
         
-        # Get language leaderboards
-        leaderboards = get_language_leaderboards()
+        # Live updates continue from the newest evaluation on the page
+        last_id = max((score.id for board in leaderboards for score in board['top_scores']), default=0)
         
-        return templates.TemplateResponse("homepage.html", {
-            "request": request,
-            "stats": stats,
-            "leaderboards": leaderboards
-        })
+        with stage_duration.time(stage='render'):
+            return templates.TemplateResponse("homepage.html", {
+                "request": request,
+                "stats": stats,
+                "leaderboards": leaderboards,
+                "leaderboard_columns": LeaderboardRow._fields,
+                "leaderboard_last_id": last_id
+            })
         
     except Exception as e:
-        print(f"ERROR loading homepage: {e}")
+        logger.exception(f"Error loading homepage: {e}")
         # Fallback with minimal data
         return templates.TemplateResponse("homepage.html", {
             "request": request,
@@ -728,14 +2543,47 @@ async def homepage(request: Request):
                 'total_participants': len(DEMO_USERS),
                 'total_evaluations': len(DEMO_EVALUATIONS)
             },
-            "leaderboards": get_demo_leaderboards()
+            "leaderboards": get_demo_leaderboards(),
+            "leaderboard_columns": LeaderboardRow._fields
         })
     
-@app.get("/home", response_class=HTMLResponse) 
-async def home_redirect(request: Request):
-    """Redirect /home to login for backward compatibility"""
-    return RedirectResponse(url=request.url_for("homepage"), status_code=302)
-@app.get("/login", response_class=HTMLResponse)
+@app.get("/leaderboard/events", name="leaderboard_events")
+async def leaderboard_events(after: int = Query(0, ge=0)):
+    """Server-sent events with evaluations entering the leaderboards after evaluation `after`
+
+    A "scores" event carries new rows for the page to rank in place; "reset" asks it
+    to reload a language whose scores were recomputed.
+    """
+    if len(leaderboard_feed.subscribers) >= LEADERBOARD_MAX_SUBSCRIBERS:
+        raise HTTPException(status_code=503, detail="Too many live leaderboard viewers", headers={"Retry-After": "30"})
+    
+    queue = leaderboard_feed.subscribe()
+    
+    async def events():
+        try:
+            missed = await run_in_threadpool(get_leaderboard_entries_since, after)
+            if missed:
+                yield f"event: scores\ndata: {json.dumps({'columns': LeaderboardRow._fields, 'entries': missed})}\n\n"
+            while True:
+                try:
+                    event, payload = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:
+                    return
+                yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+        finally:
+            leaderboard_feed.unsubscribe(queue)
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/home", response_class=HTMLResponse) 
+async def home_redirect(request: Request):
+    """Redirect /home to login for backward compatibility"""
+    return RedirectResponse(url=request.url_for("homepage"), status_code=302)
+@app.get("/login", response_class=HTMLResponse)
 async def login_page(request: Request):
     """Display the login page"""
     return templates.TemplateResponse("login.html", {"request": request})
@@ -752,17 +2600,19 @@ async def login(request: Request, username: str = Form(...), password: str = For
     # Create session
     session_token = secrets.token_urlsafe(32)
     active_sessions[session_token] = user
+    session_expiry[session_token] = time.time() + SESSION_MAX_AGE
     
     # Redirect based on user type
     redirect_url = request.url_for("admin_dashboard") if user["username"] == "admin" else request.url_for("client_dashboard")
     response = RedirectResponse(url=redirect_url, status_code=302)
-    response.set_cookie(key="session_token", value=session_token, httponly=True, max_age=3600)
+    response.set_cookie(key="session_token", value=session_token, httponly=True, max_age=SESSION_MAX_AGE)
     
-    print(f"SUCCESS: User {username} logged in successfully")
+    logger.info(f"User {username} logged in successfully")
     return response
 
 @app.get("/logout", name="logout")
 async def logout(request: Request):
+    end_session(request.cookies.get('session_token'))
     response = RedirectResponse(url=request.url_for("homepage"),status_code=302)
     response.delete_cookie(key="session_token")
     return response
@@ -772,85 +2622,835 @@ async def client_dashboard(request: Request, user: dict = Depends(get_current_us
     if user['username'] == 'admin':
         return RedirectResponse(url=request.url_for("admin_dashboard"), status_code=302)
     
-    # Get languages from database
-    conn = get_db_connection()
-    if conn:
-        try:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("SELECT * FROM languages ORDER BY language_name")
-            languages = cursor.fetchall()
-            conn.close()
-        except Exception as e:
-            print(f"Database error getting languages: {e}")
-            languages = DEMO_LANGUAGES
-            if conn:
-                conn.close()
-    else:
-        languages = DEMO_LANGUAGES
+    languages = get_languages()
     
     # Get user's evaluation history
-    history = get_user_evaluation_history(user['id'])
+    history, history_cursor = get_evaluation_history_page(user_id=user['id'])
     
     return templates.TemplateResponse("client_dashboard.html", {
         "request": request,
         "user": user,
         "languages": languages,
-        "history": history
+        "history": history,
+        "history_cursor": history_cursor
     })
 
+def evaluation_owner_filter(user: dict, user_id: int = None):
+    """User id to filter evaluations by: participants only ever see their own, admins may pick anyone or everyone"""
+    if user['username'] == 'admin':
+        return user_id
+    if user_id is not None and user_id != user['id']:
+        raise HTTPException(status_code=403, detail="You can only view your own evaluations")
+    return user['id']
+
+@app.get("/history", name="evaluation_history")
+async def evaluation_history(
+    cursor: str = None,
+    limit: int = HISTORY_PAGE_SIZE,
+    fields: str = None,
+    language_id: int = None,
+    user_id: int = None,
+    user: dict = Depends(get_current_user)
+):
+    """Evaluation history, newest first, paginated by (created_at, id) keyset cursor"""
+    if not 1 <= limit <= HISTORY_MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {HISTORY_MAX_PAGE_SIZE}")
+    selected_fields = parse_evaluation_fields(fields, HISTORY_DEFAULT_FIELDS)
+    owner = evaluation_owner_filter(user, user_id)
+    
+    evaluations, next_cursor = await run_in_threadpool(
+        get_evaluation_history_page, owner, language_id, cursor, limit, selected_fields
+    )
+    return {"evaluations": evaluations, "next_cursor": next_cursor}
+
+@app.get("/export/evaluations", name="export_evaluations")
+async def export_evaluations(
+    export_format: str = Query('csv', alias='format'),
+    fields: str = None,
+    language_id: int = None,
+    user_id: int = None,
+    user: dict = Depends(get_current_user)
+):
+    """Stream evaluations as CSV or JSON lines, oldest first
+
+    Participants export their own submissions; admins can export one user, one
+    language or, with neither filter, the whole campaign.
+    """
+    if export_format not in ('csv', 'jsonl'):
+        raise HTTPException(status_code=400, detail="format must be csv or jsonl")
+    selected_fields = parse_evaluation_fields(fields, list(EVALUATION_COLUMNS))
+    owner = evaluation_owner_filter(user, user_id)
+    
+    batches = await run_in_threadpool(open_evaluation_export, selected_fields, owner, language_id)
+    
+    filename = "evaluations"
+    if owner is not None:
+        filename += f"-user-{owner}"
+    if language_id is not None:
+        filename += f"-language-{language_id}"
+    return StreamingResponse(
+        format_evaluation_export(batches, selected_fields, export_format),
+        media_type="text/csv; charset=utf-8" if export_format == 'csv' else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'}
+    )
+
+SUBMISSION_OBJECT_RE = re.compile(r'^[0-9a-f]{64}\.gz$')
+
+def submission_object_path(digest: str) -> Path:
+    return SUBMISSION_STORE_DIR / digest[:2] / f"{digest}.gz"
+
+def submission_archive_path(digest: str) -> Path:
+    return SUBMISSION_ARCHIVE_DIR / f"{digest[:2]}.zip"
+
+def submission_digest(file_path: str):
+    """Content hash of a stored submission path, or None for a plain (legacy) upload"""
+    name = os.path.basename(file_path)
+    return name[:-3] if SUBMISSION_OBJECT_RE.match(name) else None
+
+def store_submission(content: bytes) -> str:
+    """Store a submission once per content hash, compressed, and return its path
+
+    Storing content that already exists only refreshes the object's mtime, which
+    keeps resubmitted files out of the archive and out of garbage collection.
+    """
+    digest = hashlib.sha256(content).hexdigest()
+    path = submission_object_path(digest)
+    
+    try:
+        os.utime(path)
+        return str(path)
+    except FileNotFoundError:
+        pass
+    
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=".tmp-", delete=False) as f:
+        f.write(gzip.compress(content, compresslevel=6, mtime=0))
+        temp_path = f.name
+    os.replace(temp_path, path)
+    return str(path)
+
+@contextmanager
+def open_submission(file_path: str):
+    """Binary stream of a submission's content, decompressing stored objects on the fly"""
+    digest = submission_digest(file_path)
+    if digest is None:
+        with open(file_path, 'rb') as f:
+            yield f
+        return
+    
+    try:
+        live = open(submission_object_path(digest), 'rb')
+    except FileNotFoundError:
+        live = None
+    if live is not None:
+        with live, gzip.GzipFile(fileobj=live) as f:
+            yield f
+        return
+    
+    # Archived: stream the compressed member straight out of the zip
+    try:
+        archive = zipfile.ZipFile(submission_archive_path(digest))
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Submission not found: {file_path}")
+    with archive:
+        try:
+            member = archive.open(f"{digest}.gz")
+        except KeyError:
+            raise FileNotFoundError(f"Submission not found: {file_path}")
+        with member, gzip.GzipFile(fileobj=member) as f:
+            yield f
+
+@contextmanager
+def materialized_submission(file_path: str):
+    """Plain file path of a submission for the scorer, decompressed to a temporary file if stored compressed"""
+    if submission_digest(file_path) is None:
+        yield file_path
+        return
+    
+    with open_submission(file_path) as source, \
+            tempfile.NamedTemporaryFile(suffix=".txt", prefix="coref_submission_", delete=False) as f:
+        shutil.copyfileobj(source, f, 1024 * 1024)
+        temp_path = f.name
+    try:
+        yield temp_path
+    finally:
+        os.unlink(temp_path)
+
+def submission_reference_counts() -> dict:
+    """{file_path: number of user_evaluations rows pointing at it}
+
+    Raises when the database cannot be read, so callers never mistake an outage
+    for unreferenced files.
+    """
+    conn = get_db_connection()
+    if not conn:
+        raise HTTPException(status_code=503, detail="Database unavailable - submission references cannot be counted")
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT file_path, COUNT(*) FROM user_evaluations GROUP BY file_path")
+        counts = {file_path: references for file_path, references in cursor.fetchall()}
+        conn.close()
+        return counts
+    except Exception:
+        conn.close()
+        raise
+
+def pending_submission_paths() -> set:
+    """Submission paths of durable scoring jobs that are queued or being scored
+
+    Raises when the database cannot be read, like submission_reference_counts.
+    """
+    conn = get_db_connection()
+    if not conn:
+        raise HTTPException(status_code=503, detail="Database unavailable - pending scoring jobs cannot be listed")
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT DISTINCT file_path FROM scoring_jobs WHERE status IN ('queued', 'running')")
+        paths = {file_path for (file_path,) in cursor.fetchall()}
+        conn.close()
+        return paths
+    except Exception:
+        conn.close()
+        raise
+
+def archive_old_submissions(max_age_days: int) -> int:
+    """Move objects untouched for max_age_days into their prefix archive, returning how many moved"""
+    cutoff = time.time() - max_age_days * 86400
+    moved = 0
+    
+    with submission_store_lock:
+        SUBMISSION_ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+        for prefix_dir in sorted(SUBMISSION_STORE_DIR.glob('??')):
+            old = [path for path in prefix_dir.glob('*.gz') if path.stat().st_mtime < cutoff]
+            if not old:
+                continue
+            with zipfile.ZipFile(SUBMISSION_ARCHIVE_DIR / f"{prefix_dir.name}.zip", 'a', zipfile.ZIP_STORED) as archive:
+                archived = set(archive.namelist())
+                for path in old:
+                    if path.name not in archived:
+                        archive.write(path, path.name)
+            for path in old:
+                path.unlink()
+                moved += 1
+    
+    return moved
+
+def collect_submission_garbage() -> dict:
+    """Delete stored submissions that no evaluation references
+
+    Queued and running scoring jobs and saves waiting in the evaluation spill file
+    count as references too. Live objects younger than SUBMISSION_GC_GRACE_SECONDS
+    are kept, because an in-process evaluation may still be scoring them. Archives
+    are rewritten without their unreferenced members.
+    """
+    references = set(submission_reference_counts()) | pending_submission_paths() | evaluation_writer.spilled_file_paths()
+    referenced = {digest for digest in map(submission_digest, references) if digest}
+    cutoff = time.time() - SUBMISSION_GC_GRACE_SECONDS
+    deleted = 0
+    freed_bytes = 0
+    
+    with submission_store_lock:
+        for path in SUBMISSION_STORE_DIR.glob('??/*.gz'):
+            stat = path.stat()
+            if path.name[:-3] not in referenced and stat.st_mtime < cutoff:
+                path.unlink()
+                deleted += 1
+                freed_bytes += stat.st_size
+        
+        for archive_path in SUBMISSION_ARCHIVE_DIR.glob('*.zip'):
+            with zipfile.ZipFile(archive_path) as archive:
+                members = archive.infolist()
+                keep = [member for member in members if member.filename[:-3] in referenced]
+                if len(keep) == len(members):
+                    continue
+                deleted += len(members) - len(keep)
+                freed_bytes += sum(member.file_size for member in members) - sum(member.file_size for member in keep)
+                rewritten = archive_path.with_suffix('.zip.tmp')
+                with zipfile.ZipFile(rewritten, 'w', zipfile.ZIP_STORED) as target:
+                    for member in keep:
+                        target.writestr(member, archive.read(member))
+            if keep:
+                os.replace(rewritten, archive_path)
+            else:
+                rewritten.unlink()
+                archive_path.unlink()
+    
+    return {'deleted': deleted, 'freed_bytes': freed_bytes}
+
+def migrate_legacy_uploads() -> int:
+    """Move plain uploads referenced by user_evaluations into the store, returning how many moved"""
+    references = submission_reference_counts()
+    legacy = [file_path for file_path in references if file_path and submission_digest(file_path) is None and os.path.exists(file_path)]
+    migrated = 0
+    
+    for file_path in legacy:
+        with open(file_path, 'rb') as f:
+            stored_path = store_submission(f.read())
+        conn = get_db_connection()
+        if not conn:
+            break
+        try:
+            cursor = conn.cursor()
+            cursor.execute("UPDATE user_evaluations SET file_path = %s WHERE file_path = %s", (stored_path, file_path))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Error migrating {file_path}: {e}")
+            conn.close()
+            continue
+        os.unlink(file_path)
+        migrated += 1
+    
+    return migrated
+
+def submission_storage_stats() -> dict:
+    objects = list(SUBMISSION_STORE_DIR.glob('??/*.gz'))
+    archives = list(SUBMISSION_ARCHIVE_DIR.glob('*.zip'))
+    legacy = [path for path in Path("uploads").iterdir() if path.is_file()]
+    archived_objects = 0
+    for archive_path in archives:
+        with zipfile.ZipFile(archive_path) as archive:
+            archived_objects += len(archive.namelist())
+    return {
+        'objects': len(objects),
+        'object_bytes': sum(path.stat().st_size for path in objects),
+        'archived_objects': archived_objects,
+        'archive_bytes': sum(path.stat().st_size for path in archives),
+        'legacy_files': len(legacy),
+        'legacy_bytes': sum(path.stat().st_size for path in legacy)
+    }
+
+async def prepare_evaluation(user: dict, language_id: int, file: UploadFile):
+    """Find the gold dataset and store an uploaded submission, returning (gold_dataset, upload_path)"""
+    # Find gold dataset for the language
+    gold_dataset = find_gold_dataset(language_id)
+    if not gold_dataset:
+        raise HTTPException(status_code=400, detail=f"No gold dataset found for language ID {language_id}. Please upload a gold dataset first.")
+    
+    logger.debug(f"FOUND GOLD DATASET: {gold_dataset['filename']} at {gold_dataset['file_path']}")
+    
+    with stage_duration.time(stage='upload'):
+        content = await file.read()
+    with stage_duration.time(stage='save'):
+        upload_path = await run_in_threadpool(store_submission, content)
+    
+    logger.debug(f"SAVED USER FILE: {upload_path}")
+    
+    # Check if both files exist
+    with stage_duration.time(stage='validation'):
+        if not os.path.exists(gold_dataset['file_path']):
+            logger.error(f"Gold dataset file not found: {gold_dataset['file_path']}")
+            raise HTTPException(status_code=400, detail="Gold dataset file not found")
+        
+        if not os.path.exists(upload_path):
+            logger.error(f"User file not found: {upload_path}")
+            raise HTTPException(status_code=400, detail="User file not found")
+    
+    return gold_dataset, upload_path
+
+async def preview_evaluation(user: dict, language_id: int, file: UploadFile, metrics: str, sample_documents: int):
+    """Score a quick estimate from a temporary copy of the upload; nothing is stored"""
+    selected_metrics = parse_preview_metrics(metrics)
+    sample_size = PREVIEW_SAMPLE_DOCUMENTS if sample_documents is None else sample_documents
+    if sample_size < 0:
+        raise HTTPException(status_code=400, detail="sample_documents must be 0 (all documents) or more")
+    
+    gold_dataset = find_gold_dataset(language_id)
+    if not gold_dataset or not os.path.exists(gold_dataset['file_path']):
+        raise HTTPException(status_code=400, detail=f"No gold dataset found for language ID {language_id}. Please upload a gold dataset first.")
+    
+    with stage_duration.time(stage='upload'):
+        content = await file.read()
+    error = validate_submission_content(content)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+    
+    with tempfile.NamedTemporaryFile(suffix=".txt", prefix="coref_preview_", delete=False) as f:
+        f.write(content)
+        preview_path = f.name
+    try:
+        preview = await run_in_threadpool(
+            call_with_profile, current_profile.get(), governed_preview_submission, user['id'], gold_dataset['file_path'], preview_path, selected_metrics, sample_size
+        )
+    finally:
+        os.unlink(preview_path)
+    
+    return {
+        "success": True,
+        "preview": True,
+        **preview,
+        "message": f"Preview estimate from {preview['documents_scored']} of {preview['documents_total']} documents - not saved to the leaderboard"
+    }
+
 @app.post("/evaluate")
 async def evaluate_file(
     request: Request,
     language_id: int = Form(...),
     file: UploadFile = File(...),
+    preview: bool = Form(False),
+    metrics: str = Form(None),
+    sample_documents: int = Form(None),
     user: dict = Depends(get_current_user)
 ):
     if not file.filename.endswith('.txt'):
         raise HTTPException(status_code=400, detail="Only .txt files allowed")
+    if not preview and (metrics or sample_documents is not None):
+        raise HTTPException(status_code=400, detail="metrics and sample_documents are only supported with preview=true")
+    
+    logger.info(f"STARTING {'PREVIEW' if preview else 'EVALUATION'}: User {user['username']}, Language ID {language_id}, File {file.filename}")
+    
+    # Reject early when saturated, before the upload is stored
+    scoring_governor.check_admission()
     
-    print(f"STARTING EVALUATION: User {user['username']}, Language ID {language_id}, File {file.filename}")
+    if preview:
+        return await preview_evaluation(user, language_id, file, metrics, sample_documents)
     
     try:
-        # Find gold dataset for the language
-        gold_dataset = find_gold_dataset(language_id)
-        if not gold_dataset:
-            raise HTTPException(status_code=400, detail=f"No gold dataset found for language ID {language_id}. Please upload a gold dataset first.")
-        
-        print(f"FOUND GOLD DATASET: {gold_dataset['filename']} at {gold_dataset['file_path']}")
-        
-        # Save uploaded file
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        upload_path = Path("uploads") / f"{user['id']}_{timestamp}_{file.filename}"
-        
-        with open(upload_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
-        print(f"SAVED USER FILE: {upload_path}")
-        
-        # Check if both files exist
-        if not os.path.exists(gold_dataset['file_path']):
-            print(f"ERROR: Gold dataset file not found: {gold_dataset['file_path']}")
-            raise HTTPException(status_code=400, detail="Gold dataset file not found")
-        
-        if not os.path.exists(upload_path):
-            print(f"ERROR: User file not found: {upload_path}")
-            raise HTTPException(status_code=400, detail="User file not found")
+        gold_dataset, upload_path = await prepare_evaluation(user, language_id, file)
         
-        # Run evaluation with actual Perl script
-        scores = run_perl_scorer(gold_dataset['file_path'], str(upload_path))
+        # Run evaluation with actual Perl script, off the event loop and within the governor's limits
+        scores, document_counts = await run_in_threadpool(
+            call_with_profile, current_profile.get(), governed_score_submission, user['id'], gold_dataset['file_path'], str(upload_path)
+        )
         
-        # Save results to database/demo storage
-        save_evaluation_results(user['id'], language_id, file.filename, str(upload_path), scores)
+        # Save results to database/spill file; the save waits for a group commit, so off the event loop
+        await run_in_threadpool(save_evaluation_results, user['id'], language_id, file.filename, str(upload_path), scores, gold_dataset.get('id'), document_counts)
         
-        print(f"EVALUATION COMPLETE: {file.filename}")
+        logger.info(f"EVALUATION COMPLETE: {file.filename}")
         return {"success": True, "scores": scores, "message": "Evaluation completed successfully"}
     
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERROR during evaluation: {e}")
+        logger.exception(f"Error during evaluation: {e}")
         raise HTTPException(status_code=500, detail=f"Evaluation failed: {str(e)}")
+
+def prune_evaluation_jobs() -> int:
+    """Forget finished jobs once their results have had time to be collected, returning how many"""
+    cutoff = time.time() - EVALUATION_JOB_RETENTION
+    with evaluation_jobs_lock:
+        old_ids = [key for key, job in evaluation_jobs.items() if job.get('finished_at') and job['finished_at'] < cutoff]
+        for old_id in old_ids:
+            del evaluation_jobs[old_id]
+    return len(old_ids)
+
+def update_evaluation_job(job: dict, **changes):
+    """Apply changes to a background evaluation and bump its version for event streams"""
+    with evaluation_jobs_lock:
+        job.update(changes)
+        job['version'] += 1
+
+def run_evaluation_job(job_id: str, user_id: int, language_id: int, filename: str, gold_dataset: dict, upload_path: str):
+    """Score a submission in the background, publishing progress per document and metric"""
+    job = evaluation_jobs[job_id]
+    
+    def progress(documents_done, documents_total, document, metric):
+        update_evaluation_job(job, documents_done=documents_done, documents_total=documents_total, document=document, metric=metric)
+    
+    try:
+        with scoring_governor.slot(user_id, interactive=False):
+            update_evaluation_job(job, status='running')
+            scores, document_counts = score_submission(gold_dataset['file_path'], upload_path, progress=progress)
+        
+        save_evaluation_results(user_id, language_id, filename, upload_path, scores, gold_dataset.get('id'), document_counts)
+        update_evaluation_job(job, status='completed', scores=scores, finished_at=time.time())
+        logger.info(f"EVALUATION COMPLETE: {filename}")
+    except HTTPException as e:
+        update_evaluation_job(job, status='failed', error=e.detail, finished_at=time.time())
+    except Exception as e:
+        logger.exception(f"Error during evaluation job {job_id}: {e}")
+        update_evaluation_job(job, status='failed', error=f"Evaluation failed: {str(e)}", finished_at=time.time())
+
+SCORING_JOB_SNAPSHOT_COLUMNS = "id AS job_id, user_id, filename, status, documents_done, documents_total, document, metric, scores, error, version"
+
+def enqueue_scoring_job(job_id: str, user_id: int, language_id: int, filename: str, gold_dataset: dict, upload_path: str) -> bool:
+    """Store a scoring job for the workers, returning False when there is no database to queue it in"""
+    conn = get_db_connection()
+    if not conn:
+        return False
+    
+    try:
+        now = datetime.now()
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO scoring_jobs (id, user_id, language_id, gold_dataset_id, gold_file_path, filename, file_path, available_at, created_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, (job_id, user_id, language_id, gold_dataset.get('id'), gold_dataset['file_path'], filename, upload_path, now, now))
+        conn.commit()
+        conn.close()
+        return True
+    except Exception as e:
+        logger.error(f"Error queueing scoring job: {e}")
+        conn.close()
+        return False
+
+def claim_scoring_job(worker_id: str):
+    """Lease the oldest runnable job (queued, or running with an expired lease) to a worker
+
+    Candidates are claimed with a conditional UPDATE, so two workers racing for
+    the same job cannot both win. A job whose lease expired after its last allowed
+    attempt (its worker was killed, e.g. by the memory limit) is marked failed in
+    the same transaction instead of being leased again. Returns the job row or None.
+    """
+    conn = get_db_connection()
+    if not conn:
+        return None
+    
+    try:
+        now = datetime.now()
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("""
+            UPDATE scoring_jobs
+            SET status = 'failed', error = %s, finished_at = %s, lease_owner = NULL, lease_expires_at = NULL, version = version + 1
+            WHERE status = 'running' AND lease_expires_at < %s AND attempts >= %s
+        """, (f"Worker lost the job on all {SCORING_JOB_MAX_ATTEMPTS} attempts", now, now, SCORING_JOB_MAX_ATTEMPTS))
+        if cursor.rowcount:
+            logger.warning(f"Dead-lettered {cursor.rowcount} scoring job(s) whose lease expired on the last attempt")
+        cursor.execute("""
+            SELECT id FROM scoring_jobs
+            WHERE (status = 'queued' AND available_at <= %s) OR (status = 'running' AND lease_expires_at < %s AND attempts < %s)
+            ORDER BY available_at, created_at
+            LIMIT 5
+        """, (now, now, SCORING_JOB_MAX_ATTEMPTS))
+        for candidate in cursor.fetchall():
+            cursor.execute("""
+                UPDATE scoring_jobs
+                SET status = 'running', lease_owner = %s, lease_expires_at = %s, attempts = attempts + 1, version = version + 1
+                WHERE id = %s AND ((status = 'queued' AND available_at <= %s) OR (status = 'running' AND lease_expires_at < %s AND attempts < %s))
+            """, (worker_id, now + timedelta(seconds=SCORING_JOB_LEASE_SECONDS), candidate['id'], now, now, SCORING_JOB_MAX_ATTEMPTS))
+            conn.commit()
+            if cursor.rowcount == 1:
+                cursor.execute("SELECT * FROM scoring_jobs WHERE id = %s", (candidate['id'],))
+                job = cursor.fetchone()
+                conn.close()
+                return job
+        conn.commit()
+        conn.close()
+    except Exception as e:
+        logger.error(f"Error claiming scoring job: {e}")
+        conn.close()
+    return None
+
+def renew_scoring_job(job_id: str, worker_id: str, **progress) -> bool:
+    """Extend a worker's lease, optionally recording progress; False once the lease was lost"""
+    conn = get_db_connection()
+    if not conn:
+        return False
+    
+    assignments = ", ".join(f"{column} = %s" for column in progress)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            UPDATE scoring_jobs SET lease_expires_at = %s{', ' + assignments if assignments else ''}, version = version + 1
+            WHERE id = %s AND lease_owner = %s AND status = 'running'
+        """, (datetime.now() + timedelta(seconds=SCORING_JOB_LEASE_SECONDS), *progress.values(), job_id, worker_id))
+        conn.commit()
+        renewed = cursor.rowcount == 1
+        conn.close()
+        return renewed
+    except Exception as e:
+        logger.error(f"Error renewing lease of scoring job {job_id}: {e}")
+        conn.close()
+        return False
+
+def finish_scoring_job(job_id: str, worker_id: str, scores: dict = None, error: str = None, retry: bool = False, attempts: int = 0):
+    """Record the outcome of a leased job: completed, queued again after a backoff, or failed for good"""
+    now = datetime.now()
+    if scores is not None:
+        changes = {'status': 'completed', 'scores': json.dumps(scores), 'error': None, 'finished_at': now}
+    elif retry and attempts < SCORING_JOB_MAX_ATTEMPTS:
+        # Exponential backoff: SCORING_JOB_RETRY_SECONDS, then twice that, ...
+        delay = SCORING_JOB_RETRY_SECONDS * 2 ** (attempts - 1)
+        changes = {'status': 'queued', 'error': error, 'available_at': now + timedelta(seconds=delay)}
+    else:
+        changes = {'status': 'failed', 'error': error, 'finished_at': now}
+    changes['lease_owner'] = None
+    changes['lease_expires_at'] = None
+    
+    conn = get_db_connection()
+    if not conn:
+        return
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            UPDATE scoring_jobs SET {", ".join(f"{column} = %s" for column in changes)}, version = version + 1
+            WHERE id = %s AND lease_owner = %s
+        """, (*changes.values(), job_id, worker_id))
+        conn.commit()
+        conn.close()
+    except Exception as e:
+        logger.error(f"Error finishing scoring job {job_id}: {e}")
+        conn.close()
+
+def load_scoring_job(job_id: str):
+    """Snapshot of a queued job in the shape of an in-process evaluation job, or None"""
+    conn = get_db_connection()
+    if not conn:
+        return None
+    
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(f"SELECT {SCORING_JOB_SNAPSHOT_COLUMNS} FROM scoring_jobs WHERE id = %s", (job_id,))
+        job = cursor.fetchone()
+        conn.close()
+    except Exception as e:
+        logger.error(f"Error reading scoring job {job_id}: {e}")
+        conn.close()
+        return None
+    
+    if job:
+        job['scores'] = json.loads(job['scores']) if job['scores'] else None
+        job['durable'] = True
+    return job
+
+def get_evaluation_job(job_id: str, user: dict) -> dict:
+    job = evaluation_jobs.get(job_id)
+    if not job and SCORING_QUEUE == 'database':
+        job = load_scoring_job(job_id)
+    if not job or (job['user_id'] != user['id'] and user['username'] != 'admin'):
+        raise HTTPException(status_code=404, detail="Evaluation job not found")
+    return job
+
+def evaluation_job_snapshot(job: dict, refresh: bool = False) -> dict:
+    if refresh and job.get('durable'):
+        job = load_scoring_job(job['job_id']) or job
+    with evaluation_jobs_lock:
+        return {key: value for key, value in job.items() if key not in ('user_id', 'finished_at', 'durable')}
+
+@app.post("/evaluate_async", name="evaluate_async")
+async def evaluate_async(
+    request: Request,
+    language_id: int = Form(...),
+    file: UploadFile = File(...),
+    user: dict = Depends(get_current_user)
+):
+    """Start evaluating a file in the background; progress is streamed from /evaluate_jobs/{job_id}/events"""
+    if not file.filename.endswith('.txt'):
+        raise HTTPException(status_code=400, detail="Only .txt files allowed")
+    
+    logger.info(f"STARTING BACKGROUND EVALUATION: User {user['username']}, Language ID {language_id}, File {file.filename}")
+    if SCORING_QUEUE != 'database':
+        scoring_governor.check_admission()
+    gold_dataset, upload_path = await prepare_evaluation(user, language_id, file)
+    
+    job_id = secrets.token_hex(8)
+    if SCORING_QUEUE == 'database':
+        if await run_in_threadpool(enqueue_scoring_job, job_id, user['id'], language_id, file.filename, gold_dataset, str(upload_path)):
+            return {
+                "success": True,
+                "job_id": job_id,
+                "events_url": str(request.url_for("evaluation_job_events", job_id=job_id))
+            }
+        logger.warning(f"Scoring queue unavailable, evaluating {file.filename} in the web process")
+    
+    prune_evaluation_jobs()
+    with evaluation_jobs_lock:
+        evaluation_jobs[job_id] = {
+            'job_id': job_id,
+            'user_id': user['id'],
+            'filename': file.filename,
+            'status': 'queued',
+            'documents_done': 0,
+            'documents_total': None,
+            'document': None,
+            'metric': None,
+            'scores': None,
+            'error': None,
+            'finished_at': None,
+            'version': 0
+        }
+    
+    if not evaluation_job_pool.submit(run_evaluation_job, job_id, user['id'], language_id, file.filename, gold_dataset, str(upload_path)):
+        with evaluation_jobs_lock:
+            evaluation_jobs.pop(job_id, None)
+        raise scoring_governor._rejection("Too many background evaluations")
+    
+    return {
+        "success": True,
+        "job_id": job_id,
+        "events_url": str(request.url_for("evaluation_job_events", job_id=job_id))
+    }
+
+@app.get("/evaluate_jobs/{job_id}", name="evaluation_job_status")
+async def evaluation_job_status(job_id: str, user: dict = Depends(get_current_user)):
+    """Current state of a background evaluation"""
+    return evaluation_job_snapshot(await run_in_threadpool(get_evaluation_job, job_id, user))
+
+@app.get("/evaluate_jobs/{job_id}/events", name="evaluation_job_events")
+async def evaluation_job_events(job_id: str, user: dict = Depends(get_current_user)):
+    """Server-sent events with the progress of a background evaluation
+
+    Emits "progress" events while the job is queued or running, then a single
+    "complete" (with scores) or "error" event and closes the stream.
+    """
+    job = await run_in_threadpool(get_evaluation_job, job_id, user)
+    # Queued jobs are read back from the database, so poll those less often
+    interval = 1.0 if job.get('durable') else 0.25
+    
+    async def events():
+        version = None
+        last_sent = time.monotonic()
+        while True:
+            snapshot = await run_in_threadpool(evaluation_job_snapshot, job, True) if job.get('durable') else evaluation_job_snapshot(job)
+            if snapshot['version'] != version:
+                version = snapshot['version']
+                event = {'completed': 'complete', 'failed': 'error'}.get(snapshot['status'], 'progress')
+                yield f"event: {event}\ndata: {json.dumps(snapshot)}\n\n"
+                last_sent = time.monotonic()
+                if event != 'progress':
+                    return
+            elif time.monotonic() - last_sent > 15:
+                # Comment line keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+                last_sent = time.monotonic()
+            await asyncio.sleep(interval)
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def extract_zip_submissions(content: bytes, max_files: int = BATCH_MAX_FILES, max_bytes: int = BATCH_MAX_TOTAL_BYTES) -> list:
+    """Extract (filename, content) pairs for the .txt members of a zip archive
+
+    The member count and declared sizes are checked against the limits before
+    anything is decompressed, so an oversized archive is rejected without inflating it.
+    """
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(content))
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Uploaded archive is not a valid zip file")
+    
+    with archive:
+        members = []
+        for info in archive.infolist():
+            name = Path(info.filename).name
+            # Skip directories and archiver metadata such as __MACOSX/ or .DS_Store
+            if info.is_dir() or info.filename.startswith('__MACOSX/') or name.startswith('.'):
+                continue
+            if not name.endswith('.txt'):
+                raise HTTPException(status_code=400, detail=f"Only .txt files allowed in archive: {info.filename}")
+            if info.file_size > BATCH_MAX_MEMBER_BYTES:
+                raise HTTPException(status_code=400, detail=f"Archive member too large: {info.filename}")
+            members.append((name, info))
+        
+        if len(members) > max_files:
+            raise HTTPException(status_code=400, detail=f"Too many files in batch (maximum {BATCH_MAX_FILES})")
+        if sum(info.file_size for _, info in members) > max_bytes:
+            raise HTTPException(status_code=400, detail=f"Batch too large when uncompressed (maximum {BATCH_MAX_TOTAL_BYTES // (1024 * 1024)} MB)")
+        # Reads stop at the declared file_size, so a member cannot inflate past what was checked
+        return [(name, archive.read(info)) for name, info in members]
+
+def validate_submission_content(content: bytes):
+    """Return an error message if the content does not look like a SemEval/CoNLL file, else None"""
+    with stage_duration.time(stage='validation'):
+        if not content.strip():
+            return "File is empty"
+        if b'#begin document' not in content:
+            return "File is not in SemEval/CoNLL format (no '#begin document' line)"
+        return None
+
+def score_batch_member(owner, gold_file_path: str, system_file_path: str) -> dict:
+    """Score one batch member, reporting failures instead of raising"""
+    try:
+        scores, document_counts = governed_score_submission(owner, gold_file_path, system_file_path, check_environment=False, interactive=False)
+        return {"scores": scores, "document_counts": document_counts}
+    except HTTPException as e:
+        return {"error": e.detail}
+    except Exception as e:
+        logger.exception(f"Unexpected error scoring {system_file_path}")
+        return {"error": f"Evaluation failed: {e}"}
+
+def store_batch_members(submissions: list):
+    """Validate and store the (filename, content) members of a batch
+
+    Returns the result dict of every member and (result, upload path) of the valid ones.
+    """
+    results = []
+    pending = []
+    for filename, content in submissions:
+        result = {"filename": filename, "success": False}
+        results.append(result)
+        
+        error = validate_submission_content(content)
+        if error:
+            result["error"] = error
+            continue
+        
+        with stage_duration.time(stage='save'):
+            upload_path = store_submission(content)
+        pending.append((result, upload_path))
+    return results, pending
+
+@app.post("/evaluate_batch")
+async def evaluate_batch(
+    request: Request,
+    language_id: int = Form(...),
+    files: List[UploadFile] = File(...),
+    user: dict = Depends(get_current_user)
+):
+    """Evaluate several .txt files (or a zip of them) for one language in a single request"""
+    submissions = []
+    for upload in files:
+        with stage_duration.time(stage='upload'):
+            content = await upload.read()
+        if upload.filename.endswith('.zip'):
+            submitted_bytes = sum(len(member) for _, member in submissions)
+            submissions.extend(await run_in_threadpool(
+                extract_zip_submissions, content, BATCH_MAX_FILES - len(submissions), BATCH_MAX_TOTAL_BYTES - submitted_bytes
+            ))
+        elif upload.filename.endswith('.txt'):
+            submissions.append((Path(upload.filename).name, content))
+        else:
+            raise HTTPException(status_code=400, detail="Only .txt or .zip files allowed")
+    
+    if not submissions:
+        raise HTTPException(status_code=400, detail="No .txt files found in upload")
+    if len(submissions) > BATCH_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"Too many files in batch (maximum {BATCH_MAX_FILES})")
+    if sum(len(member) for _, member in submissions) > BATCH_MAX_TOTAL_BYTES:
+        raise HTTPException(status_code=400, detail=f"Batch too large when uncompressed (maximum {BATCH_MAX_TOTAL_BYTES // (1024 * 1024)} MB)")
+    
+    filenames = [filename for filename, _ in submissions]
+    if len(set(filenames)) != len(filenames):
+        raise HTTPException(status_code=400, detail="Duplicate file names in batch")
+    
+    logger.info(f"STARTING BATCH EVALUATION: User {user['username']}, Language ID {language_id}, {len(submissions)} files")
+    
+    # Gold data and the scorer environment are resolved once for the whole batch
+    gold_dataset = find_gold_dataset(language_id)
+    if not gold_dataset:
+        raise HTTPException(status_code=400, detail=f"No gold dataset found for language ID {language_id}. Please upload a gold dataset first.")
+    if not os.path.exists(gold_dataset['file_path']):
+        logger.error(f"Gold dataset file not found: {gold_dataset['file_path']}")
+        raise HTTPException(status_code=400, detail="Gold dataset file not found")
+    await run_in_threadpool(check_scorer_environment)
+    scoring_governor.check_admission()
+    
+    results, pending = await run_in_threadpool(store_batch_members, submissions)
+    
+    # Score all valid members concurrently against the same gold file
+    loop = asyncio.get_running_loop()
+    outcomes = await asyncio.gather(*[
+        loop.run_in_executor(batch_scoring_pool, call_with_profile, current_profile.get(), score_batch_member, user['id'], gold_dataset['file_path'], str(upload_path))
+        for _, upload_path in pending
+    ])
+    
+    completed = []
+    for (result, upload_path), outcome in zip(pending, outcomes):
+        if "error" in outcome:
+            result["error"] = outcome["error"]
+            continue
+        result["success"] = True
+        result["scores"] = outcome["scores"]
+        completed.append((result["filename"], str(upload_path), outcome["scores"], outcome["document_counts"]))
+    
+    await run_in_threadpool(save_evaluation_results_batch, user['id'], language_id, completed, gold_dataset.get('id'))
+    
+    logger.info(f"BATCH EVALUATION COMPLETE: {len(completed)} of {len(results)} files scored")
+    return {
+        "success": bool(completed),
+        "results": results,
+        "message": f"Evaluated {len(completed)} of {len(results)} files successfully"
+    }
+
 @app.post("/admin/add_language",name="add_language")
 async def add_language(
     request: Request,
@@ -890,11 +3490,11 @@ async def add_language(
             )
             conn.commit()
             conn.close()
-            print(f"SUCCESS: Language {language_name} ({language_code}) added to database")
+            logger.info(f"Language {language_name} ({language_code}) added to database")
         except HTTPException:
             raise
         except Exception as e:
-            print(f"ERROR adding language to database: {e}")
+            logger.error(f"Error adding language to database: {e}")
             if conn:
                 conn.close()
             # Fallback to demo storage
@@ -903,6 +3503,7 @@ async def add_language(
         # Add to demo storage
         add_to_demo_languages(language_code, language_name)
 
+    invalidate_reference_data()
     return RedirectResponse(url=request.url_for("admin_dashboard"), status_code=302)
 
 @app.post("/admin/update_language/{language_id}")
@@ -946,11 +3547,11 @@ async def update_language(
             )
             conn.commit()
             conn.close()
-            print(f"SUCCESS: Language updated to {language_name} ({language_code})")
+            logger.info(f"Language updated to {language_name} ({language_code})")
         except HTTPException:
             raise
         except Exception as e:
-            print(f"ERROR updating language in database: {e}")
+            logger.error(f"Error updating language in database: {e}")
             if conn:
                 conn.close()
             # Fallback to demo storage
@@ -959,6 +3560,7 @@ async def update_language(
         # Update demo storage
         update_demo_language(language_id, language_code, language_name)
 
+    invalidate_reference_data()
     return RedirectResponse(url=request.url_for("admin_dashboard"), status_code=302)
 
 @app.post("/admin/delete_language/{language_id}",name="delete_language")
@@ -983,9 +3585,9 @@ async def delete_language(
             
             conn.commit()
             conn.close()
-            print(f"SUCCESS: Language and associated datasets deleted from database")
+            logger.info(f"Language and associated datasets deleted from database")
         except Exception as e:
-            print(f"ERROR deleting language from database: {e}")
+            logger.error(f"Error deleting language from database: {e}")
             if conn:
                 conn.close()
             # Fallback to demo storage
@@ -994,6 +3596,7 @@ async def delete_language(
         # Delete from demo storage
         delete_from_demo_languages(language_id)
 
+    invalidate_reference_data()
     return RedirectResponse(url=request.url_for("admin_dashboard"), status_code=302)
 
 # Helper functions for demo language management
@@ -1014,7 +3617,7 @@ def add_to_demo_languages(language_code: str, language_name: str):
     }
     
     DEMO_LANGUAGES.append(new_language)
-    print(f"SUCCESS: Language {language_name} ({language_code}) added to demo storage")
+    logger.info(f"Language {language_name} ({language_code}) added to demo storage")
 
 def update_demo_language(language_id: int, language_code: str, language_name: str):
     """Update language in demo storage"""
@@ -1030,7 +3633,7 @@ def update_demo_language(language_id: int, language_code: str, language_name: st
         if lang['id'] == language_id:
             DEMO_LANGUAGES[i]['language_code'] = language_code
             DEMO_LANGUAGES[i]['language_name'] = language_name
-            print(f"SUCCESS: Language updated to {language_name} ({language_code}) in demo storage")
+            logger.info(f"Language updated to {language_name} ({language_code}) in demo storage")
             return
     
     raise HTTPException(status_code=404, detail="Language not found")
@@ -1047,7 +3650,7 @@ def delete_from_demo_languages(language_id: int):
     DEMO_LANGUAGES[:] = [lang for lang in DEMO_LANGUAGES if lang['id'] != language_id]
     
     if len(DEMO_LANGUAGES) < original_count:
-        print(f"SUCCESS: Language and associated datasets deleted from demo storage")
+        logger.info(f"Language and associated datasets deleted from demo storage")
     else:
         raise HTTPException(status_code=404, detail="Language not found")
 @app.get("/admin", response_class=HTMLResponse)
@@ -1055,40 +3658,16 @@ async def admin_dashboard(request: Request, user: dict = Depends(get_current_use
     if user['username'] != 'admin':
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    # Get languages from database
-    conn = get_db_connection()
-    if conn:
-        try:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("SELECT * FROM languages ORDER BY language_name")
-            languages = cursor.fetchall()
-            
-            # Get gold datasets
-            cursor.execute("""
-                SELECT gd.*, l.language_name 
-                FROM gold_datasets gd 
-                JOIN languages l ON gd.language_id = l.id 
-                ORDER BY gd.created_at DESC
-            """)
-            gold_datasets = cursor.fetchall()
-            conn.close()
-        except Exception as e:
-            print(f"Database error getting admin data: {e}")
-            languages = DEMO_LANGUAGES
-            gold_datasets = DEMO_GOLD_DATASETS
-            if conn:
-                conn.close()
-    else:
-        languages = DEMO_LANGUAGES
-        gold_datasets = DEMO_GOLD_DATASETS
+    reference_data = get_reference_data()
     
     return templates.TemplateResponse("admin_dashboard.html", {
         "request": request,
         "users": [],  # You can implement user management if needed
-        "languages": languages,
-        "gold_datasets": gold_datasets,
+        "languages": reference_data['languages'],
+        "gold_datasets": reference_data['gold_datasets'],
         "recent_activities": [],  # You can implement activity logging if needed
-        "scorer_exists": False  # Removed scorer functionality
+        "scorer_exists": False,  # Removed scorer functionality
+        "profiles": list_request_profiles()
     })
 
 @app.post("/admin/add_user", name="add_user")
@@ -1102,7 +3681,8 @@ async def add_user(
     if user['username'] != 'admin':
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    password_hash = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    # bcrypt is deliberately slow; keep it off the event loop
+    password_hash = (await run_in_threadpool(bcrypt.hashpw, password.encode(), bcrypt.gensalt())).decode()
     
     # Add to database or demo users
     conn = get_db_connection()
@@ -1115,9 +3695,9 @@ async def add_user(
             )
             conn.commit()
             conn.close()
-            print(f"SUCCESS: User {username} added to database")
+            logger.info(f"User {username} added to database")
         except Exception as e:
-            print(f"ERROR adding user to database: {e}")
+            logger.error(f"Error adding user to database: {e}")
             if conn:
                 conn.close()
             # Fallback to demo users
@@ -1128,7 +3708,7 @@ async def add_user(
                 'email': email,
                 'is_active': True
             }
-            print(f"SUCCESS: User {username} added to demo storage")
+            logger.info(f"User {username} added to demo storage")
     else:
         # Add to demo users
         DEMO_USERS[username] = {
@@ -1138,37 +3718,194 @@ async def add_user(
             'email': email,
             'is_active': True
         }
-        print(f"SUCCESS: User {username} added to demo storage")
+        logger.info(f"User {username} added to demo storage")
     
     return RedirectResponse(url=request.url_for("admin_dashboard"), status_code=302)
 
-@app.post("/admin/upload_gold_dataset",name="upload_gold_dataset")
-async def upload_gold_dataset(
-    request: Request,
-    language_id: int = Form(...),
-    file: UploadFile = File(...),
-    user: dict = Depends(get_current_user)
-):
-    if user['username'] != 'admin':
-        raise HTTPException(status_code=403, detail="Admin access required")
+USERNAME_RE = re.compile(r'^[A-Za-z0-9_.@-]{1,100}$')
+
+def parse_user_import(content: bytes) -> list:
+    """Read a username,email[,password][,is_active] CSV into rows tagged with their line number"""
+    try:
+        text = content.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV file must be UTF-8 encoded")
     
-    if not file.filename.endswith('.txt'):
-        raise HTTPException(status_code=400, detail="Only .txt files allowed")
+    reader = csv.DictReader(io.StringIO(text))
+    columns = [column.strip().lower() for column in reader.fieldnames or []]
+    missing = [column for column in ('username', 'email') if column not in columns]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"CSV header must contain username and email (missing: {', '.join(missing)})")
+    reader.fieldnames = columns
     
-    try:
-        # Create language-specific directory
-        lang_dir = Path("gold_datasets") / f"lang_{language_id}"
-        lang_dir.mkdir(exist_ok=True)
-        
-        # Save file with timestamp
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        file_path = lang_dir / f"{timestamp}_{file.filename}"
-        
+    rows = []
+    for row in reader:
+        if len(rows) >= USER_IMPORT_MAX_ROWS:
+            raise HTTPException(status_code=400, detail=f"Too many rows (maximum {USER_IMPORT_MAX_ROWS})")
+        if not any((value or '').strip() for value in row.values() if isinstance(value, str)):
+            continue
+        rows.append({
+            'line': reader.line_num,
+            'username': (row.get('username') or '').strip(),
+            'email': (row.get('email') or '').strip(),
+            'password': row.get('password') or '',
+            'is_active': (row.get('is_active') or '1').strip().lower() not in ('0', 'false', 'no')
+        })
+    return rows
+
+def existing_user_identities() -> tuple:
+    """(usernames, lowercased emails) of all users"""
+    conn = get_db_connection()
+    if conn:
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT username, email FROM users")
+            users = cursor.fetchall()
+            conn.close()
+            return {username for username, _ in users}, {email.lower() for _, email in users}
+        except Exception as e:
+            logger.error(f"Database error reading users: {e}")
+            conn.close()
+            raise HTTPException(status_code=500, detail="Could not read existing users")
+    
+    return set(DEMO_USERS), {user['email'].lower() for user in DEMO_USERS.values()}
+
+def validate_user_import(rows: list) -> list:
+    """Check every row, returning per-row errors; rows that pass are marked valid"""
+    usernames, emails = existing_user_identities()
+    errors = []
+    
+    for row in rows:
+        error = None
+        if not USERNAME_RE.match(row['username']):
+            error = "Username must be 1-100 letters, digits or . _ - @"
+        elif row['username'] in usernames:
+            error = f"Username {row['username']} already exists"
+        elif not re.match(r'^[^@\s]+@[^@\s]+\.[^@\s]+$', row['email']) or len(row['email']) > 255:
+            error = "Invalid email address"
+        elif row['email'].lower() in emails:
+            error = f"Email {row['email']} already exists"
+        elif len(row['password'].encode()) > 72:
+            error = "Password is longer than bcrypt's 72 byte limit"
+        
+        row['valid'] = error is None
+        if error:
+            errors.append({'line': row['line'], 'username': row['username'], 'error': error})
+        else:
+            # Later rows may not reuse a name or address claimed earlier in the file
+            usernames.add(row['username'])
+            emails.add(row['email'].lower())
+    
+    return errors
+
+def hash_passwords(passwords: list) -> list:
+    """bcrypt hashes of the passwords, computed across the hashing process pool"""
+    salts = [bcrypt.gensalt() for _ in passwords]
+    chunksize = max(1, len(passwords) // (USER_IMPORT_WORKERS * 4))
+    hashes = password_hashing_pool.map(bcrypt.hashpw, [password.encode() for password in passwords], salts, chunksize=chunksize)
+    return [password_hash.decode() for password_hash in hashes]
+
+def insert_imported_users(users: list):
+    """Insert (username, email, password_hash, is_active) rows in one transaction, or into demo storage"""
+    conn = get_db_connection()
+    if conn:
+        try:
+            with stage_duration.time(stage='db_write'):
+                cursor = conn.cursor()
+                cursor.executemany(
+                    "INSERT INTO users (username, email, password_hash, is_active) VALUES (%s, %s, %s, %s)",
+                    users
+                )
+                conn.commit()
+            conn.close()
+            return
+        except Exception as e:
+            logger.error(f"Error importing users into database: {e}")
+            # Closing without commit rolls the whole import back
+            conn.close()
+            raise HTTPException(status_code=500, detail=f"Import failed, no users were added: {e}")
+    
+    for username, email, password_hash, is_active in users:
+        DEMO_USERS[username] = {
+            'id': len(DEMO_USERS) + 1,
+            'username': username,
+            'password_hash': password_hash,
+            'email': email,
+            'is_active': is_active
+        }
+
+@app.post("/admin/import_users", name="import_users")
+async def import_users(
+    file: UploadFile = File(...),
+    dry_run: bool = Form(False),
+    user: dict = Depends(get_current_user)
+):
+    """Create users from a CSV file, skipping and reporting rows that fail validation
+
+    Rows without a password get a generated one, returned once in the response.
+    """
+    if user['username'] != 'admin':
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    rows = parse_user_import(await file.read())
+    errors = await run_in_threadpool(validate_user_import, rows)
+    valid = [row for row in rows if row['valid']]
+    
+    if dry_run or not valid:
+        return {"success": not errors, "dry_run": dry_run, "imported": 0, "valid": len(valid), "errors": errors, "generated_passwords": []}
+    
+    generated_passwords = []
+    for row in valid:
+        if not row['password']:
+            row['password'] = secrets.token_urlsafe(9)
+            generated_passwords.append({'username': row['username'], 'password': row['password']})
+    
+    start = time.perf_counter()
+    password_hashes = await run_in_threadpool(hash_passwords, [row['password'] for row in valid])
+    hashing_seconds = time.perf_counter() - start
+    
+    await run_in_threadpool(insert_imported_users, [
+        (row['username'], row['email'], password_hash, row['is_active'])
+        for row, password_hash in zip(valid, password_hashes)
+    ])
+    
+    logger.info(f"Imported {len(valid)} users ({len(errors)} rows rejected), hashing took {hashing_seconds:.1f}s")
+    return {
+        "success": not errors,
+        "dry_run": False,
+        "imported": len(valid),
+        "valid": len(valid),
+        "errors": errors,
+        "generated_passwords": generated_passwords
+    }
+
+@app.post("/admin/upload_gold_dataset",name="upload_gold_dataset")
+async def upload_gold_dataset(
+    request: Request,
+    language_id: int = Form(...),
+    file: UploadFile = File(...),
+    user: dict = Depends(get_current_user)
+):
+    if user['username'] != 'admin':
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    if not file.filename.endswith('.txt'):
+        raise HTTPException(status_code=400, detail="Only .txt files allowed")
+    
+    try:
+        # Create language-specific directory
+        lang_dir = Path("gold_datasets") / f"lang_{language_id}"
+        lang_dir.mkdir(exist_ok=True)
+        
+        # Save file with timestamp
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        file_path = lang_dir / f"{timestamp}_{file.filename}"
+        
         with open(file_path, "wb") as buffer:
             content = await file.read()
             buffer.write(content)
         
-        print(f"GOLD DATASET SAVED: {file_path}")
+        logger.info(f"GOLD DATASET SAVED: {file_path}")
         
         # Save to database or demo data
         conn = get_db_connection()
@@ -1181,9 +3918,9 @@ async def upload_gold_dataset(
                 )
                 conn.commit()
                 conn.close()
-                print(f"SUCCESS: Gold dataset saved to database: {file.filename}")
+                logger.info(f"Gold dataset saved to database: {file.filename}")
             except Exception as e:
-                print(f"ERROR saving to database: {e}")
+                logger.error(f"Error saving to database: {e}")
                 if conn:
                     conn.close()
                 # Fallback to demo data
@@ -1192,10 +3929,11 @@ async def upload_gold_dataset(
             # Save to demo data
             add_to_demo_datasets(language_id, file.filename, str(file_path), user['username'])
 
+        invalidate_reference_data()
         return RedirectResponse(url=request.url_for("admin_dashboard"), status_code=302)
 
     except Exception as e:
-        print(f"ERROR uploading gold dataset: {e}")
+        logger.error(f"Error uploading gold dataset: {e}")
         raise HTTPException(status_code=500, detail=f"Error uploading gold dataset: {str(e)}")
 @app.post("/admin/delete_gold_dataset/{dataset_id}")
 async def delete_gold_dataset(
@@ -1223,17 +3961,17 @@ async def delete_gold_dataset(
             file_path = Path(dataset['file_path'])
             if file_path.exists():
                 file_path.unlink()
-                print(f"SUCCESS: Deleted physical file: {file_path}")
+                logger.info(f"Deleted physical file: {file_path}")
             
             # Delete from database
             cursor.execute("DELETE FROM gold_datasets WHERE id = %s", (dataset_id,))
             conn.commit()
             conn.close()
-            print(f"SUCCESS: Gold dataset deleted from database (ID: {dataset_id})")
+            logger.info(f"Gold dataset deleted from database (ID: {dataset_id})")
         except HTTPException:
             raise
         except Exception as e:
-            print(f"ERROR deleting gold dataset from database: {e}")
+            logger.error(f"Error deleting gold dataset from database: {e}")
             if conn:
                 conn.close()
             # Fallback to demo storage
@@ -1242,6 +3980,7 @@ async def delete_gold_dataset(
         # Delete from demo storage
         delete_from_demo_datasets(dataset_id)
 
+    invalidate_reference_data()
     return RedirectResponse(url=request.url_for("admin_dashboard"), status_code=302)
 
 def delete_from_demo_datasets(dataset_id: int):
@@ -1258,11 +3997,11 @@ def delete_from_demo_datasets(dataset_id: int):
     file_path = Path(dataset['file_path'])
     if file_path.exists():
         file_path.unlink()
-        print(f"SUCCESS: Deleted physical file: {file_path}")
+        logger.info(f"Deleted physical file: {file_path}")
     
     # Remove from demo storage
     DEMO_GOLD_DATASETS[:] = [ds for ds in DEMO_GOLD_DATASETS if ds['id'] != dataset_id]
-    print(f"SUCCESS: Gold dataset deleted from demo storage (ID: {dataset_id})")
+    logger.info(f"Gold dataset deleted from demo storage (ID: {dataset_id})")
 def add_to_demo_datasets(language_id: int, filename: str, file_path: str, uploaded_by: str):
     """Add gold dataset to demo data"""
     language_name = next((lang['language_name'] for lang in DEMO_LANGUAGES if lang['id'] == language_id), 'Unknown')
@@ -1278,7 +4017,1001 @@ def add_to_demo_datasets(language_id: int, filename: str, file_path: str, upload
     }
     
     DEMO_GOLD_DATASETS.append(dataset)
-    print(f"SUCCESS: Gold dataset added to demo data: {filename}")
+    logger.info(f"Gold dataset added to demo data: {filename}")
+
+def get_evaluations_to_rescore(language_id: int, gold_dataset_id: int) -> list:
+    """List evaluations for a language that were not scored against the given gold dataset"""
+    conn = get_db_connection()
+    
+    if conn:
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute("""
+                SELECT id, file_path FROM user_evaluations
+                WHERE language_id = %s AND (gold_dataset_id IS NULL OR gold_dataset_id != %s)
+                ORDER BY id
+            """, (language_id, gold_dataset_id))
+            evaluations = cursor.fetchall()
+            conn.close()
+            return evaluations
+        except Exception as e:
+            logger.error(f"Error listing evaluations to rescore: {e}")
+            if conn:
+                conn.close()
+    
+    # Fallback to demo data
+    return [
+        {'id': evaluation['id'], 'file_path': evaluation['file_path']}
+        for evaluation in DEMO_EVALUATIONS
+        if evaluation['language_id'] == language_id and evaluation.get('gold_dataset_id') != gold_dataset_id
+    ]
+
+def update_evaluation_scores(evaluation_id: int, scores: dict, gold_dataset_id: int, document_counts: dict = None):
+    """Replace the stored scores of an evaluation and record the gold dataset they came from"""
+    conn = get_db_connection()
+    
+    if conn:
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE user_evaluations SET
+                    gold_dataset_id = %s,
+                    muc_recall = %s, muc_precision = %s, muc_f1 = %s,
+                    bcub_recall = %s, bcub_precision = %s, bcub_f1 = %s,
+                    ceafm_recall = %s, ceafm_precision = %s, ceafm_f1 = %s,
+                    ceafe_recall = %s, ceafe_precision = %s, ceafe_f1 = %s,
+                    blanc_recall = %s, blanc_precision = %s, blanc_f1 = %s
+                WHERE id = %s
+            """, (gold_dataset_id,) + evaluation_score_params(scores) + (evaluation_id,))
+            if document_counts:
+                cursor.execute(DOCUMENT_SCORES_UPSERT_SQL, (evaluation_id, encode_document_scores(document_counts)))
+            conn.commit()
+            conn.close()
+            return
+        except Exception as e:
+            logger.error(f"Error updating evaluation {evaluation_id} in database: {e}")
+            if conn:
+                conn.close()
+            raise
+    
+    # Update demo storage
+    for evaluation in DEMO_EVALUATIONS:
+        if evaluation['id'] == evaluation_id:
+            evaluation['gold_dataset_id'] = gold_dataset_id
+            evaluation['document_scores'] = document_counts
+            for metric in ['muc', 'bcub', 'ceafm', 'ceafe', 'blanc']:
+                evaluation[f'{metric}_f1'] = scores.get(metric, {}).get('f1')
+            return
+
+def run_rescore_job(job_id: str, language_id: int, gold_dataset: dict):
+    """Re-score every stored submission for a language against its current gold dataset
+
+    Each evaluation is updated as soon as it is scored and records the gold dataset
+    id, so an interrupted job can simply be started again and skips finished rows.
+    """
+    job = rescore_jobs[job_id]
+    
+    try:
+        pending = get_evaluations_to_rescore(language_id, gold_dataset['id'])
+        job['total'] = len(pending)
+        logger.info(f"RESCORE JOB {job_id}: {len(pending)} evaluations to rescore against {gold_dataset['file_path']}")
+        
+        check_scorer_environment()
+        with ThreadPoolExecutor(max_workers=RESCORE_WORKERS, thread_name_prefix="rescore") as pool:
+            futures = {
+                pool.submit(score_batch_member, f"rescore:{language_id}", gold_dataset['file_path'], evaluation['file_path']): evaluation
+                for evaluation in pending
+            }
+            for future in as_completed(futures):
+                evaluation = futures[future]
+                outcome = future.result()
+                try:
+                    if "error" in outcome:
+                        raise RuntimeError(outcome["error"])
+                    update_evaluation_scores(evaluation['id'], outcome['scores'], gold_dataset['id'], outcome['document_counts'])
+                    job['completed'] += 1
+                except Exception as e:
+                    job['failed'] += 1
+                    job['errors'].append({'evaluation_id': evaluation['id'], 'error': str(e)})
+        
+        job['status'] = 'completed'
+        leaderboard_feed.reset_language(language_id)
+        logger.info(f"RESCORE JOB {job_id} COMPLETE: {job['completed']} rescored, {job['failed']} failed")
+    except Exception as e:
+        job['status'] = 'failed'
+        job['errors'].append({'evaluation_id': None, 'error': getattr(e, 'detail', str(e))})
+        logger.exception(f"Error in rescore job {job_id}: {e}")
+    finally:
+        job['finished_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+@app.post("/admin/rescore/{language_id}", name="start_rescore")
+async def start_rescore(
+    request: Request,
+    language_id: int,
+    user: dict = Depends(get_current_user)
+):
+    """Start (or resume) rescoring all submissions for a language against its newest gold dataset"""
+    if user['username'] != 'admin':
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    gold_dataset = find_gold_dataset(language_id)
+    if not gold_dataset:
+        raise HTTPException(status_code=400, detail=f"No gold dataset found for language ID {language_id}")
+    
+    with rescore_jobs_lock:
+        # Only one job per language at a time - return the running one
+        for job in rescore_jobs.values():
+            if job['language_id'] == language_id and job['status'] == 'running':
+                return dict(job)
+        
+        job_id = secrets.token_hex(8)
+        rescore_jobs[job_id] = {
+            'job_id': job_id,
+            'language_id': language_id,
+            'gold_dataset_id': gold_dataset['id'],
+            'status': 'running',
+            'total': None,
+            'completed': 0,
+            'failed': 0,
+            'errors': [],
+            'started_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'finished_at': None
+        }
+        
+        if not rescore_job_pool.submit(run_rescore_job, job_id, language_id, gold_dataset):
+            del rescore_jobs[job_id]
+            raise HTTPException(
+                status_code=429,
+                detail=f"{RESCORE_MAX_JOBS} rescoring jobs are already running. Please retry when one has finished.",
+                headers={"Retry-After": "60"}
+            )
+    return dict(rescore_jobs[job_id])
+
+@app.get("/admin/rescore_jobs/{job_id}", name="rescore_job_status")
+async def rescore_job_status(job_id: str, user: dict = Depends(get_current_user)):
+    """Progress of a rescoring job"""
+    if user['username'] != 'admin':
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    job = rescore_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Rescore job not found")
+    return dict(job)
+
+@app.get("/admin/storage", name="submission_storage")
+async def submission_storage(user: dict = Depends(get_current_user)):
+    """Disk usage of stored submissions"""
+    if user['username'] != 'admin':
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return await run_in_threadpool(submission_storage_stats)
+
+@app.post("/admin/storage/maintenance", name="submission_storage_maintenance")
+async def submission_storage_maintenance(
+    archive_after_days: int = Form(None),
+    migrate_legacy: bool = Form(False),
+    user: dict = Depends(get_current_user)
+):
+    """Migrate plain uploads, archive old submissions and delete unreferenced ones"""
+    if user['username'] != 'admin':
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    if archive_after_days is None:
+        archive_after_days = SUBMISSION_ARCHIVE_AFTER_DAYS
+    if archive_after_days < 0:
+        raise HTTPException(status_code=400, detail="archive_after_days must be 0 (no archiving) or more")
+    
+    def maintain():
+        with maintenance_lock() as acquired:
+            if not acquired:
+                raise HTTPException(status_code=409, detail="Storage maintenance is already running")
+            migrated = migrate_legacy_uploads() if migrate_legacy else 0
+            archived = archive_old_submissions(archive_after_days) if archive_after_days else 0
+            return migrated, archived, collect_submission_garbage()
+    
+    migrated, archived, garbage = await run_in_threadpool(maintain)
+    
+    logger.info(f"Submission storage maintenance: {migrated} migrated, {archived} archived, {garbage['deleted']} deleted")
+    return {"success": True, "migrated": migrated, "archived": archived, **garbage}
+
+@contextmanager
+def maintenance_lock():
+    """Hold the shared storage maintenance lock if it is free; yields whether it was acquired"""
+    if fcntl is None:
+        acquired = maintenance_fallback_lock.acquire(blocking=False)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                maintenance_fallback_lock.release()
+        return
+    
+    MAINTENANCE_LOCK_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(MAINTENANCE_LOCK_PATH, 'a') as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        yield True
+
+def evict_expired_sessions() -> dict:
+    """Drop sessions past their expiry and finished background jobs nobody can still ask for"""
+    now = time.time()
+    expired = [token for token, expires in list(session_expiry.items()) if expires <= now]
+    for token in expired:
+        end_session(token)
+    
+    jobs = prune_evaluation_jobs()
+    with rescore_jobs_lock:
+        cutoff = (datetime.now() - timedelta(seconds=RESCORE_JOB_RETENTION)).strftime('%Y-%m-%d %H:%M:%S')
+        old_ids = [job_id for job_id, job in rescore_jobs.items() if job['finished_at'] and job['finished_at'] < cutoff]
+        for job_id in old_ids:
+            del rescore_jobs[job_id]
+    
+    return {'reclaimed': len(expired) + jobs + len(old_ids), 'sessions': len(expired), 'jobs': jobs + len(old_ids)}
+
+def path_size(path: Path) -> int:
+    if path.is_dir() and not path.is_symlink():
+        return sum(child.lstat().st_size for child in path.rglob('*') if not child.is_dir())
+    return path.lstat().st_size
+
+def sweep_temp_files() -> dict:
+    """Delete scorer temp files and partial store writes left behind by killed processes"""
+    cutoff = time.time() - TEMP_FILE_MAX_AGE_SECONDS
+    candidates = [path for path in Path(tempfile.gettempdir()).iterdir() if path.name.startswith(TEMP_FILE_PREFIXES)]
+    candidates.extend(SUBMISSION_STORE_DIR.glob('??/.tmp-*'))
+    deleted = 0
+    freed_bytes = 0
+    
+    for path in candidates:
+        try:
+            if path.lstat().st_mtime >= cutoff:
+                continue
+            size = path_size(path)
+            if path.is_dir() and not path.is_symlink():
+                shutil.rmtree(path)
+            else:
+                path.unlink()
+        except FileNotFoundError:
+            continue
+        deleted += 1
+        freed_bytes += size
+    
+    return {'reclaimed': deleted, 'freed_bytes': freed_bytes}
+
+def maintain_submission_storage() -> dict:
+    """Archive old submissions (when SUBMISSION_ARCHIVE_AFTER_DAYS is set) and delete unreferenced ones"""
+    archived = archive_old_submissions(SUBMISSION_ARCHIVE_AFTER_DAYS) if SUBMISSION_ARCHIVE_AFTER_DAYS else 0
+    garbage = collect_submission_garbage()
+    return {'reclaimed': garbage['deleted'], 'freed_bytes': garbage['freed_bytes'], 'archived': archived}
+
+def prune_gold_datasets() -> dict:
+    """Delete gold datasets superseded for GOLD_PRUNE_AFTER_DAYS that no evaluation or open scoring job uses"""
+    conn = get_db_connection()
+    if not conn:
+        raise HTTPException(status_code=503, detail="Database unavailable - gold dataset references cannot be checked")
+    
+    cutoff = datetime.now() - timedelta(days=GOLD_PRUNE_AFTER_DAYS)
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT id, language_id, file_path, created_at FROM gold_datasets ORDER BY language_id, created_at DESC, id DESC")
+        datasets = cursor.fetchall()
+        cursor.execute("SELECT DISTINCT gold_dataset_id FROM user_evaluations WHERE gold_dataset_id IS NOT NULL")
+        used_ids = {row['gold_dataset_id'] for row in cursor.fetchall()}
+        cursor.execute("SELECT DISTINCT gold_file_path FROM scoring_jobs WHERE status IN ('queued', 'running')")
+        used_paths = {os.path.normpath(row['gold_file_path']) for row in cursor.fetchall()}
+        
+        # Each dataset is superseded since its successor (the next newer one of its language) was uploaded
+        superseded = []
+        successor = None
+        for dataset in datasets:
+            if successor is not None and successor['language_id'] == dataset['language_id']:
+                if (GOLD_PRUNE_AFTER_DAYS and successor['created_at'] < cutoff and dataset['id'] not in used_ids
+                        and os.path.normpath(dataset['file_path']) not in used_paths):
+                    superseded.append(dataset)
+            successor = dataset
+        
+        for dataset in superseded:
+            cursor.execute("DELETE FROM gold_datasets WHERE id = %s", (dataset['id'],))
+        conn.commit()
+        conn.close()
+    except Exception:
+        conn.close()
+        raise
+    
+    freed_bytes = 0
+    for dataset in superseded:
+        path = Path(dataset['file_path'])
+        try:
+            freed_bytes += path.stat().st_size
+            path.unlink()
+        except FileNotFoundError:
+            pass
+    if superseded:
+        invalidate_reference_data()
+        logger.info(f"Pruned {len(superseded)} superseded gold dataset(s): {', '.join(str(dataset['id']) for dataset in superseded)}")
+    
+    return {'reclaimed': len(superseded), 'freed_bytes': freed_bytes}
+
+def prune_scoring_jobs() -> dict:
+    """Delete completed queue jobs after SCORING_JOB_RETENTION_DAYS; failed jobs stay for inspection"""
+    conn = get_db_connection()
+    if not conn:
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            "DELETE FROM scoring_jobs WHERE status = 'completed' AND finished_at < %s",
+            (datetime.now() - timedelta(days=SCORING_JOB_RETENTION_DAYS),)
+        )
+        deleted = cursor.rowcount
+        conn.commit()
+        conn.close()
+    except Exception:
+        conn.close()
+        raise
+    return {'reclaimed': deleted}
+
+def refresh_caches() -> dict:
+    """Reload the reference data ahead of requests and expire old error analyses"""
+    data = get_reference_data()
+    deleted = 0
+    if ERROR_ANALYSIS_CACHE_DAYS:
+        conn = get_db_connection()
+        if conn:
+            try:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM error_analysis_cache WHERE created_at < %s", (datetime.now() - timedelta(days=ERROR_ANALYSIS_CACHE_DAYS),))
+                deleted = cursor.rowcount
+                conn.commit()
+            except Exception as e:
+                logger.error(f"Error expiring error analyses: {e}")
+            conn.close()
+    return {'reclaimed': deleted, 'languages': len(data['languages']), 'gold_datasets': len(data['gold_datasets'])}
+
+class MaintenanceScheduler:
+    """Periodic housekeeping in a background thread, off the request path
+
+    Each task runs every `interval` seconds, first one interval after startup.
+    Exclusive tasks change storage shared by all processes and run under
+    maintenance_lock(); a process that finds the lock taken records the run as
+    skipped. Tasks return {'reclaimed': items, 'freed_bytes': bytes, ...}, which
+    feeds the maintenance metrics and GET /admin/maintenance.
+    """
+    
+    def __init__(self):
+        self.tasks = OrderedDict()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def add(self, name: str, function, interval: float, exclusive: bool = False):
+        self.tasks[name] = {
+            'function': function,
+            'interval': interval,
+            'exclusive': exclusive,
+            'next_run': None,
+            'last_run': None,
+            'last_outcome': None,
+            'last_result': None
+        }
+    
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        now = time.monotonic()
+        for task in self.tasks.values():
+            task['next_run'] = now + task['interval'] if task['interval'] > 0 else None
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="maintenance", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+    
+    def _run(self):
+        request_id_var.set('maintenance')
+        while True:
+            scheduled = [task['next_run'] for task in self.tasks.values() if task['next_run'] is not None]
+            if not scheduled or self._stop.wait(max(0, min(scheduled) - time.monotonic())):
+                return
+            for name, task in self.tasks.items():
+                if task['next_run'] is not None and task['next_run'] <= time.monotonic():
+                    self.run_task(name)
+                    task['next_run'] = time.monotonic() + task['interval']
+    
+    def run_task(self, name: str) -> dict:
+        """Run one task now and record its outcome"""
+        task = self.tasks[name]
+        try:
+            if task['exclusive']:
+                with maintenance_lock() as acquired:
+                    result = task['function']() if acquired else None
+            else:
+                result = task['function']()
+            outcome = 'ok' if result is not None else 'skipped'
+        except HTTPException as e:
+            logger.warning(f"Maintenance task {name} failed: {e.detail}")
+            outcome, result = 'error', {'error': e.detail}
+        except Exception as e:
+            logger.exception(f"Maintenance task {name} failed: {e}")
+            outcome, result = 'error', {'error': str(e)}
+        
+        maintenance_runs.inc(task=name, outcome=outcome)
+        if outcome == 'ok':
+            maintenance_reclaimed.inc(result.get('reclaimed', 0), task=name)
+            maintenance_reclaimed_bytes.inc(result.get('freed_bytes', 0), task=name)
+            if result.get('reclaimed'):
+                logger.info(f"Maintenance task {name}: {result}")
+        task.update(last_run=datetime.now().strftime('%Y-%m-%d %H:%M:%S'), last_outcome=outcome, last_result=result)
+        return {'task': name, 'outcome': outcome, **(result or {})}
+    
+    def status(self) -> list:
+        now = time.monotonic()
+        return [
+            {
+                'task': name,
+                'interval': task['interval'],
+                'exclusive': task['exclusive'],
+                'next_run_in': round(task['next_run'] - now) if task['next_run'] is not None else None,
+                'last_run': task['last_run'],
+                'last_outcome': task['last_outcome'],
+                'last_result': task['last_result']
+            }
+            for name, task in self.tasks.items()
+        ]
+
+maintenance_scheduler = MaintenanceScheduler()
+maintenance_scheduler.add('sessions', evict_expired_sessions, MAINTENANCE_SESSIONS_SECONDS)
+maintenance_scheduler.add('temp_files', sweep_temp_files, MAINTENANCE_TEMP_FILES_SECONDS)
+maintenance_scheduler.add('submissions', maintain_submission_storage, MAINTENANCE_STORAGE_SECONDS, exclusive=True)
+maintenance_scheduler.add('gold_datasets', prune_gold_datasets, MAINTENANCE_STORAGE_SECONDS, exclusive=True)
+maintenance_scheduler.add('scoring_jobs', prune_scoring_jobs, MAINTENANCE_STORAGE_SECONDS)
+maintenance_scheduler.add('caches', refresh_caches, MAINTENANCE_CACHES_SECONDS)
+GaugeCallback("coref_active_sessions", "Signed-in sessions held in memory", lambda: len(active_sessions))
+
+@app.on_event("startup")
+def start_maintenance():
+    maintenance_scheduler.start()
+
+@app.on_event("shutdown")
+def stop_maintenance():
+    maintenance_scheduler.stop()
+
+@app.get("/admin/maintenance", name="maintenance_status")
+async def maintenance_status(user: dict = Depends(get_current_user)):
+    """Schedule and last outcome of every background maintenance task"""
+    if user['username'] != 'admin':
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return {"tasks": maintenance_scheduler.status()}
+
+@app.post("/admin/maintenance/{task}", name="run_maintenance_task")
+async def run_maintenance_task(task: str, user: dict = Depends(get_current_user)):
+    """Run a background maintenance task now"""
+    if user['username'] != 'admin':
+        raise HTTPException(status_code=403, detail="Admin access required")
+    if task not in maintenance_scheduler.tasks:
+        raise HTTPException(status_code=404, detail=f"Unknown maintenance task: {task}")
+    return await run_in_threadpool(maintenance_scheduler.run_task, task)
+
+def frozen_campaign():
+    """Name of the campaign whose snapshot replaces the live homepage, or None"""
+    try:
+        return (SNAPSHOT_DIR / 'frozen').read_text(encoding='utf-8').strip() or None
+    except FileNotFoundError:
+        return None
+
+def write_snapshot_file(path: Path, data: bytes, precompress: bool = True):
+    """Replace a snapshot file atomically, with a gzip copy for proxies that serve precompressed files"""
+    files = [(path, data)]
+    if precompress:
+        files.append((path.with_name(path.name + '.gz'), gzip.compress(data, mtime=0)))
+    for target, content in files:
+        partial = target.with_name(target.name + '.partial')
+        partial.write_bytes(content)
+        os.replace(partial, target)
+
+def write_campaign_snapshot(request: Request, campaign: str) -> dict:
+    """Render the current leaderboards and statistics of a campaign to static JSON and HTML"""
+    stats = get_homepage_statistics()
+    leaderboards = get_language_leaderboards()
+    frozen_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    
+    snapshot_dir = SNAPSHOT_DIR / campaign
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    payload = {
+        'campaign': campaign,
+        'frozen_at': frozen_at,
+        'stats': stats,
+        'columns': LeaderboardRow._fields,
+        'leaderboards': leaderboards
+    }
+    write_snapshot_file(snapshot_dir / 'leaderboards.json', json.dumps(payload, separators=(',', ':')).encode())
+    
+    # The snapshot page has no live updates, as nothing changes after the freeze
+    html = templates.get_template("homepage.html").render({
+        "request": request,
+        "stats": stats,
+        "leaderboards": leaderboards,
+        "leaderboard_columns": LeaderboardRow._fields,
+        "frozen_campaign": campaign,
+        "frozen_at": frozen_at
+    })
+    write_snapshot_file(snapshot_dir / 'index.html', html.encode())
+    
+    return {
+        'campaign': campaign,
+        'frozen_at': frozen_at,
+        'evaluations': stats['total_evaluations'],
+        'url': str(request.url_for('campaigns', path=f'{campaign}/'))
+    }
+
+@app.get("/admin/campaigns", name="list_campaigns")
+async def list_campaigns(request: Request, user: dict = Depends(get_current_user)):
+    """Campaign snapshots on disk, and which one is served as the homepage"""
+    if user['username'] != 'admin':
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    live = frozen_campaign()
+    campaigns = []
+    for path in sorted(SNAPSHOT_DIR.glob('*/leaderboards.json')):
+        campaigns.append({
+            'campaign': path.parent.name,
+            'frozen_at': datetime.fromtimestamp(path.stat().st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
+            'url': str(request.url_for('campaigns', path=f'{path.parent.name}/')),
+            'homepage': path.parent.name == live
+        })
+    return {"frozen": live, "campaigns": campaigns}
+
+@app.post("/admin/campaigns/freeze", name="freeze_campaign")
+async def freeze_campaign(request: Request, campaign: str = Form(...), user: dict = Depends(get_current_user)):
+    """Snapshot the leaderboards of a finished campaign and serve the snapshot as the homepage"""
+    if user['username'] != 'admin':
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    campaign = campaign.strip().lower()
+    if not CAMPAIGN_NAME_RE.match(campaign):
+        raise HTTPException(status_code=400, detail="Campaign names use lowercase letters, digits, '.', '_' and '-' (at most 64)")
+    
+    snapshot = await run_in_threadpool(write_campaign_snapshot, request, campaign)
+    write_snapshot_file(SNAPSHOT_DIR / 'frozen', campaign.encode(), precompress=False)
+    
+    logger.info(f"Campaign {campaign} frozen with {snapshot['evaluations']} evaluations")
+    return {"success": True, **snapshot}
+
+@app.post("/admin/campaigns/unfreeze", name="unfreeze_campaign")
+async def unfreeze_campaign(user: dict = Depends(get_current_user)):
+    """Serve the live homepage again; snapshots stay available under /campaigns/"""
+    if user['username'] != 'admin':
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    campaign = frozen_campaign()
+    (SNAPSHOT_DIR / 'frozen').unlink(missing_ok=True)
+    
+    logger.info(f"Campaign {campaign} unfrozen, serving the live homepage")
+    return {"success": True, "campaign": campaign}
+
+def get_evaluation_with_documents(evaluation_id: int):
+    """Fetch an evaluation together with its stored per-document counts"""
+    conn = get_db_connection()
+    
+    if conn:
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute("""
+                SELECT ue.id, ue.user_id, ue.language_id, ue.gold_dataset_id, ue.uploaded_filename, ue.file_path, eds.counts
+                FROM user_evaluations ue
+                LEFT JOIN evaluation_document_scores eds ON eds.evaluation_id = ue.id
+                WHERE ue.id = %s
+            """, (evaluation_id,))
+            evaluation = cursor.fetchone()
+            conn.close()
+            if evaluation:
+                counts = evaluation.pop('counts')
+                evaluation['document_scores'] = decode_document_scores(counts) if counts else None
+            return evaluation
+        except Exception as e:
+            logger.error(f"Error fetching evaluation {evaluation_id}: {e}")
+            if conn:
+                conn.close()
+    
+    # Fallback to demo data
+    for evaluation in DEMO_EVALUATIONS:
+        if evaluation['id'] == evaluation_id:
+            return evaluation
+    return None
+
+def document_count_matrix(document_counts: dict, documents: list):
+    """Stack per-document counts into a (documents, components, 4) array"""
+    return np.array([
+        [document_counts[name][component] for component in DOCUMENT_SCORE_COMPONENTS]
+        for name in documents
+    ], dtype=np.float64)
+
+def f1_from_count_arrays(totals):
+    """Vectorized recall/precision F1 over (..., 4) count arrays, 0 where undefined"""
+    recall = np.divide(totals[..., 0], totals[..., 1], out=np.zeros(totals.shape[:-1]), where=totals[..., 1] > 0)
+    precision = np.divide(totals[..., 2], totals[..., 3], out=np.zeros(totals.shape[:-1]), where=totals[..., 3] > 0)
+    return np.divide(2 * precision * recall, precision + recall, out=np.zeros(recall.shape), where=(precision + recall) > 0)
+
+def bootstrap_metric_f1(totals) -> dict:
+    """F1 of each leaderboard metric and their average from (replicates, components, 4) totals"""
+    index = {component: i for i, component in enumerate(DOCUMENT_SCORE_COMPONENTS)}
+    coref = totals[:, index['blanc_coref']]
+    noncoref = totals[:, index['blanc_noncoref']]
+    
+    # BLANC averages both link types, or uses one alone when the key has no links of the other
+    has_coref = coref[:, 1] > 0
+    has_noncoref = noncoref[:, 1] > 0
+    f1_coref = f1_from_count_arrays(coref)
+    f1_noncoref = f1_from_count_arrays(noncoref)
+    blanc = np.where(has_coref & has_noncoref, (f1_coref + f1_noncoref) / 2,
+                     np.where(has_coref, f1_coref, np.where(has_noncoref, f1_noncoref, 0)))
+    
+    values = {
+        'muc': f1_from_count_arrays(totals[:, index['mentions']]),
+        'bcub': f1_coref,
+        'ceafm': f1_noncoref,
+        'blanc': blanc
+    }
+    values['avg_f1'] = (values['muc'] + values['bcub'] + values['ceafm'] + values['blanc']) / 4
+    return values
+
+def bootstrap_samples(matrices: list, replicates: int, seed: int) -> list:
+    """Resampled metric F1 for each count matrix, all using the same document draws
+
+    Each replicate draws documents with replacement as multinomial weights, so the
+    summed counts of a whole block of replicates are a single matrix product. Blocks
+    keep the weight matrix to about BOOTSTRAP_BLOCK_CELLS entries on large corpora.
+    """
+    n_documents = matrices[0].shape[0]
+    rng = np.random.default_rng(seed)
+    block = max(1, BOOTSTRAP_BLOCK_CELLS // n_documents)
+    flattened = [matrix.reshape(n_documents, -1) for matrix in matrices]
+    
+    blocks = [[] for _ in matrices]
+    for start in range(0, replicates, block):
+        size = min(block, replicates - start)
+        weights = rng.multinomial(n_documents, np.full(n_documents, 1 / n_documents), size=size).astype(np.float64)
+        for i, flat in enumerate(flattened):
+            totals = (weights @ flat).reshape(size, *matrices[i].shape[1:])
+            blocks[i].append(bootstrap_metric_f1(totals))
+    
+    return [
+        {metric: np.concatenate([values[metric] for values in matrix_blocks]) for metric in matrix_blocks[0]}
+        for matrix_blocks in blocks
+    ]
+
+def check_bootstrap_parameters(replicates: int, confidence: float):
+    if not 100 <= replicates <= BOOTSTRAP_MAX_REPLICATES:
+        raise HTTPException(status_code=400, detail=f"replicates must be between 100 and {BOOTSTRAP_MAX_REPLICATES}")
+    if not 0.5 <= confidence < 1:
+        raise HTTPException(status_code=400, detail="confidence must be between 0.5 and 1")
+
+def load_bootstrap_evaluation(evaluation_id: int, user: dict) -> dict:
+    """An evaluation with its per-document scores, visible only to its owner and the admin"""
+    evaluation = get_evaluation_with_documents(evaluation_id)
+    if not evaluation or (evaluation['user_id'] != user['id'] and user['username'] != 'admin'):
+        raise HTTPException(status_code=404, detail=f"Evaluation {evaluation_id} not found")
+    if not evaluation.get('document_scores'):
+        raise HTTPException(status_code=400, detail=f"Evaluation {evaluation_id} has no per-document scores. Rescore it to enable confidence intervals.")
+    return evaluation
+
+def bootstrap_confidence(evaluation_id: int, user: dict, replicates: int, confidence: float, seed: int) -> dict:
+    """Load an evaluation and resample its documents; blocking, so run it in the threadpool"""
+    evaluation = load_bootstrap_evaluation(evaluation_id, user)
+    
+    documents = sorted(evaluation['document_scores'])
+    matrix = document_count_matrix(evaluation['document_scores'], documents)
+    observed = bootstrap_metric_f1(matrix.sum(axis=0)[np.newaxis])
+    samples = bootstrap_samples([matrix], replicates, seed)[0]
+    
+    alpha = (1 - confidence) / 2
+    intervals = {
+        metric: {
+            'f1': float(observed[metric][0]),
+            'lower': float(np.quantile(values, alpha)),
+            'upper': float(np.quantile(values, 1 - alpha))
+        }
+        for metric, values in samples.items()
+    }
+    
+    return {
+        "evaluation_id": evaluation_id,
+        "documents": len(documents),
+        "replicates": replicates,
+        "confidence": confidence,
+        "intervals": intervals
+    }
+
+@app.get("/evaluation/{evaluation_id}/confidence", name="evaluation_confidence")
+async def evaluation_confidence(
+    evaluation_id: int,
+    replicates: int = BOOTSTRAP_REPLICATES,
+    confidence: float = 0.95,
+    seed: int = 0,
+    user: dict = Depends(get_current_user)
+):
+    """Bootstrap confidence intervals of a submission's F1 scores, resampling documents"""
+    check_bootstrap_parameters(replicates, confidence)
+    return await run_in_threadpool(bootstrap_confidence, evaluation_id, user, replicates, confidence, seed)
+
+def bootstrap_comparison(evaluation_a: int, evaluation_b: int, user: dict, replicates: int, confidence: float, seed: int) -> dict:
+    """Paired bootstrap test of the F1 difference between two submissions for the same gold data
+
+    Both submissions are resampled with the same document draws. The p-value is two-sided:
+    the share of replicates whose difference, centred on the observed one, is at least as
+    extreme as the observed difference. Blocking, so run it in the threadpool.
+    """
+    first = load_bootstrap_evaluation(evaluation_a, user)
+    second = load_bootstrap_evaluation(evaluation_b, user)
+    
+    if first['language_id'] != second['language_id'] or first.get('gold_dataset_id') != second.get('gold_dataset_id'):
+        raise HTTPException(status_code=400, detail="Evaluations were not scored against the same gold dataset")
+    
+    documents = sorted(first['document_scores'])
+    if documents != sorted(second['document_scores']):
+        raise HTTPException(status_code=400, detail="Evaluations do not cover the same documents")
+    
+    matrix_a = document_count_matrix(first['document_scores'], documents)
+    matrix_b = document_count_matrix(second['document_scores'], documents)
+    
+    observed_a = bootstrap_metric_f1(matrix_a.sum(axis=0)[np.newaxis])
+    observed_b = bootstrap_metric_f1(matrix_b.sum(axis=0)[np.newaxis])
+    samples_a, samples_b = bootstrap_samples([matrix_a, matrix_b], replicates, seed)
+    
+    alpha = (1 - confidence) / 2
+    differences = {}
+    for metric in samples_a:
+        observed = float(observed_a[metric][0] - observed_b[metric][0])
+        deltas = samples_a[metric] - samples_b[metric]
+        differences[metric] = {
+            'f1_a': float(observed_a[metric][0]),
+            'f1_b': float(observed_b[metric][0]),
+            'difference': observed,
+            'lower': float(np.quantile(deltas, alpha)),
+            'upper': float(np.quantile(deltas, 1 - alpha)),
+            'p_value': float(np.mean(np.abs(deltas - observed) >= abs(observed) - 1e-12))
+        }
+    
+    return {
+        "evaluation_a": evaluation_a,
+        "evaluation_b": evaluation_b,
+        "documents": len(documents),
+        "replicates": replicates,
+        "confidence": confidence,
+        "metrics": differences
+    }
+
+@app.get("/compare/{evaluation_a}/{evaluation_b}", name="compare_evaluations")
+async def compare_evaluations(
+    evaluation_a: int,
+    evaluation_b: int,
+    replicates: int = BOOTSTRAP_REPLICATES,
+    confidence: float = 0.95,
+    seed: int = 0,
+    user: dict = Depends(get_current_user)
+):
+    """Paired bootstrap test of the F1 difference between two of the user's submissions"""
+    check_bootstrap_parameters(replicates, confidence)
+    return await run_in_threadpool(bootstrap_comparison, evaluation_a, evaluation_b, user, replicates, confidence, seed)
+
+def parse_chain_spans(field: str) -> list:
+    """'3,3 10,12' -> [(3, 3), (10, 12)]"""
+    return [tuple(int(value) for value in span.split(',')) for span in field.split(' ')]
+
+def run_chain_scorer(gold_path: str, system_path: str, metrics: str = 'chains'):
+    """Key and response chains of every gold document as CorScorer parses them, plus any per-document counts
+
+    Returns ({document: {'key': [chain, ...], 'response': [chain, ...]}}, {document: {component: counts}}),
+    each chain a list of (first token, last token) spans.
+    """
+    result = run_scorer_script("doc_scorer.pl", [metrics, gold_path, system_path])
+    
+    chains = {}
+    document_counts = {}
+    with stage_duration.time(stage='parse'):
+        for line in result.stdout.splitlines():
+            fields = line.split('\t')
+            if len(fields) == 4 and fields[0] == 'CHAIN':
+                chains.setdefault(fields[1], {'key': [], 'response': []})[fields[2]].append(parse_chain_spans(fields[3]))
+            elif len(fields) == 7 and fields[0] == 'DOC':
+                document_counts.setdefault(fields[1], {})[fields[2]] = [float(value) for value in fields[3:]]
+    return chains, document_counts
+
+def analyze_document_errors(key_chains: list, response_chains: list) -> dict:
+    """Mention and chain errors of one document
+
+    Mentions match on exact boundaries, as in CorScorer::IdentifMentions. A key chain is
+    split when its detected mentions are spread over several response chains, and a
+    response chain is merged when it joins mentions of several key chains.
+    """
+    key_entity = {span: index for index, chain in enumerate(key_chains) for span in chain}
+    response_entity = {span: index for index, chain in enumerate(response_chains) for span in chain}
+    
+    split_chains = []
+    for chain in key_chains:
+        pieces = sorted({response_entity[span] for span in chain if span in response_entity})
+        if len(pieces) > 1:
+            split_chains.append({'key_chain': sorted(chain), 'response_chains': [sorted(response_chains[i]) for i in pieces]})
+    
+    merged_chains = []
+    for chain in response_chains:
+        sources = sorted({key_entity[span] for span in chain if span in key_entity})
+        if len(sources) > 1:
+            merged_chains.append({'response_chain': sorted(chain), 'key_chains': [sorted(key_chains[i]) for i in sources]})
+    
+    return {
+        'key_mentions': len(key_entity),
+        'response_mentions': len(response_entity),
+        'missed_mentions': sorted(span for span in key_entity if span not in response_entity),
+        'spurious_mentions': sorted(span for span in response_entity if span not in key_entity),
+        'split_chains': split_chains,
+        'merged_chains': merged_chains
+    }
+
+def compute_error_analysis(gold_path: str, system_path: str, document_counts: dict = None) -> dict:
+    """Per-document scores and errors of a submission, with totals over all documents
+
+    Stored per-document counts are reused when given; otherwise they are computed in the
+    same scorer run that prints the chains.
+    """
+    metrics = 'chains' if document_counts else 'muc,bcub,ceafm,ceafe,blanc,chains'
+    chains, fresh_counts = run_chain_scorer(gold_path, system_path, metrics)
+    document_counts = document_counts or fresh_counts
+    
+    documents = []
+    for name in sorted(fresh_counts):
+        document_chains = chains.get(name, {'key': [], 'response': []})
+        entry = {'document': name, 'scores': scores_from_document_counts({name: document_counts[name]}) if name in document_counts else None}
+        entry.update(analyze_document_errors(document_chains['key'], document_chains['response']))
+        documents.append(entry)
+    
+    summary = {'documents': len(documents)}
+    for field in ('key_mentions', 'response_mentions'):
+        summary[field] = sum(entry[field] for entry in documents)
+    for field in ('missed_mentions', 'spurious_mentions', 'split_chains', 'merged_chains'):
+        summary[field] = sum(len(entry[field]) for entry in documents)
+    return {'summary': summary, 'documents': documents}
+
+def file_sha256(file) -> str:
+    """SHA-256 of a binary stream, read in chunks"""
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: file.read(1024 * 1024), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+def load_cached_error_analysis(key: tuple):
+    """A cached analysis for (gold hash, submission hash) and where it came from, or (None, None)"""
+    with error_analysis_memo_lock:
+        if key in error_analysis_memo:
+            error_analysis_memo.move_to_end(key)
+            return error_analysis_memo[key], 'memory'
+    
+    conn = get_db_connection()
+    if not conn:
+        return None, None
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT analysis FROM error_analysis_cache WHERE gold_hash = %s AND response_hash = %s", key)
+        row = cursor.fetchone()
+        conn.close()
+    except Exception as e:
+        logger.error(f"Error loading error analysis cache: {e}")
+        conn.close()
+        return None, None
+    
+    if not row:
+        return None, None
+    analysis = json.loads(zlib.decompress(row[0]))
+    remember_error_analysis(key, analysis)
+    return analysis, 'database'
+
+def remember_error_analysis(key: tuple, analysis: dict):
+    with error_analysis_memo_lock:
+        error_analysis_memo[key] = analysis
+        error_analysis_memo.move_to_end(key)
+        while len(error_analysis_memo) > ERROR_ANALYSIS_MEMO_SIZE:
+            error_analysis_memo.popitem(last=False)
+
+def store_error_analysis(key: tuple, analysis: dict):
+    remember_error_analysis(key, analysis)
+    
+    conn = get_db_connection()
+    if conn:
+        try:
+            with stage_duration.time(stage='db_write'):
+                cursor = conn.cursor()
+                cursor.execute(
+                    "INSERT INTO error_analysis_cache (gold_hash, response_hash, analysis) VALUES (%s, %s, %s)",
+                    (*key, zlib.compress(json.dumps(analysis, separators=(',', ':')).encode()))
+                )
+                conn.commit()
+            conn.close()
+        except Exception as e:
+            # A concurrent request may have stored the same analysis first
+            logger.error(f"Error storing error analysis: {e}")
+            conn.close()
+
+def evaluation_error_analysis(evaluation: dict, owner) -> dict:
+    """The error analysis of an evaluation, computed against its gold dataset on first request"""
+    gold_dataset = next(
+        (dataset for dataset in get_reference_data()['gold_datasets'] if dataset['id'] == evaluation.get('gold_dataset_id')), None
+    )
+    if not gold_dataset:
+        raise HTTPException(status_code=400, detail="The gold dataset of this evaluation is no longer available")
+    gold_path = os.path.abspath(gold_dataset['file_path'])
+    
+    try:
+        with open(gold_path, 'rb') as f:
+            gold_hash = file_sha256(f)
+        response_hash = submission_digest(evaluation['file_path'])
+        if response_hash is None:
+            with open_submission(evaluation['file_path']) as f:
+                response_hash = file_sha256(f)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    key = (gold_hash, response_hash)
+    analysis, source = load_cached_error_analysis(key)
+    if analysis is None:
+        check_scorer_environment()
+        with scoring_governor.slot(owner):
+            with materialized_submission(evaluation['file_path']) as system_path:
+                analysis = compute_error_analysis(gold_path, os.path.abspath(system_path), evaluation.get('document_scores'))
+        store_error_analysis(key, analysis)
+        source = 'computed'
+    error_analyses.inc(source=source)
+    return analysis
+
+@app.get("/evaluation/{evaluation_id}/errors", name="evaluation_errors")
+async def evaluation_errors(evaluation_id: int, document: str = None, user: dict = Depends(get_current_user)):
+    """Missed and spurious mentions, split and merged chains and per-document scores of a submission"""
+    evaluation = await run_in_threadpool(get_evaluation_with_documents, evaluation_id)
+    if not evaluation or (evaluation['user_id'] != user['id'] and user['username'] != 'admin'):
+        raise HTTPException(status_code=404, detail=f"Evaluation {evaluation_id} not found")
+    
+    analysis = await run_in_threadpool(evaluation_error_analysis, evaluation, user['id'])
+    documents = analysis['documents']
+    if document is not None:
+        documents = [entry for entry in documents if entry['document'] == document]
+        if not documents:
+            raise HTTPException(status_code=404, detail=f"Document {document} not found in the gold dataset")
+    
+    return {"evaluation_id": evaluation_id, "summary": analysis['summary'], "documents": documents}
+
+@app.get("/metrics", name="metrics")
+async def metrics(request: Request):
+    """Prometheus metrics in the text exposition format"""
+    if METRICS_TOKEN and not secrets.compare_digest(request.headers.get('Authorization', ''), f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+def list_request_profiles() -> list:
+    """Stored profiles, newest first, without their stacks"""
+    with request_profiles_lock:
+        profiles = list(request_profiles.values())
+    return [{key: value for key, value in profile.items() if key != 'collapsed'} for profile in reversed(profiles)]
+
+@app.get("/admin/profiles", name="request_profiles")
+async def request_profiles_index(user: dict = Depends(get_current_user)):
+    if user['username'] != 'admin':
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return {"profiles": list_request_profiles()}
+
+@app.get("/admin/profiles/{profile_id}", name="download_request_profile")
+async def download_request_profile(profile_id: str, user: dict = Depends(get_current_user)):
+    """Collapsed stacks of one profile, ready for flamegraph.pl or speedscope"""
+    if user['username'] != 'admin':
+        raise HTTPException(status_code=403, detail="Admin access required")
+    with request_profiles_lock:
+        profile = request_profiles.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return Response(
+        profile['collapsed'],
+        media_type="text/plain; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.collapsed"'}
+    )
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,115 @@
+#!/usr/bin/perl
+
+BEGIN {
+	push(@INC, './lib');
+}
+
+use strict;
+use File::Spec;
+use CorScorer;
+
+# Per-document scorer. Runs the same CorScorer routines as scorer.pl but
+# prints the raw counts of every document instead of the totals, so that
+# callers can cache them per document and re-aggregate.
+
+if (@ARGV < 3) {
+	print q|
+use: doc_scorer.pl <metrics> <keys_file> <response_file> [documents_file]
+
+	metrics: comma separated list of muc, bcub, ceafm, ceafe, blanc or "all".
+		"chains" additionally prints the parsed chains for error analysis.
+
+	keys_file: file with expected coreference chains in SemEval format
+
+	response_file: file with output of coreference system (SemEval format)
+
+	documents_file: [optional] file with one document name per line. If
+		given, only those documents are scored.
+
+Output: one tab separated line per document and count group
+
+	DOC <name> mentions <recall_num> <recall_den> <precision_num> <precision_den>
+	DOC <name> <metric> <recall_num> <recall_den> <precision_num> <precision_den>
+
+BLANC is reported as two groups, blanc_coref and blanc_noncoref.
+
+With "chains", every key and response entity is printed as one line of
+mention spans (first and last token line of the document, counted as
+CorScorer counts them):
+
+	CHAIN <name> <key or response> <start>,<end> <start>,<end> ...
+
+|;
+	exit;
+}
+
+my ($metrics, $kFile, $rFile, $docsFile) = @ARGV;
+my @metrics = ($metrics eq 'all') ? ('muc', 'bcub', 'ceafm', 'ceafe', 'blanc') : split(/,/, $metrics);
+my $chains = grep { $_ eq 'chains' } @metrics;
+@metrics = grep { $_ ne 'chains' } @metrics;
+foreach my $m (@metrics) {
+	if ($m !~ /^(muc|bcub|ceafm|ceafe|blanc)$/) {
+		print "Invalid metric $m\n";
+		exit 1;
+	}
+}
+
+# CorScorer prints per-document details while its file-scoped $VERBOSE is
+# set. Score() clears it when asked for the "none" document, so score an
+# empty pair once with the output discarded.
+{
+	open(my $null, '>', File::Spec->devnull) || die "Can not open null device: $!";
+	my $stdout = select($null);
+	CorScorer::Score('muc', File::Spec->devnull, File::Spec->devnull, 'none');
+	select($stdout);
+	close($null);
+}
+
+my $kIndexNames = CorScorer::GetFileNames($kFile);
+my $rIndexNames = CorScorer::GetFileNames($rFile);
+
+my @names = sort(keys(%{$kIndexNames}));
+if (defined($docsFile)) {
+	my %wanted;
+	open(D, $docsFile) || die "Can not open $docsFile: $!";
+	while (my $l = <D>) {
+		chomp($l);
+		$wanted{$l} = 1 if ($l ne '');
+	}
+	close(D);
+	@names = grep { $wanted{$_} } @names;
+}
+
+$| = 1;
+foreach my $name (@names) {
+	my $keys = CorScorer::GetCoreference($kFile, -1, $name, $kIndexNames->{$name});
+	my $response = CorScorer::GetCoreference($rFile, -1, $name, $rIndexNames->{$name});
+
+	if ($chains) {
+		foreach my $side (['key', $keys], ['response', $response]) {
+			foreach my $entity (@{$side->[1]}) {
+				next if (!defined($entity) || !@$entity);
+				print join("\t", 'CHAIN', $name, $side->[0], join(' ', map { "$_->[0],$_->[1]" } @$entity)), "\n";
+			}
+		}
+	}
+
+	my %idenTotals = (recallDen => 0, recallNum => 0, precisionDen => 0, precisionNum => 0);
+	my ($keyChains, $responseChains) = CorScorer::IdentifMentions($keys, $response, \%idenTotals);
+	print join("\t", 'DOC', $name, 'mentions', $idenTotals{recallNum}, $idenTotals{recallDen},
+			   $idenTotals{precisionNum}, $idenTotals{precisionDen}), "\n";
+
+	foreach my $metric (@metrics) {
+		# Score() identifies mentions afresh for every metric, do the same
+		($keyChains, $responseChains) = CorScorer::IdentifMentions($keys, $response);
+		if ($metric eq 'blanc') {
+			my @counts = CorScorer::BLANC($keyChains, $responseChains);
+			print join("\t", 'DOC', $name, 'blanc_coref', @counts[0..3]), "\n";
+			print join("\t", 'DOC', $name, 'blanc_noncoref', @counts[4..7]), "\n";
+		}
+		else {
+			my @counts = CorScorer::Eval($metric, $keyChains, $responseChains);
+			print join("\t", 'DOC', $name, $metric, @counts), "\n";
+		}
+	}
+}
@@ -0,0 +1,361 @@
+"""Running the Perl scorer and parsing its output
+
+Shared by the web application (main.py), the job worker and the batch_score
+command line tool. Nothing here touches the database, the upload directories or
+the web framework's app object, so importing it has no side effects.
+"""
+
+import logging
+import os
+import platform
+import re
+import signal
+import subprocess
+import threading
+from pathlib import Path
+
+from fastapi import HTTPException
+
+from metrics import Counter, stage_duration, profile_child_process
+
+logger = logging.getLogger("coref_eval")
+
+# Per-process limits applied to every scorer run
+SCORER_CPU_LIMIT = int(os.getenv('SCORER_CPU_LIMIT', '110'))
+SCORER_MEMORY_LIMIT_MB = int(os.getenv('SCORER_MEMORY_LIMIT_MB', '2048'))
+
+scorer_failures = Counter("coref_scorer_failures_total", "Scorer runs that failed, by reason", ("reason",))
+scorer_timeouts = Counter("coref_scorer_timeouts_total", "Scorer runs killed by the wall clock timeout")
+
+def check_perl_availability():
+    """Check if Perl is available on the system"""
+    try:
+        result = subprocess.run(['perl', '-v'], capture_output=True, text=True, timeout=5)
+        return result.returncode == 0
+    except (subprocess.SubprocessError, FileNotFoundError):
+        return False
+
+def check_perl_dependencies():
+    """Check if required Perl modules are available"""
+    required_modules = [
+        'Math::Combinatorics',
+        'Algorithm::Munkres'
+    ]
+    
+    missing_modules = []
+    
+    for module in required_modules:
+        try:
+            result = subprocess.run([
+                'perl', '-e', f'use {module}; print "OK";'
+            ], capture_output=True, text=True, timeout=10)
+            
+            if result.returncode != 0:
+                missing_modules.append(module)
+        except:
+            missing_modules.append(module)
+    
+    return missing_modules
+
+def check_scorer_environment():
+    """Check the scorer files, Perl and required Perl modules - raises HTTPException if anything is missing"""
+    with stage_duration.time(stage='validation'):
+        scorer_script = Path("scorer") / "scorer.pl"
+        
+        if not scorer_script.exists():
+            raise HTTPException(status_code=400, detail="Scorer script not found. Please upload scorer.pl through admin panel.")
+        
+        # Check if Perl is available - FAIL if not found
+        if not check_perl_availability():
+            raise HTTPException(status_code=400, detail="Perl not installed. Please install Perl from https://strawberryperl.com/ and restart the server.")
+        
+        # Check for required Perl modules
+        corscore_pm = Path("scorer") / "CorScorer.pm"
+        if not corscore_pm.exists():
+            raise HTTPException(status_code=400, detail="CorScorer.pm module not found in scorer directory. Please upload the complete CorScorer package.")
+        
+        # Check Perl dependencies
+        missing_modules = check_perl_dependencies()
+        if missing_modules:
+            module_list = ", ".join(missing_modules)
+            install_commands = "\n".join([f"cpan install {module}" for module in missing_modules])
+            raise HTTPException(
+                status_code=400, 
+                detail=f"Missing required Perl modules: {module_list}. Install them using:\n{install_commands}"
+            )
+
+def run_streaming_process(command: list, timeout: float, on_line, **kwargs) -> subprocess.CompletedProcess:
+    """Run a command, passing each stdout line to on_line as soon as it is printed"""
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, **kwargs)
+    timed_out = threading.Event()
+    
+    def kill_on_timeout():
+        timed_out.set()
+        process.kill()
+    
+    timer = threading.Timer(timeout, kill_on_timeout)
+    stderr_chunks = []
+    stderr_reader = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+    timer.start()
+    stderr_reader.start()
+    
+    stdout_lines = []
+    try:
+        for line in process.stdout:
+            stdout_lines.append(line)
+            on_line(line)
+        process.wait()
+    except BaseException:
+        process.kill()
+        process.wait()
+        raise
+    finally:
+        timer.cancel()
+        stderr_reader.join()
+    
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(command, timeout)
+    return subprocess.CompletedProcess(command, process.returncode, "".join(stdout_lines), "".join(stderr_chunks))
+
+def run_scorer_script(script_name: str, args: list, on_line=None) -> subprocess.CompletedProcess:
+    """Run a Perl script from the scorer directory, raising HTTPException if it fails
+
+    If on_line is given, it is called with every stdout line while the script runs.
+    """
+    scorer_path = os.path.abspath(Path("scorer") / script_name)
+    scorer_dir = os.path.dirname(scorer_path)
+    
+    try:
+        logger.debug("Executing perl %s %s in %s", scorer_path, " ".join(f'"{arg}"' for arg in args), scorer_dir)
+        
+        # Run the perl script with proper library path
+        env = os.environ.copy()
+        # Add scorer directory to Perl's library path
+        if 'PERL5LIB' in env:
+            env['PERL5LIB'] = f"{scorer_dir}{os.pathsep}{env['PERL5LIB']}"
+        else:
+            env['PERL5LIB'] = scorer_dir
+            
+        command = ['perl', '-I', scorer_dir, scorer_path] + args
+        if platform.system() != 'Windows':
+            # Apply CPU time and address space limits in a shell that then execs perl
+            command = ['/bin/sh', '-c',
+                       f'ulimit -t {SCORER_CPU_LIMIT} && ulimit -v {SCORER_MEMORY_LIMIT_MB * 1024} && exec "$0" "$@"'] + command
+        
+        with stage_duration.time(stage='scorer'), profile_child_process(f"perl {script_name}"):
+            if on_line:
+                result = run_streaming_process(command, 120, on_line, cwd=scorer_dir, env=env)
+            else:
+                result = subprocess.run(command, capture_output=True, text=True, timeout=120, cwd=scorer_dir, env=env)
+        
+        # Raw output can run to megabytes, so it is only formatted when debug logging is on
+        logger.debug("%s stdout:\n%s", script_name, result.stdout)
+        if result.stderr:
+            logger.debug("%s stderr:\n%s", script_name, result.stderr)
+        
+        if result.returncode != 0:
+            error_msg = f"Perl script failed with exit code {result.returncode}."
+            reason = 'exit_code'
+            
+            if result.returncode in (-signal.SIGKILL, -getattr(signal, 'SIGXCPU', signal.SIGKILL)):
+                error_msg = f"Scorer exceeded the CPU time limit ({SCORER_CPU_LIMIT} seconds)"
+                reason = 'cpu_limit'
+            elif "Out of memory" in result.stderr:
+                error_msg = f"Scorer exceeded the memory limit ({SCORER_MEMORY_LIMIT_MB} MB)"
+                reason = 'memory_limit'
+            elif "Can't locate Math/Combinatorics.pm" in result.stderr:
+                error_msg = "Missing Math::Combinatorics module. Install with: cpan install Math::Combinatorics"
+                reason = 'missing_module'
+            elif "Can't locate Algorithm/Munkres.pm" in result.stderr:
+                error_msg = "Missing Algorithm::Munkres module. Install with: cpan install Algorithm::Munkres"
+                reason = 'missing_module'
+            elif "Can't locate" in result.stderr:
+                error_msg += " Missing Perl modules. Please install required dependencies."
+                reason = 'missing_module'
+            elif result.stderr:
+                error_msg += f" Error: {result.stderr}"
+            
+            scorer_failures.inc(reason=reason)
+            logger.error("%s failed with exit code %s (%s)", script_name, result.returncode, reason, extra={'stderr': result.stderr[-2000:]})
+            raise HTTPException(status_code=400, detail=error_msg)
+        
+        return result
+    
+    except subprocess.TimeoutExpired:
+        scorer_timeouts.inc()
+        scorer_failures.inc(reason='timeout')
+        logger.error("%s timed out after 120 seconds", script_name)
+        raise HTTPException(status_code=400, detail="Perl script execution timeout (>120 seconds)")
+    except subprocess.CalledProcessError as e:
+        scorer_failures.inc(reason='exit_code')
+        raise HTTPException(status_code=400, detail=f"Perl script execution failed: {e}")
+    except FileNotFoundError:
+        scorer_failures.inc(reason='perl_not_found')
+        raise HTTPException(status_code=400, detail="Perl command not found. Please install Perl and restart the server.")
+
+def run_perl_scorer(gold_file_path: str, system_file_path: str, check_environment: bool = True) -> dict:
+    """Execute the Perl scorer script and parse results - NO DEMO FALLBACK
+
+    Batch callers check the environment once up front and pass check_environment=False
+    to avoid re-spawning the Perl probes for every file.
+    """
+    if check_environment:
+        check_scorer_environment()
+    
+    try:
+        # Convert paths to absolute paths to avoid issues
+        gold_path = os.path.abspath(gold_file_path)
+        system_path = os.path.abspath(system_file_path)
+        
+        # Verify files exist
+        if not os.path.exists(gold_path):
+            raise HTTPException(status_code=400, detail=f"Gold dataset file not found: {gold_path}")
+        if not os.path.exists(system_path):
+            raise HTTPException(status_code=400, detail=f"System file not found: {system_path}")
+        
+        result = run_scorer_script("scorer.pl", ['all', gold_path, system_path])
+        
+        # Parse the output to extract scores
+        with stage_duration.time(stage='parse'):
+            scores = parse_scorer_output(result.stdout)
+        
+        if not scores:
+            raise HTTPException(status_code=400, detail=f"Could not parse scorer output. Raw output: {result.stdout}")
+        
+        logger.debug(f"PARSED SCORES: {scores}")
+        return scores
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error running scorer: {str(e)}")
+
+def percent_fraction(percent: str) -> float:
+    """A percentage printed by the scorer as a fraction, rounded to the 4 decimals ShowRPF prints"""
+    return round(float(percent) / 100, 4)
+
+def parse_scorer_output(output: str) -> dict:
+    """Parse the Perl scorer output to extract metrics"""
+    scores = {}
+    
+    if not output or output.strip() == "":
+        return {}
+    
+    try:
+        logger.debug("Raw scorer output: %r", output)
+        
+        # Parse the specific format from your scorer
+        lines = output.split('\n')
+        
+        for line in lines:
+            line = line.strip()
+            
+            # Parse Identification of Mentions (this is like MUC)
+            if "Identification of Mentions:" in line:
+                # Format: "Identification of Mentions: Recall: (291 / 291) 100%      Precision: (291 / 291) 100%     F1: 100%"
+                recall_match = re.search(r'Recall:\s*\([^)]+\)\s*([\d.]+)%', line)
+                precision_match = re.search(r'Precision:\s*\([^)]+\)\s*([\d.]+)%', line)
+                f1_match = re.search(r'F1:\s*([\d.]+)%', line)
+                
+                if recall_match and precision_match and f1_match:
+                    scores['muc'] = {
+                        'recall': percent_fraction(recall_match.group(1)),
+                        'precision': percent_fraction(precision_match.group(1)),
+                        'f1': percent_fraction(f1_match.group(1))
+                    }
+                    logger.debug(f"PARSED MUC (Identification): R={scores['muc']['recall']}, P={scores['muc']['precision']}, F1={scores['muc']['f1']}")
+            
+            # Parse Coreference links (this is like B-CUBED)
+            elif "Coreference links:" in line:
+                # Format: "Coreference links: Recall: (602 / 602) 100%       Precision: (602 / 602) 100%     F1: 100%"
+                recall_match = re.search(r'Recall:\s*\([^)]+\)\s*([\d.]+)%', line)
+                precision_match = re.search(r'Precision:\s*\([^)]+\)\s*([\d.]+)%', line)
+                f1_match = re.search(r'F1:\s*([\d.]+)%', line)
+                
+                if recall_match and precision_match and f1_match:
+                    scores['bcub'] = {
+                        'recall': percent_fraction(recall_match.group(1)),
+                        'precision': percent_fraction(precision_match.group(1)),
+                        'f1': percent_fraction(f1_match.group(1))
+                    }
+                    logger.debug(f"PARSED B-CUBED (Coreference): R={scores['bcub']['recall']}, P={scores['bcub']['precision']}, F1={scores['bcub']['f1']}")
+            
+            # Parse Non-coreference links (additional metric)
+            elif "Non-coreference links:" in line:
+                # Format: "Non-coreference links: Recall: (3200 / 3200) 100% Precision: (3200 / 3200) 100%   F1: 100%"
+                recall_match = re.search(r'Recall:\s*\([^)]+\)\s*([\d.]+)%', line)
+                precision_match = re.search(r'Precision:\s*\([^)]+\)\s*([\d.]+)%', line)
+                f1_match = re.search(r'F1:\s*([\d.]+)%', line)
+                
+                if recall_match and precision_match and f1_match:
+                    scores['ceafm'] = {
+                        'recall': percent_fraction(recall_match.group(1)),
+                        'precision': percent_fraction(precision_match.group(1)),
+                        'f1': percent_fraction(f1_match.group(1))
+                    }
+                    logger.debug(f"PARSED CEAF-M (Non-coreference): R={scores['ceafm']['recall']}, P={scores['ceafm']['precision']}, F1={scores['ceafm']['f1']}")
+            
+            # Parse BLANC
+            elif "BLANC:" in line:
+                # Format: "BLANC: Recall: (1 / 1) 100%       Precision: (1 / 1) 100% F1: 100%"
+                recall_match = re.search(r'Recall:\s*\([^)]+\)\s*([\d.]+)%', line)
+                precision_match = re.search(r'Precision:\s*\([^)]+\)\s*([\d.]+)%', line)
+                f1_match = re.search(r'F1:\s*([\d.]+)%', line)
+                
+                if recall_match and precision_match and f1_match:
+                    scores['blanc'] = {
+                        'recall': percent_fraction(recall_match.group(1)),
+                        'precision': percent_fraction(precision_match.group(1)),
+                        'f1': percent_fraction(f1_match.group(1))
+                    }
+                    logger.debug(f"PARSED BLANC: R={scores['blanc']['recall']}, P={scores['blanc']['precision']}, F1={scores['blanc']['f1']}")
+            
+            # Also try to parse any standard CoNLL format that might be in the output
+            elif re.search(r'MUC.*?Recall:.*?Precision:.*?F1:', line, re.IGNORECASE):
+                recall_match = re.search(r'Recall:\s*([\d.]+)', line)
+                precision_match = re.search(r'Precision:\s*([\d.]+)', line)
+                f1_match = re.search(r'F1:\s*([\d.]+)', line)
+                
+                if recall_match and precision_match and f1_match:
+                    if 'muc' not in scores:  # Don't overwrite if already parsed
+                        scores['muc'] = {
+                            'recall': float(recall_match.group(1)),
+                            'precision': float(precision_match.group(1)),
+                            'f1': float(f1_match.group(1))
+                        }
+                        logger.debug(f"PARSED MUC (standard): R={scores['muc']['recall']}, P={scores['muc']['precision']}, F1={scores['muc']['f1']}")
+        
+        # If we didn't find any metrics, try alternative parsing
+        if not scores:
+            logger.debug("No standard metrics found, trying alternative patterns...")
+            
+            # Look for percentage patterns
+            percentage_lines = [line for line in lines if '%' in line and ('Recall' in line or 'Precision' in line)]
+            for line in percentage_lines:
+                logger.debug(f"PERCENTAGE LINE: {line}")
+                
+                # Try to extract any three consecutive percentages
+                percentages = re.findall(r'([\d.]+)%', line)
+                if len(percentages) >= 3:
+                    try:
+                        recall = percent_fraction(percentages[0])
+                        precision = percent_fraction(percentages[1])
+                        f1 = percent_fraction(percentages[2])
+                        
+                        # Assign to a generic metric if we don't have any
+                        if not scores:
+                            scores['overall'] = {
+                                'recall': recall,
+                                'precision': precision,
+                                'f1': f1
+                            }
+                            logger.debug(f"PARSED OVERALL: R={recall}, P={precision}, F1={f1}")
+                            break
+                    except ValueError:
+                        continue
+        
+        return scores
+    
+    except Exception as e:
+        logger.error(f"Error parsing scorer output: {e}")
+        return {}
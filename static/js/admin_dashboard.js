@@ -0,0 +1,133 @@
+function switchTab(tabName) {
+  // Hide all tab contents
+  document.querySelectorAll(".tab-content").forEach((tab) => {
+    tab.classList.remove("active");
+  });
+
+  // Remove active class from all tab buttons
+  document.querySelectorAll(".tab-button").forEach((btn) => {
+    btn.classList.remove("active");
+  });
+
+  // Show selected tab content
+  document.getElementById(tabName).classList.add("active");
+
+  // Add active class to clicked button
+  event.target.classList.add("active");
+}
+
+function editUser(id, username, email, isActive) {
+  document.getElementById("edit_username").value = username;
+  document.getElementById("edit_email").value = email;
+  document.getElementById("edit_is_active").checked = isActive === "true";
+  document.getElementById(
+    "editUserForm"
+  ).action = `${baseUrl}/admin/update_user/${id}`;
+  document.getElementById("editUserModal").style.display = "block";
+}
+
+function editLanguage(id, languageCode, languageName) {
+  document.getElementById("edit_language_code").value = languageCode;
+  document.getElementById("edit_language_name").value = languageName;
+  document.getElementById(
+    "editLanguageForm"
+  ).action = `${baseUrl}/admin/update_language/${id}`;
+  document.getElementById("editLanguageModal").style.display = "block";
+}
+
+function closeUserModal() {
+  document.getElementById("editUserModal").style.display = "none";
+}
+
+function closeLanguageModal() {
+  document.getElementById("editLanguageModal").style.display = "none";
+}
+
+function confirmLanguageDelete(languageName) {
+  return confirm(
+    `Are you sure you want to delete the language "${languageName}"? This will also delete all associated gold datasets.`
+  );
+}
+
+async function startRescore(languageId, languageName) {
+  if (
+    !confirm(
+      `Rescore all submissions for "${languageName}" against its newest gold dataset?`
+    )
+  ) {
+    return;
+  }
+
+  const response = await fetch(`${baseUrl}/admin/rescore/${languageId}`, {
+    method: "POST",
+  });
+  const job = await response.json();
+  if (!response.ok) {
+    alert("Error: " + (job.detail || "Could not start rescoring"));
+    return;
+  }
+  pollRescore(languageId, job.job_id);
+}
+
+async function pollRescore(languageId, jobId) {
+  const status = document.getElementById(`rescore-status-${languageId}`);
+  const response = await fetch(`${baseUrl}/admin/rescore_jobs/${jobId}`);
+  const job = await response.json();
+  const total = job.total === null ? "?" : job.total;
+
+  status.textContent = `${job.status}: ${job.completed}/${total} rescored, ${job.failed} failed`;
+  if (job.status === "running") {
+    setTimeout(() => pollRescore(languageId, jobId), 2000);
+  }
+}
+
+async function importUsers(event) {
+  event.preventDefault();
+  const result = document.getElementById("importResult");
+  result.textContent = "Importing...";
+
+  const response = await fetch(`${baseUrl}/admin/import_users`, {
+    method: "POST",
+    body: new FormData(event.target),
+  });
+  const report = await response.json();
+  if (!response.ok) {
+    result.textContent = "Error: " + (report.detail || "Import failed");
+    return;
+  }
+
+  const lines = [
+    report.dry_run
+      ? `${report.valid} rows valid, ${report.errors.length} rejected`
+      : `${report.imported} users imported, ${report.errors.length} rows rejected`,
+  ];
+  report.errors.forEach((e) =>
+    lines.push(`Line ${e.line} (${e.username}): ${e.error}`)
+  );
+  report.generated_passwords.forEach((p) =>
+    lines.push(`${p.username}: ${p.password}`)
+  );
+  result.innerHTML = "";
+  const pre = document.createElement("pre");
+  pre.textContent = lines.join("\n");
+  result.appendChild(pre);
+}
+
+function toggleProfiling(enabled) {
+  document.cookie = enabled
+    ? "profile_requests=1; path=/; max-age=3600"
+    : "profile_requests=; path=/; max-age=0";
+}
+
+// Close modals when clicking outside
+window.onclick = function (event) {
+  const userModal = document.getElementById("editUserModal");
+  const languageModal = document.getElementById("editLanguageModal");
+
+  if (event.target === userModal) {
+    closeUserModal();
+  }
+  if (event.target === languageModal) {
+    closeLanguageModal();
+  }
+};
@@ -0,0 +1,256 @@
+document
+  .getElementById("evaluationForm")
+  .addEventListener("submit", async function (e) {
+    e.preventDefault();
+
+    const fileInput = document.getElementById("file");
+    const selectedFiles = Array.from(fileInput.files);
+    const isBatch =
+      selectedFiles.length > 1 ||
+      selectedFiles.some((f) => f.name.endsWith(".zip"));
+    const isPreview =
+      !isBatch && document.getElementById("preview").checked;
+
+    const formData = new FormData();
+    formData.append(
+      "language_id",
+      document.getElementById("language").value
+    );
+    selectedFiles.forEach((f) =>
+      formData.append(isBatch ? "files" : "file", f)
+    );
+    if (isPreview) {
+      formData.append("preview", "true");
+    }
+
+    const submitBtn = document.getElementById("submitBtn");
+    const loading = document.getElementById("loading");
+    const results = document.getElementById("results");
+
+    // Show loading state
+    submitBtn.disabled = true;
+    submitBtn.textContent = "⏳ Evaluating...";
+    loading.style.display = "block";
+    results.style.display = "none";
+    document.getElementById("previewNote").style.display = "none";
+
+    try {
+      const endpoint = isBatch
+        ? "evaluate_batch"
+        : isPreview
+        ? "evaluate"
+        : "evaluate_async";
+      const response = await fetch(`${baseUrl}/${endpoint}`, {
+        method: "POST",
+        body: formData,
+      });
+
+      const data = await response.json();
+
+      if (response.ok && data.success && isBatch) {
+        displayBatchResults(data.results);
+        showSuccessMessage();
+        document.getElementById("evaluationForm").reset();
+      } else if (response.ok && data.success && data.preview) {
+        displayResults(data.scores);
+        const previewNote = document.getElementById("previewNote");
+        previewNote.textContent = `⚡ ${data.message}`;
+        previewNote.style.display = "block";
+        document.getElementById("successMessage").style.display = "none";
+      } else if (response.ok && data.success) {
+        // Scoring runs in the background; follow its progress until it finishes
+        const scores = await followEvaluation(data.events_url);
+        displayResults(scores);
+        showSuccessMessage();
+        // Reset form
+        document.getElementById("evaluationForm").reset();
+      } else {
+        alert("Error: " + (data.detail || "Unknown error occurred"));
+      }
+    } catch (error) {
+      alert("Error: " + error.message);
+    } finally {
+      // Reset form state
+      submitBtn.disabled = false;
+      submitBtn.textContent = "🚀 Evaluate File";
+      loading.style.display = "none";
+      resetProgress();
+    }
+  });
+
+function followEvaluation(eventsUrl) {
+  return new Promise((resolve, reject) => {
+    const source = new EventSource(eventsUrl);
+
+    source.addEventListener("progress", (event) => {
+      showProgress(JSON.parse(event.data));
+    });
+    source.addEventListener("complete", (event) => {
+      source.close();
+      resolve(JSON.parse(event.data).scores);
+    });
+    source.addEventListener("error", (event) => {
+      source.close();
+      // Server-sent "error" events carry data; connection failures do not
+      reject(
+        new Error(
+          event.data
+            ? JSON.parse(event.data).error
+            : "Lost connection while waiting for results"
+        )
+      );
+    });
+  });
+}
+
+function showProgress(job) {
+  const loadingText = document.getElementById("loadingText");
+  const progressTrack = document.getElementById("progressTrack");
+  const progressBar = document.getElementById("progressBar");
+
+  if (job.status === "queued") {
+    loadingText.textContent = "⏳ Waiting for a free scorer...";
+    return;
+  }
+  if (!job.documents_total) {
+    loadingText.textContent = "⏳ Evaluating your file... Please wait.";
+    return;
+  }
+
+  const current = job.document
+    ? ` (${job.document}: ${job.metric.toUpperCase()})`
+    : "";
+  loadingText.textContent = `⏳ Scored ${job.documents_done} of ${job.documents_total} documents${current}`;
+  progressTrack.style.display = "block";
+  progressBar.style.width = `${(100 * job.documents_done) / job.documents_total}%`;
+}
+
+function resetProgress() {
+  document.getElementById("loadingText").textContent =
+    "⏳ Evaluating your file... Please wait.";
+  document.getElementById("progressTrack").style.display = "none";
+  document.getElementById("progressBar").style.width = "0";
+}
+
+function displayResults(scores) {
+  const container = document.getElementById("scoresContainer");
+  const results = document.getElementById("results");
+
+  let html = "";
+
+  const metrics = [
+    { name: "MUC", key: "muc" },
+    { name: "B-CUBED", key: "bcub" },
+    { name: "CEAF-M", key: "ceafm" },
+    { name: "CEAF-E", key: "ceafe" },
+    { name: "BLANC", key: "blanc" },
+  ];
+
+  metrics.forEach((metric) => {
+    if (scores[metric.key]) {
+      const score = scores[metric.key];
+      html += `
+                  <div class="metric-row">
+                      <span class="metric-name">${metric.name}</span>
+                      <div class="metric-values">
+                          <span class="metric-value">R: ${score.recall.toFixed(
+                            4
+                          )}</span>
+                          <span class="metric-value">P: ${score.precision.toFixed(
+                            4
+                          )}</span>
+                          <span class="metric-value">F1: ${score.f1.toFixed(
+                            4
+                          )}</span>
+                      </div>
+                  </div>
+              `;
+    }
+  });
+
+  container.innerHTML = html;
+  results.style.display = "block";
+}
+
+function displayBatchResults(batchResults) {
+  const container = document.getElementById("scoresContainer");
+  const results = document.getElementById("results");
+
+  let html = "";
+  batchResults.forEach((result) => {
+    const value = result.success
+      ? ["muc", "bcub", "ceafm", "blanc"]
+          .filter((key) => result.scores[key])
+          .map(
+            (key) =>
+              `<span class="metric-value">${key.toUpperCase()}: ${result.scores[
+                key
+              ].f1.toFixed(4)}</span>`
+          )
+          .join("")
+      : `<span class="metric-value">❌ ${result.error}</span>`;
+    html += `
+              <div class="metric-row">
+                  <span class="metric-name">${result.filename}</span>
+                  <div class="metric-values">${value}</div>
+              </div>
+          `;
+  });
+
+  container.innerHTML = html;
+  results.style.display = "block";
+}
+
+function showSuccessMessage() {
+  const successMessage = document.getElementById("successMessage");
+  const refreshBtn = document.getElementById("refreshBtn");
+  successMessage.style.display = "block";
+  refreshBtn.style.display = "inline-block";
+}
+
+function refreshHistory() {
+  window.location.reload();
+}
+
+function formatScore(value) {
+  return value === null || value === undefined || value === 0
+    ? "N/A"
+    : Number(value).toFixed(4);
+}
+
+async function loadOlderHistory() {
+  const button = document.getElementById("loadOlderBtn");
+  button.disabled = true;
+  const response = await fetch(
+    `${baseUrl}/history?cursor=${encodeURIComponent(button.dataset.cursor)}`
+  );
+  const page = await response.json();
+  button.disabled = false;
+  if (!response.ok) {
+    alert("Error: " + (page.detail || "Could not load history"));
+    return;
+  }
+
+  const rows = document.getElementById("historyRows");
+  for (const evaluation of page.evaluations) {
+    const row = rows.insertRow();
+    const cells = [
+      evaluation.created_at,
+      evaluation.uploaded_filename,
+      evaluation.language_name,
+    ];
+    for (const text of cells) {
+      row.insertCell().textContent = text;
+    }
+    for (const metric of ["muc_f1", "bcub_f1", "ceafm_f1", "blanc_f1"]) {
+      const cell = row.insertCell();
+      cell.className = "score";
+      cell.textContent = formatScore(evaluation[metric]);
+    }
+  }
+
+  button.dataset.cursor = page.next_cursor || "";
+  if (!page.next_cursor) {
+    button.style.display = "none";
+  }
+}
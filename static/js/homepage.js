@@ -0,0 +1,136 @@
+// leaderboardColumns, leaderboardRows, leaderboardEventsUrl and lastEvaluationId
+// are set by the page. Rows arrive as arrays in leaderboardColumns order.
+const leaderboardData = {};
+
+function leaderboardRecord(values) {
+    const record = {};
+    leaderboardColumns.forEach(function(column, index) {
+        record[column] = values[index];
+    });
+    return record;
+}
+
+for (const languageId in leaderboardRows) {
+    leaderboardData[languageId] = leaderboardRows[languageId].map(leaderboardRecord);
+}
+
+const itemsPerPage = 5;
+const currentPages = {};
+
+function renderTable(languageId, page) {
+    const allScores = leaderboardData[languageId];
+    if (!allScores || allScores.length === 0) return;
+
+    const tbody = document.getElementById('tbody-lang-' + languageId);
+    const start = (page - 1) * itemsPerPage;
+    const end = start + itemsPerPage;
+    const pageScores = allScores.slice(start, end);
+
+    tbody.innerHTML = '';
+
+    pageScores.forEach(function(score, index) {
+        const globalRank = start + index + 1;
+        const row = document.createElement('tr');
+
+        let rankClass = '';
+        let rankText = globalRank;
+
+        if (globalRank === 1) {
+            rankText = '1';
+        } else if (globalRank === 2) {
+            rankText = '2';
+        } else if (globalRank === 3) {
+            rankText = '3';
+        }
+
+        row.innerHTML = '<td class="' + rankClass + '">' + rankText + '</td>' +
+            '<td><strong>' + score.username + '</strong></td>' +
+            '<td class="score">' + (score.muc_f1 ? score.muc_f1.toFixed(4) : 'N/A') + '</td>' +
+            '<td class="score">' + (score.bcub_f1 ? score.bcub_f1.toFixed(4) : 'N/A') + '</td>' +
+            '<td class="score">' + (score.ceafm_f1 ? score.ceafm_f1.toFixed(4) : 'N/A') + '</td>' +
+            '<td class="score">' + (score.blanc_f1 ? score.blanc_f1.toFixed(4) : 'N/A') + '</td>';
+
+        tbody.appendChild(row);
+    });
+}
+
+function renderPagination(languageId) {
+    const allScores = leaderboardData[languageId];
+    if (!allScores || allScores.length === 0) return;
+
+    const totalPages = Math.ceil(allScores.length / itemsPerPage);
+    const currentPage = currentPages[languageId] || 1;
+    const pagination = document.getElementById('pagination-lang-' + languageId);
+
+    if (totalPages <= 1) {
+        pagination.style.display = 'none';
+        return;
+    }
+
+    pagination.innerHTML = '<button onclick="changePage(' + languageId + ', ' + (currentPage - 1) + ')" ' + (currentPage === 1 ? 'disabled' : '') + '>Previous</button>' +
+        '<span class="page-info">Page ' + currentPage + ' of ' + totalPages + '</span>' +
+        '<button onclick="changePage(' + languageId + ', ' + (currentPage + 1) + ')" ' + (currentPage === totalPages ? 'disabled' : '') + '>Next</button>';
+}
+
+function changePage(languageId, page) {
+    const allScores = leaderboardData[languageId];
+    if (!allScores || allScores.length === 0) return;
+
+    const totalPages = Math.ceil(allScores.length / itemsPerPage);
+    if (page < 1 || page > totalPages) return;
+
+    currentPages[languageId] = page;
+    renderTable(languageId, page);
+    renderPagination(languageId);
+}
+
+// Rank newly saved evaluations into the tables without reloading
+function applyLeaderboardEntries(entries) {
+    const changed = {};
+    entries.forEach(function(entry) {
+        lastEvaluationId = Math.max(lastEvaluationId, entry.id);
+        const scores = leaderboardData[entry.language_id];
+        if (!scores || scores.some(function(score) { return score.id === entry.id; })) return;
+        if (scores.length === 0) {
+            // The first score of a language needs the table markup
+            window.location.reload();
+            return;
+        }
+        let position = scores.findIndex(function(score) { return (score.avg_f1 || 0) < entry.avg_f1; });
+        if (position === -1) position = scores.length;
+        scores.splice(position, 0, entry);
+        changed[entry.language_id] = true;
+    });
+    for (var languageId in changed) {
+        renderTable(parseInt(languageId), currentPages[languageId] || 1);
+        renderPagination(parseInt(languageId));
+    }
+}
+
+function followLeaderboards() {
+    const events = new EventSource(leaderboardEventsUrl + '?after=' + lastEvaluationId);
+    events.addEventListener('scores', function(event) {
+        applyLeaderboardEntries(JSON.parse(event.data).entries.map(leaderboardRecord));
+    });
+    events.addEventListener('reset', function(event) {
+        if (leaderboardData[JSON.parse(event.data).language_id]) window.location.reload();
+    });
+    events.onerror = function() {
+        // Reconnect from the newest evaluation seen rather than the page's original one
+        events.close();
+        setTimeout(followLeaderboards, 5000);
+    };
+}
+
+// Initialize all leaderboards on page load
+document.addEventListener('DOMContentLoaded', function() {
+    for (var languageId in leaderboardData) {
+        if (leaderboardData.hasOwnProperty(languageId)) {
+            currentPages[languageId] = 1;
+            renderTable(parseInt(languageId), 1);
+            renderPagination(parseInt(languageId));
+        }
+    }
+    // Frozen campaign snapshots have no live updates
+    if (leaderboardEventsUrl) followLeaderboards();
+});
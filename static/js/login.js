@@ -0,0 +1,90 @@
+function fillCredentials(username, password) {
+  document.getElementById("username").value = username;
+  document.getElementById("password").value = password;
+
+  // Add a subtle animation to indicate the fields were filled
+  const usernameField = document.getElementById("username");
+  const passwordField = document.getElementById("password");
+
+  usernameField.style.transform = "scale(1.03)";
+  passwordField.style.transform = "scale(1.03)";
+
+  setTimeout(() => {
+    usernameField.style.transform = "scale(1)";
+    passwordField.style.transform = "scale(1)";
+  }, 200);
+}
+
+function copyCredentials(username, password) {
+  fillCredentials(username, password);
+  showMessage("Credentials filled! You can now sign in.", "success");
+}
+
+function showMessage(message, type = "error") {
+  const errorDiv = document.getElementById("errorMessage");
+  const successDiv = document.getElementById("successMessage");
+
+  if (type === "success") {
+    successDiv.textContent = message;
+    successDiv.style.display = "block";
+    errorDiv.style.display = "none";
+    setTimeout(() => {
+      successDiv.style.display = "none";
+    }, 3000);
+  } else {
+    errorDiv.textContent = message;
+    errorDiv.style.display = "block";
+    successDiv.style.display = "none";
+    setTimeout(() => {
+      errorDiv.style.display = "none";
+    }, 5000);
+  }
+}
+
+document
+  .getElementById("loginForm")
+  .addEventListener("submit", function (e) {
+    // Show loading overlay
+    document.getElementById("loadingOverlay").style.display = "flex";
+
+    // Hide any existing messages
+    document.getElementById("errorMessage").style.display = "none";
+    document.getElementById("successMessage").style.display = "none";
+  });
+
+// Check for error message from server (if redirected back with error)
+window.onload = function () {
+  const urlParams = new URLSearchParams(window.location.search);
+  const error = urlParams.get("error");
+  if (error) {
+    showMessage(decodeURIComponent(error), "error");
+  }
+};
+
+// Add keyboard shortcuts
+document.addEventListener("keydown", function (e) {
+  // Ctrl/Cmd + 1 for test user
+  if ((e.ctrlKey || e.metaKey) && e.key === "1") {
+    e.preventDefault();
+    fillCredentials("testuser", "user123");
+  }
+  // Ctrl/Cmd + 2 for admin
+  if ((e.ctrlKey || e.metaKey) && e.key === "2") {
+    e.preventDefault();
+    fillCredentials("admin", "admin123");
+  }
+});
+
+// Add focus animations
+const inputs = document.querySelectorAll(
+  'input[type="text"], input[type="password"]'
+);
+inputs.forEach((input) => {
+  input.addEventListener("focus", function () {
+    this.parentElement.style.transform = "scale(1.01)";
+  });
+
+  input.addEventListener("blur", function () {
+    this.parentElement.style.transform = "scale(1)";
+  });
+});
@@ -0,0 +1,54 @@
+"""Shared fixtures: tests run against main.py with a fresh SQLite database each
+
+Run from the repository root with `python -m pytest`. main.py creates its upload and
+cache directories relative to the working directory when it is imported.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+# Settings main.py reads at import time
+TEST_DIR = tempfile.mkdtemp(prefix="coref_tests_")
+os.environ['DB_BACKEND'] = 'sqlite'
+os.environ['SQLITE_PATH'] = os.path.join(TEST_DIR, 'import.sqlite3')
+os.environ['EVALUATION_SPILL_PATH'] = os.path.join(TEST_DIR, 'evaluation_spill.jsonl')
+os.environ['TEMPLATE_CACHE_DIR'] = ''
+
+import main  # noqa: E402
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """An empty SQLite database with one user and one language; returns (user_id, language_id)"""
+    monkeypatch.setattr(main, 'DB_BACKEND', 'sqlite')
+    monkeypatch.setattr(main, 'SQLITE_PATH', str(tmp_path / 'test.sqlite3'))
+    monkeypatch.setattr(main, 'sqlite_schema_ready', False)
+    monkeypatch.setattr(main, 'DEMO_EVALUATIONS', [])
+
+    conn = main.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO users (username, email, password_hash) VALUES (%s, %s, %s)", ('participant', 'participant@example.org', 'x'))
+    user_id = cursor.lastrowid
+    cursor.execute("INSERT INTO languages (language_code, language_name) VALUES (%s, %s)", ('hi', 'Hindi'))
+    language_id = cursor.lastrowid
+    conn.commit()
+    conn.close()
+    return user_id, language_id
+
+
+def query(sql: str, params: tuple = ()) -> list:
+    """Rows of a query against the current test database"""
+    conn = main.get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+    finally:
+        conn.close()
@@ -0,0 +1,153 @@
+import threading
+import time
+
+import pytest
+
+import main
+from conftest import query
+
+SCORES = {'muc': {'recall': 0.5, 'precision': 0.5, 'f1': 0.5}}
+DOCUMENT_COUNTS = {'doc1': {component: [1, 2, 3, 4] for component in main.DOCUMENT_SCORE_COMPONENTS}}
+
+
+@pytest.fixture
+def writer(database, tmp_path):
+    """A writer that lingers long enough for concurrent saves to meet, and never replays on its own"""
+    writer = main.EvaluationWriter(
+        flush_seconds=0.2, max_rows=200, spill_path=str(tmp_path / 'spill.jsonl'), retry_seconds=3600, save_timeout=5
+    )
+    # Skip the replay the writer thread runs after its first write
+    writer._next_replay = time.monotonic() + 3600
+    return writer
+
+
+def count_inserts(writer, monkeypatch) -> list:
+    """Record the number of saves in every transaction the writer opens"""
+    transactions = []
+    insert = writer._insert
+
+    def counted(conn, records):
+        transactions.append(len(records))
+        return insert(conn, records)
+
+    monkeypatch.setattr(writer, '_insert', counted)
+    return transactions
+
+
+def save_concurrently(writer, saves: list):
+    barrier = threading.Barrier(len(saves))
+
+    def save(user_id, language_id, results):
+        barrier.wait()
+        writer.save(user_id, language_id, results)
+
+    threads = [threading.Thread(target=save, args=arguments) for arguments in saves]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+
+def test_concurrent_saves_share_one_commit(writer, database, monkeypatch):
+    user_id, language_id = database
+    transactions = count_inserts(writer, monkeypatch)
+
+    save_concurrently(writer, [
+        (user_id, language_id, [(f"run{number}.txt", f"uploads/run{number}.txt", SCORES, DOCUMENT_COUNTS)])
+        for number in range(20)
+    ])
+
+    assert transactions == [20]
+    assert query("SELECT COUNT(*) FROM user_evaluations") == [(20,)]
+    assert query("SELECT COUNT(*) FROM evaluation_document_scores") == [(20,)]
+    assert writer.spilled_count() == 0
+
+
+def test_rows_of_one_save_are_committed_together(writer, database):
+    user_id, language_id = database
+    writer.save(user_id, language_id, [("a.txt", "uploads/a.txt", SCORES, None), ("b.txt", "uploads/b.txt", SCORES, None)])
+    assert query("SELECT uploaded_filename FROM user_evaluations ORDER BY id") == [("a.txt",), ("b.txt",)]
+
+
+def test_bad_save_does_not_take_the_group_down(writer, database, monkeypatch):
+    user_id, language_id = database
+    transactions = count_inserts(writer, monkeypatch)
+
+    save_concurrently(writer, [
+        (user_id, language_id, [("good1.txt", "uploads/good1.txt", SCORES, None)]),
+        (999, language_id, [("orphan.txt", "uploads/orphan.txt", SCORES, None)]),
+        (user_id, language_id, [("good2.txt", "uploads/good2.txt", SCORES, None)]),
+    ])
+
+    # The group failed on the unknown user, then every save was retried on its own
+    assert transactions == [3, 1, 1, 1]
+    assert sorted(query("SELECT uploaded_filename FROM user_evaluations")) == [("good1.txt",), ("good2.txt",)]
+    assert writer.spilled_count() == 1
+
+
+def test_outage_spills_and_replay_stores_once(writer, database, monkeypatch):
+    user_id, language_id = database
+    with monkeypatch.context() as outage:
+        outage.setattr(writer, '_connection', lambda: None)
+        writer.save(user_id, language_id, [("late.txt", "uploads/late.txt", SCORES, DOCUMENT_COUNTS)])
+
+    assert writer.spilled_count() == 1
+    assert writer.spilled_file_paths() == {"uploads/late.txt"}
+    assert query("SELECT COUNT(*) FROM user_evaluations") == [(0,)]
+    # Shown from demo storage while the database is away
+    assert [evaluation['uploaded_filename'] for evaluation in main.DEMO_EVALUATIONS] == ["late.txt"]
+
+    writer.replay_spill()
+
+    assert writer.spilled_count() == 0
+    assert query("SELECT uploaded_filename, muc_f1 FROM user_evaluations") == [("late.txt", 0.5)]
+    assert query("SELECT COUNT(*) FROM evaluation_document_scores") == [(1,)]
+    assert main.DEMO_EVALUATIONS == []
+
+    writer.replay_spill()
+    assert query("SELECT COUNT(*) FROM user_evaluations") == [(1,)]
+
+
+def test_replay_sets_rejected_saves_aside(writer, database, monkeypatch, tmp_path):
+    user_id, language_id = database
+    with monkeypatch.context() as outage:
+        outage.setattr(writer, '_connection', lambda: None)
+        writer.save(999, language_id, [("orphan.txt", "uploads/orphan.txt", SCORES, None)])
+        writer.save(user_id, language_id, [("kept.txt", "uploads/kept.txt", SCORES, None)])
+
+    writer.replay_spill()
+
+    assert query("SELECT uploaded_filename FROM user_evaluations") == [("kept.txt",)]
+    assert writer.spilled_count() == 0
+    assert (tmp_path / 'spill.jsonl.rejected').read_text().count('\n') == 1
+    assert main.DEMO_EVALUATIONS == []
+
+
+def test_replay_stops_at_an_outage_and_keeps_the_rest(writer, database, monkeypatch):
+    user_id, language_id = database
+    monkeypatch.setattr(writer, '_connection', lambda: None)
+    writer.save(user_id, language_id, [("one.txt", "uploads/one.txt", SCORES, None)])
+    writer.save(user_id, language_id, [("two.txt", "uploads/two.txt", SCORES, None)])
+
+    writer.replay_spill()
+
+    assert writer.spilled_count() == 2
+    assert len(main.DEMO_EVALUATIONS) == 2
+
+
+def test_save_is_spilled_when_the_database_hangs(writer, database, monkeypatch):
+    user_id, language_id = database
+    writer.save_timeout = 0.2
+    release = threading.Event()
+    insert = writer._insert
+    monkeypatch.setattr(writer, '_insert', lambda conn, records: (release.wait(5), insert(conn, records))[1])
+
+    started = time.monotonic()
+    writer.save(user_id, language_id, [("stuck.txt", "uploads/stuck.txt", SCORES, None)])
+    queued_at = time.monotonic()
+    writer.save(user_id, language_id, [("queued.txt", "uploads/queued.txt", SCORES, None)])
+
+    assert queued_at - started < 2
+    assert time.monotonic() - queued_at < 2
+    assert writer.spilled_count() == 2
+    release.set()
@@ -0,0 +1,91 @@
+import base64
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+import main
+from conftest import query
+
+
+def add_evaluations(user_id: int, language_id: int, created_at: list) -> list:
+    """Insert one evaluation per timestamp and return their ids"""
+    conn = main.get_db_connection()
+    cursor = conn.cursor()
+    ids = []
+    for number, timestamp in enumerate(created_at):
+        cursor.execute(main.EVALUATION_INSERT_SQL, main.evaluation_insert_params(
+            user_id, language_id, f"run{number}.txt", f"uploads/run{number}.txt", {'muc': {'f1': 0.5}}
+        ))
+        ids.append(cursor.lastrowid)
+        cursor.execute("UPDATE user_evaluations SET created_at = %s WHERE id = %s", (timestamp, cursor.lastrowid))
+    conn.commit()
+    conn.close()
+    return ids
+
+
+def read_all_pages(limit: int, **filters) -> list:
+    ids, cursor, pages = [], None, 0
+    while True:
+        page, cursor = main.get_evaluation_history_page(cursor=cursor, limit=limit, fields=['id', 'created_at'], **filters)
+        ids.extend(row['id'] for row in page)
+        pages += 1
+        assert pages < 100
+        if cursor is None:
+            return ids
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2025, 10, 20, 4, 4, 58)
+    cursor = main.encode_history_cursor(created_at, 42)
+    assert '=' not in cursor
+    assert main.decode_history_cursor(cursor) == (created_at, 42)
+    # SQLite returns timestamps as text
+    assert main.decode_history_cursor(main.encode_history_cursor('2025-10-20 04:04:58', 42)) == (created_at, 42)
+
+
+@pytest.mark.parametrize('cursor', [
+    'not-a-cursor',
+    main.encode_history_cursor('yesterday', 1),
+    base64.urlsafe_b64encode(b'[1]').decode(),
+    base64.urlsafe_b64encode(b'["2025-10-20 10:00:00", "x"]').decode()
+])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as rejected:
+        main.decode_history_cursor(cursor)
+    assert rejected.value.status_code == 400
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 7])
+def test_pages_cover_tied_timestamps_exactly_once(database, limit):
+    user_id, language_id = database
+    # Saves committed in the same second share created_at; id breaks the tie
+    ids = add_evaluations(user_id, language_id, [
+        '2025-10-20 10:00:00', '2025-10-20 10:00:01', '2025-10-20 10:00:01',
+        '2025-10-20 10:00:01', '2025-10-20 10:00:02', '2025-10-20 10:00:02', '2025-10-20 09:59:59'
+    ])
+    expected = [row[0] for row in query("SELECT id FROM user_evaluations ORDER BY created_at DESC, id DESC")]
+
+    assert read_all_pages(limit, user_id=user_id) == expected
+    assert sorted(expected) == sorted(ids)
+
+
+def test_last_page_has_no_cursor(database):
+    user_id, language_id = database
+    add_evaluations(user_id, language_id, ['2025-10-20 10:00:00', '2025-10-20 10:00:00'])
+
+    page, cursor = main.get_evaluation_history_page(user_id=user_id, limit=2, fields=['id'])
+    assert len(page) == 2
+    assert cursor is None
+
+
+def test_demo_storage_pages_by_the_same_keys(monkeypatch, tmp_path):
+    monkeypatch.setattr(main, 'SQLITE_PATH', str(tmp_path / 'missing' / 'db.sqlite3'))
+    monkeypatch.setattr(main, 'sqlite_schema_ready', False)
+    tied = datetime(2025, 10, 20, 10, 0, 0)
+    monkeypatch.setattr(main, 'DEMO_EVALUATIONS', [
+        {'id': number, 'user_id': 2, 'language_id': 1, 'created_at': tied if number % 2 else datetime(2025, 10, 19)}
+        for number in range(1, 8)
+    ])
+
+    assert read_all_pages(2, user_id=2) == [7, 5, 3, 1, 6, 4, 2]
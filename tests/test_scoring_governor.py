@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+import main
+
+
+def wait_until(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+
+def test_waiting_owners_are_served_round_robin():
+    governor = main.ScoringGovernor(max_concurrent=1, max_queue=10, queue_timeout=5)
+    order = []
+
+    def score(owner, label):
+        with governor.slot(owner, interactive=False):
+            order.append(label)
+
+    with governor.slot('busy'):
+        threads = []
+        # Queue a burst from one participant, then a single submission from another
+        for owner, label in [('alice', 'a1'), ('alice', 'a2'), ('alice', 'a3'), ('bob', 'b1')]:
+            thread = threading.Thread(target=score, args=(owner, label))
+            thread.start()
+            threads.append(thread)
+            wait_until(lambda: governor.status()['queued'] == len(threads))
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert order == ['a1', 'b1', 'a2', 'a3']
+    assert governor.status()['active'] == 0
+    assert governor.status()['queued'] == 0
+
+
+def test_full_queue_rejects_interactive_requests_with_retry_after():
+    governor = main.ScoringGovernor(max_concurrent=1, max_queue=0, queue_timeout=5)
+
+    with governor.slot('alice'):
+        with pytest.raises(HTTPException) as rejected:
+            with governor.slot('bob'):
+                pass
+        with pytest.raises(HTTPException):
+            governor.check_admission()
+
+    assert rejected.value.status_code == 429
+    assert int(rejected.value.headers['Retry-After']) >= 1
+    governor.check_admission()
+
+
+def test_interactive_wait_times_out_and_leaves_the_queue():
+    governor = main.ScoringGovernor(max_concurrent=1, max_queue=5, queue_timeout=0.05)
+
+    with governor.slot('alice'):
+        with pytest.raises(HTTPException) as rejected:
+            with governor.slot('bob'):
+                pass
+        assert governor.status()['queued'] == 0
+
+    assert rejected.value.status_code == 429
+    assert 'Retry-After' in rejected.value.headers
+
+
+def test_background_work_waits_instead_of_being_rejected():
+    governor = main.ScoringGovernor(max_concurrent=1, max_queue=0, queue_timeout=0.01)
+    done = threading.Event()
+
+    def background():
+        with governor.slot('rescore', interactive=False):
+            done.set()
+
+    with governor.slot('alice'):
+        thread = threading.Thread(target=background)
+        thread.start()
+        wait_until(lambda: governor.status()['queued'] == 1)
+        time.sleep(0.05)
+        assert not done.is_set()
+    thread.join(timeout=5)
+    assert done.is_set()
+
+
+def test_retry_after_grows_with_the_backlog():
+    governor = main.ScoringGovernor(max_concurrent=2, max_queue=0, queue_timeout=5)
+    with governor.slot('alice'):
+        with governor.slot('bob'):
+            with pytest.raises(HTTPException) as rejected:
+                governor.check_admission()
+    # Two running scorings of the initial 10 s estimate on two slots
+    assert rejected.value.headers['Retry-After'] == '10'
@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import main
+from conftest import query
+
+GOLD = {'id': None, 'file_path': 'gold_datasets/lang_1/gold.txt'}
+
+
+@pytest.fixture
+def jobs(database):
+    """Enqueue a function creating jobs for the test user; returns it"""
+    user_id, language_id = database
+
+    def enqueue(job_id: str):
+        assert main.enqueue_scoring_job(job_id, user_id, language_id, f"{job_id}.txt", GOLD, f"uploads/{job_id}.txt")
+        return job_id
+
+    return enqueue
+
+
+def expire_lease(job_id: str):
+    conn = main.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("UPDATE scoring_jobs SET lease_expires_at = %s WHERE id = %s", (datetime.now() - timedelta(seconds=1), job_id))
+    conn.commit()
+    conn.close()
+
+
+def job_state(job_id: str) -> tuple:
+    return query("SELECT status, attempts, lease_owner FROM scoring_jobs WHERE id = %s", (job_id,))[0]
+
+
+def test_jobs_are_claimed_oldest_first_and_only_once(jobs):
+    jobs('first')
+    jobs('second')
+
+    claimed = main.claim_scoring_job('worker-1')
+    assert claimed['id'] == 'first'
+    assert claimed['attempts'] == 1
+    assert job_state('first') == ('running', 1, 'worker-1')
+
+    assert main.claim_scoring_job('worker-2')['id'] == 'second'
+    assert main.claim_scoring_job('worker-3') is None
+
+
+def test_only_the_lease_owner_can_renew(jobs):
+    jobs('job')
+    main.claim_scoring_job('worker-1')
+
+    assert main.renew_scoring_job('job', 'worker-1', documents_done=3, documents_total=10)
+    assert not main.renew_scoring_job('job', 'worker-2')
+    assert query("SELECT documents_done, documents_total FROM scoring_jobs WHERE id = 'job'") == [(3, 10)]
+
+
+def test_expired_lease_moves_the_job_to_another_worker(jobs):
+    jobs('job')
+    main.claim_scoring_job('worker-1')
+    expire_lease('job')
+
+    reclaimed = main.claim_scoring_job('worker-2')
+    assert reclaimed['id'] == 'job'
+    assert reclaimed['attempts'] == 2
+    # The first worker lost its lease and can neither renew nor finish the job
+    assert not main.renew_scoring_job('job', 'worker-1')
+    main.finish_scoring_job('job', 'worker-1', scores={'muc': {'f1': 1.0}})
+    assert job_state('job') == ('running', 2, 'worker-2')
+
+
+def test_retry_requeues_with_backoff(jobs, monkeypatch):
+    monkeypatch.setattr(main, 'SCORING_JOB_RETRY_SECONDS', 60)
+    jobs('job')
+    main.claim_scoring_job('worker-1')
+
+    main.finish_scoring_job('job', 'worker-1', error="Database unavailable", retry=True, attempts=1)
+    assert job_state('job') == ('queued', 1, None)
+    # Not runnable again until the backoff has passed
+    assert main.claim_scoring_job('worker-1') is None
+
+    conn = main.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("UPDATE scoring_jobs SET available_at = %s WHERE id = 'job'", (datetime.now() - timedelta(seconds=1),))
+    conn.commit()
+    conn.close()
+    assert main.claim_scoring_job('worker-1')['attempts'] == 2
+
+
+def test_last_failed_attempt_is_not_retried(jobs):
+    jobs('job')
+    for attempt in range(1, main.SCORING_JOB_MAX_ATTEMPTS + 1):
+        assert main.claim_scoring_job('worker-1')['attempts'] == attempt
+        main.finish_scoring_job('job', 'worker-1', error="Scorer crashed", retry=True, attempts=attempt)
+        conn = main.get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("UPDATE scoring_jobs SET available_at = %s WHERE id = 'job'", (datetime.now() - timedelta(seconds=1),))
+        conn.commit()
+        conn.close()
+
+    assert job_state('job') == ('failed', main.SCORING_JOB_MAX_ATTEMPTS, None)
+    assert main.claim_scoring_job('worker-1') is None
+
+
+def test_job_that_keeps_losing_its_worker_is_dead_lettered(jobs):
+    jobs('poison')
+    for attempt in range(1, main.SCORING_JOB_MAX_ATTEMPTS + 1):
+        assert main.claim_scoring_job(f'worker-{attempt}')['attempts'] == attempt
+        # The worker is killed (e.g. by the memory limit) before it can finish the job
+        expire_lease('poison')
+
+    assert main.claim_scoring_job('worker-next') is None
+    status, attempts, lease_owner = job_state('poison')
+    assert (status, attempts, lease_owner) == ('failed', main.SCORING_JOB_MAX_ATTEMPTS, None)
+    assert query("SELECT error FROM scoring_jobs WHERE id = 'poison'")[0][0]
+
+
+def test_dead_lettering_does_not_block_other_jobs(jobs):
+    jobs('poison')
+    for attempt in range(main.SCORING_JOB_MAX_ATTEMPTS):
+        main.claim_scoring_job('worker-1')
+        expire_lease('poison')
+    jobs('healthy')
+
+    assert main.claim_scoring_job('worker-2')['id'] == 'healthy'
+    assert job_state('poison')[0] == 'failed'
+
+
+def test_completed_job_keeps_its_scores(jobs):
+    jobs('job')
+    main.claim_scoring_job('worker-1')
+    main.finish_scoring_job('job', 'worker-1', scores={'muc': {'f1': 0.75}})
+
+    snapshot = main.load_scoring_job('job')
+    assert snapshot['status'] == 'completed'
+    assert snapshot['scores'] == {'muc': {'f1': 0.75}}
+    assert main.claim_scoring_job('worker-1') is None
@@ -0,0 +1,138 @@
+"""Standalone scoring worker for the durable scoring queue
+
+Run one or more of these next to (or instead of scoring in) the web servers when
+SCORING_QUEUE=database. Each worker claims jobs from the scoring_jobs table under
+a lease, scores them with the same code as the web process, saves the results
+through save_evaluation_results and records the outcome on the job.
+
+A job whose worker dies is picked up again once its lease expires. Failures from
+bad input (4xx) fail the job at once; anything else is retried with exponential
+backoff until SCORING_JOB_MAX_ATTEMPTS, after which the job stays failed with its
+last error (the dead letters can be listed with
+`SELECT * FROM scoring_jobs WHERE status = 'failed'`).
+
+Results are saved before the job is marked completed, so a worker that dies in
+between causes the job to be scored and saved again: delivery is at least once.
+
+Run from the repository root, with the same DB_* settings, gold_datasets/ and
+submission store as the web servers:
+    python -m worker
+    python -m worker --concurrency 4
+    python -m worker --once        # drain the queue and exit
+"""
+
+import argparse
+import os
+import signal
+import socket
+import threading
+import time
+
+from fastapi import HTTPException
+
+import main
+from main import logger
+
+WORKER_CONCURRENCY = int(os.getenv('WORKER_CONCURRENCY', str(os.cpu_count() or 2)))
+WORKER_POLL_SECONDS = float(os.getenv('WORKER_POLL_SECONDS', '2'))
+
+
+def keep_lease(job_id: str, worker_id: str, done: threading.Event, lost: threading.Event):
+    """Renew the lease until the job is done, even while a long document gives no progress"""
+    while not done.wait(main.SCORING_JOB_LEASE_SECONDS / 3):
+        if not main.renew_scoring_job(job_id, worker_id):
+            lost.set()
+            return
+
+
+def process_job(job: dict, worker_id: str):
+    """Score one claimed job and record its outcome"""
+    main.request_id_var.set(job['id'])
+    logger.info(f"Scoring job {job['id']} (attempt {job['attempts']}): {job['filename']} for user {job['user_id']}")
+
+    done = threading.Event()
+    lost = threading.Event()
+    threading.Thread(target=keep_lease, args=(job['id'], worker_id, done, lost), daemon=True).start()
+    latest = {}
+    last_report = 0.0
+
+    def report_progress():
+        if latest and not main.renew_scoring_job(job['id'], worker_id, **latest):
+            lost.set()
+
+    def progress(documents_done, documents_total, document, metric):
+        nonlocal last_report
+        latest.update(documents_done=documents_done, documents_total=documents_total,
+                      document=document[:255] if document else None, metric=metric)
+        # Progress is written to the database at most every SCORING_JOB_PROGRESS_SECONDS
+        if time.monotonic() - last_report >= main.SCORING_JOB_PROGRESS_SECONDS:
+            last_report = time.monotonic()
+            report_progress()
+
+    try:
+        scores, document_counts = main.score_submission(job['gold_file_path'], job['file_path'], progress=progress)
+        report_progress()
+        if lost.is_set():
+            logger.warning(f"Lease of job {job['id']} was lost, discarding its result")
+            return
+        main.save_evaluation_results(job['user_id'], job['language_id'], job['filename'], job['file_path'],
+                                     scores, job['gold_dataset_id'], document_counts)
+        main.finish_scoring_job(job['id'], worker_id, scores=scores)
+        logger.info(f"Job {job['id']} complete")
+    except HTTPException as e:
+        # Client errors (bad format, missing files) will not improve with another attempt
+        logger.warning(f"Job {job['id']} failed: {e.detail}")
+        main.finish_scoring_job(job['id'], worker_id, error=str(e.detail), retry=e.status_code >= 500, attempts=job['attempts'])
+    except Exception as e:
+        logger.exception(f"Job {job['id']} failed: {e}")
+        main.finish_scoring_job(job['id'], worker_id, error=f"Evaluation failed: {e}", retry=True, attempts=job['attempts'])
+    finally:
+        done.set()
+
+
+def work(worker_id: str, stop: threading.Event, once: bool, poll_seconds: float):
+    """Claim and process jobs until stopped (or, with once, until none is runnable)"""
+    while not stop.is_set():
+        job = main.claim_scoring_job(worker_id)
+        if job:
+            process_job(job, worker_id)
+        elif once:
+            return
+        else:
+            stop.wait(poll_seconds)
+
+
+def main_entry():
+    parser = argparse.ArgumentParser(description="Score submissions from the durable scoring queue")
+    parser.add_argument('--concurrency', type=int, default=WORKER_CONCURRENCY, help="jobs scored at once")
+    parser.add_argument('--poll', type=float, default=WORKER_POLL_SECONDS, help="seconds between polls of an empty queue")
+    parser.add_argument('--once', action='store_true', help="exit when no job is runnable instead of waiting")
+    args = parser.parse_args()
+
+    main.check_scorer_environment()
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        logger.info("Stopping after the jobs in progress")
+        stop.set()
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    threads = [
+        threading.Thread(target=work, args=(f"{prefix}:{index}", stop, args.once, args.poll), name=f"worker-{index}")
+        for index in range(args.concurrency)
+    ]
+    logger.info(f"Scoring worker {prefix} started with {args.concurrency} slots")
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads):
+        # Join with a timeout so signals are handled promptly
+        for thread in threads:
+            thread.join(timeout=1)
+    logger.info(f"Scoring worker {prefix} stopped")
+
+
+if __name__ == "__main__":
+    main_entry()